@@ -4,32 +4,40 @@ Drug Repurposing Prediction API Server
 Flask backend that serves predictions from the trained XGBoost model.
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, g, has_request_context, jsonify, request, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-import xgboost as xgb
-import joblib
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import functools
+import hashlib
+import hmac
+import json
 import os
+import threading
+import time
+
+from catalog import Catalog
+from json_provider import FastJSONProvider
+import metrics
+from model_bundle import BundleHolder, FileWatcher, ModelBundle, ReloadBroadcast, Reloader, file_stamp
+from model_config import API_FEATURE_NAMES, API_MODEL_DIR, CHECKPOINTS_DIR, FEATURE_NAMES
+from model_registry import ModelSpec, ServedModel, load_model, load_model_data, load_served_model
+from molecule_store import CHEMBL_ID, MoleculeStore
+from name_resolver import (
+    DISEASE_BATCH_SIZE, DISEASE_ID, DRUG_BATCH_SIZE, BackgroundResolver, fetch_disease_names, fetch_drug_names
+)
+from name_store import disease_name_store, drug_name_store
+from process_thread import ProcessThread
+from response_cache import ResponseCache, cached_response, response_key
+from score_store import SCORE_COLUMN
+from startup import PENDING, READY, ArtifactLoader
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)  # orjson serialization when installed
 CORS(app)  # Enable CORS for frontend
-
-# Paths
-CHECKPOINTS_DIR = Path(__file__).parent / "checkpoints"
-API_MODEL_DIR = Path(__file__).parent / "API"
-
-# Feature names (must match the XGBoost model's expected features exactly)
-FEATURE_NAMES = [
-    'genetic_score',
-    'somatic_score_raw',
-    'somatic_score_masked',
-    'max_association_score',
-    'gene_overlap_count',
-    'mean_plddt',
-    'low_confidence_frac'
-]
+metrics.init_app(app)  # Request/stage timings at /api/metrics
 
 # Disease name mapping (common diseases)
 DISEASE_NAMES = {
@@ -350,288 +358,290 @@ DRUG_NAMES = {
     'CHEMBL939': 'Hydroxychloroquine',
 }
 
-# Global model and data (original model)
-model = None
-scaler = None
-train_pairs = None
-train_features = None
-diseases_list = None
-drugs_list = None
-
-# Global model and data (new API model with larger dataset)
-api_model = None
-api_scaler = None
-api_features_df = None
-
-# Extended feature names for the new API model - must match model's expected features exactly
-# The model was trained on 7 features in this exact order (verified via model.feature_names)
-API_FEATURE_NAMES = [
-    'genetic_score',
-    'somatic_score_raw',
-    'somatic_score_masked',
-    'max_association_score',
-    'gene_overlap_count',
-    'mean_plddt',
-    'low_confidence_frac'
-]
+# Everything the endpoints read (every loaded model and its data), swapped as
+# one reference on reload (see model_bundle.py)
+_bundles = BundleHolder()
 
 
-def load_model_and_data():
-    """Load the trained model and data files."""
-    global model, scaler, train_pairs, train_features, diseases_list, drugs_list
+def _bundle() -> ModelBundle:
+    """The bundle the current request reads.
     
-    # Load XGBoost model using Booster (for JSON format)
-    model_path = CHECKPOINTS_DIR / "xgb_temporal_model.json"
-    if model_path.exists():
-        try:
-            model = xgb.Booster()
-            model.load_model(str(model_path))
-            print(f"✓ Loaded XGBoost model from {model_path}")
-        except Exception as e:
-            print(f"✗ Error loading model: {e}")
-            model = None
-    else:
-        print(f"✗ Model not found at {model_path}")
-    
-    # Load scaler
-    scaler_path = CHECKPOINTS_DIR / "feature_scaler.joblib"
-    if scaler_path.exists():
-        scaler = joblib.load(scaler_path)
-        print(f"✓ Loaded scaler from {scaler_path}")
-    
-    # Load training pairs
-    pairs_path = CHECKPOINTS_DIR / "train_pairs.csv"
-    if pairs_path.exists():
-        train_pairs = pd.read_csv(pairs_path)
-        print(f"✓ Loaded {len(train_pairs)} training pairs")
-    
-    # Load training features
-    features_path = CHECKPOINTS_DIR / "train_features_checkpoint.csv"
-    if features_path.exists():
-        train_features = pd.read_csv(features_path)
-        print(f"✓ Loaded {len(train_features)} training feature rows")
-    
-    # Load disease and drug lists
-    diseases_path = CHECKPOINTS_DIR / "diseases_list.csv"
-    if diseases_path.exists():
-        diseases_list = pd.read_csv(diseases_path)
-        print(f"✓ Loaded {len(diseases_list)} diseases")
-    
-    drugs_path = CHECKPOINTS_DIR / "drugs_list.csv"
-    if drugs_path.exists():
-        drugs_list = pd.read_csv(drugs_path)
-        print(f"✓ Loaded {len(drugs_list)} drugs")
-    
-    # Load drug name cache
+    Pinned on first use, so a reload in the middle of a request (or of a
+    streamed response) never mixes old and new artifacts.
+    """
+    if not has_request_context():
+        return _bundles.current
+    if 'bundle' not in g:
+        g.bundle = _bundles.current
+    return g.bundle
+
+
+def __getattr__(name):
+    # app.models etc. read the current bundle (scripts, benchmarks)
+    if name in ModelBundle.__slots__:
+        return getattr(_bundles.current, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _fallback_scores(pairs: pd.DataFrame) -> np.ndarray:
+    """Feature-based scores for the original pairs when its model can't be loaded."""
+    gene_overlap = _column_values(pairs, 'gene_overlap_count')
+    assoc_score = _column_values(pairs, 'max_association_score')
+    return np.minimum(0.95, (gene_overlap * 0.1 + assoc_score) / 2)
+
+
+DRUG_EXPLAIN_COLUMNS = [
+    'gene_overlap_count', 'max_association_score', 'genetic_score',
+    'animal_model_score', 'known_drug_score', 'drug_max_phase'
+]
+DISEASE_EXPLAIN_COLUMNS = ['gene_overlap_count', 'max_association_score', 'genetic_score']
+
+# Pair table columns the endpoints read, whichever model they serve
+SERVED_COLUMNS = ['chembl_id', 'disease_id', *dict.fromkeys(DRUG_EXPLAIN_COLUMNS + DISEASE_EXPLAIN_COLUMNS)]
+
+# The models the endpoints serve, picked with their ``model`` parameter; each
+# loads (lazily, see start_loading) under its own pair of artifacts
+MODELS = {
+    'original': ModelSpec(
+        'original', 'xgb_temporal', CHECKPOINTS_DIR, "train_pairs.csv", FEATURE_NAMES,
+        artifacts=('original_model', 'original_data'),
+        features_file="train_features_checkpoint.csv",
+        join_column='index',
+        diseases_file="diseases_list.csv",
+        fallback=_fallback_scores,
+        columns=SERVED_COLUMNS,
+        description='Temporal XGBoost model over the training pairs'
+    ),
+    'extended': ModelSpec(
+        'extended', 'extended_xgb_temporal', API_MODEL_DIR, "features_merged.csv", API_FEATURE_NAMES,
+        artifacts=('api_model', 'api_data'),
+        columns=SERVED_COLUMNS,
+        description='Temporal XGBoost model over the extended dataset (153K drug-disease pairs)'
+    ),
+}
+
+# Served when a request names no model (/api/predict and /api/diseases default
+# to 'original'); the v2 catalogs list this model's diseases and drugs
+DEFAULT_MODEL = 'extended'
+
+
+def _served_model(name: str) -> ServedModel:
+    """Model ``name`` of the request's bundle (an empty one until it has loaded)."""
+    return _bundle().models.get(name) or ServedModel(MODELS[name])
+
+
+def load_models(*names) -> bool:
+    """Load the named models (every registered one by default); True if they all serve."""
+    names = names or tuple(MODELS)
+    _artifacts.ensure('names', *(artifact for name in names for artifact in MODELS[name].artifacts))
+    return all(_served_model(name).serving for name in names)
+
+
+def _name_files() -> list:
+    """The JSON name caches the name stores are seeded from (watched for reloads)."""
+    return [*_drug_name_store.seed_files, *_disease_name_store.seed_files]
+
+
+_names_stamp = None
+
+def load_name_caches():
+    """Load the persisted drug and disease names."""
+    global _names_stamp
+    _names_stamp = file_stamp(_name_files())
     _load_drug_name_cache()
-    
-    # Load disease name cache
     _load_disease_name_cache()
-    
-    return train_pairs is not None and train_features is not None
 
 
-def load_api_model():
-    """Load the new XGBoost model and dataset from the API folder."""
-    global api_model, api_scaler, api_features_df
-    
-    print("\n--- Loading API Model (Extended Dataset) ---")
-    
-    # Load XGBoost model from API folder
-    model_path = API_MODEL_DIR / "xgb_temporal_model.json"
-    if model_path.exists():
-        try:
-            api_model = xgb.Booster()
-            api_model.load_model(str(model_path))
-            print(f"✓ Loaded API XGBoost model from {model_path}")
-        except Exception as e:
-            print(f"✗ Error loading API model: {e}")
-            api_model = None
-    else:
-        print(f"✗ API Model not found at {model_path}")
-    
-    # Load scaler from API folder
-    scaler_path = API_MODEL_DIR / "feature_scaler.joblib"
-    if scaler_path.exists():
-        api_scaler = joblib.load(scaler_path)
-        print(f"✓ Loaded API scaler from {scaler_path}")
-    
-    # Load the large features dataset
-    features_path = API_MODEL_DIR / "features_merged.csv"
-    if features_path.exists():
-        api_features_df = pd.read_csv(features_path)
-        print(f"✓ Loaded {len(api_features_df)} drug-disease pairs from API dataset")
-        # Print unique counts
-        unique_drugs = api_features_df['chembl_id'].nunique()
-        unique_diseases = api_features_df['disease_id'].nunique()
-        print(f"  → {unique_drugs} unique drugs, {unique_diseases} unique diseases")
-    else:
-        print(f"✗ Features file not found at {features_path}")
-    
-    return api_model is not None and api_features_df is not None
+# Bumped whenever names are resolved; part of the response cache key
+_names_version = 0
 
+def _names_resolved(kind: str):
+    """Publish the ``kind`` ('disease' or 'drug') names resolved in a burst of background lookups.
+    
+    Runs on the resolver's thread: the catalog of that kind is rebuilt with
+    the new names here, off the request path, and swapped in; then cached
+    responses showing the old (ID-only) names are retired.
+    """
+    global _names_version
+    build = _build_disease_catalog if kind == 'disease' else _build_drug_catalog
+    while True:
+        bundle = _bundles.current
+        # Not built yet: the catalogs artifact builds it with these names
+        if _catalog_scores(bundle) is None or getattr(bundle, f'{kind}_catalog') is None:
+            break
+        # Retried when the bundle changed meanwhile (the other catalog, or a reload)
+        if _bundles.update_if_current(bundle, **{f'{kind}_catalog': build(bundle)}):
+            break
+    _names_version += 1
 
 # Dynamic disease name cache (populated from OpenTargets API)
+# Persisted in a SQLite store seeded from disease_names_cache.json and
+# disease_names_full_cache.json (24K+ names)
 _disease_name_cache = {}
-_disease_cache_file = CHECKPOINTS_DIR / "disease_names_cache.json"
-_disease_full_cache_file = CHECKPOINTS_DIR / "disease_names_full_cache.json"
+_disease_name_store = disease_name_store()
 
 def _load_disease_name_cache():
-    """Load disease name cache from file. Prioritizes full cache if available."""
+    """Load disease names from the persistent store."""
     global _disease_name_cache
-    
-    # Try to load the full cache first (24K+ names)
-    if _disease_full_cache_file.exists():
-        try:
-            import json
-            with open(_disease_full_cache_file, 'r') as f:
-                _disease_name_cache = json.load(f)
-                print(f"✓ Loaded {len(_disease_name_cache)} disease names from full cache")
-                return
-        except Exception as e:
-            print(f"Warning: Could not load full disease name cache: {e}")
-    
-    # Fall back to smaller cache
-    if _disease_cache_file.exists():
-        try:
-            import json
-            with open(_disease_cache_file, 'r') as f:
-                _disease_name_cache = json.load(f)
-                print(f"✓ Loaded {len(_disease_name_cache)} cached disease names")
-        except Exception as e:
-            print(f"Warning: Could not load disease name cache: {e}")
-
-def _save_disease_name_cache():
-    """Save disease name cache to file."""
     try:
-        import json
-        with open(_disease_cache_file, 'w') as f:
-            json.dump(_disease_name_cache, f)
+        _disease_name_cache = _disease_name_store.load()
+        print(f"✓ Loaded {len(_disease_name_cache)} cached disease names")
     except Exception as e:
-        print(f"Warning: Could not save disease name cache: {e}")
+        print(f"Warning: Could not load disease name cache: {e}")
 
-def _fetch_disease_name_from_opentargets(disease_id: str) -> str:
-    """Fetch disease name from OpenTargets Platform API."""
-    try:
-        import requests
-        # OpenTargets GraphQL API
-        url = "https://api.platform.opentargets.org/api/v4/graphql"
-        query = """
-        query DiseaseInfo($diseaseId: String!) {
-            disease(efoId: $diseaseId) {
-                name
-            }
-        }
-        """
-        response = requests.post(url, json={
-            "query": query,
-            "variables": {"diseaseId": disease_id}
-        }, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('data', {}).get('disease'):
-                return data['data']['disease']['name']
-    except Exception as e:
-        pass  # Silent fail
-    return None
+def _fetch_disease_names_once(disease_ids: list, session) -> dict:
+    """Batch fetcher that skips IDs another worker has already resolved."""
+    names = _disease_name_store.get_many(disease_ids)
+    missing = [d for d in disease_ids if d not in names]
+    if missing:
+        with metrics.external_call('opentargets'):
+            names.update(fetch_disease_names(missing, session))
+    return names
+
+def _store_disease_names(names: dict):
+    """Cache and persist disease names resolved in the background."""
+    _disease_name_store.put_many(names)
+    _disease_name_cache.update(names)
+    # Pick up names other workers resolved in the meantime
+    _disease_name_cache.update(_disease_name_store.updates())
+
+# Unknown disease IDs are looked up off the request path (OpenTargets GraphQL)
+_disease_resolver = BackgroundResolver(_fetch_disease_names_once, _store_disease_names, DISEASE_BATCH_SIZE,
+                                       on_flush=functools.partial(_names_resolved, 'disease'),
+                                       valid=DISEASE_ID.match)
 
 def get_disease_name(disease_id: str) -> str:
-    """Get human-readable disease name from ID. Uses cache and OpenTargets API."""
+    """Get human-readable disease name from ID.
+    
+    Only reads the in-memory caches; unknown IDs are queued for a background
+    OpenTargets lookup and the ID itself is returned in the meantime.
+    """
     # Check static mapping first (fastest)
     if disease_id in DISEASE_NAMES:
+        metrics.count(metrics.NAME_LOOKUPS, 'disease', 'static')
         return DISEASE_NAMES[disease_id]
     
     # Check dynamic cache
     if disease_id in _disease_name_cache:
+        metrics.count(metrics.NAME_LOOKUPS, 'disease', 'cache')
         return _disease_name_cache[disease_id]
     
-    # Fetch from OpenTargets API
-    name = _fetch_disease_name_from_opentargets(disease_id)
-    if name:
-        _disease_name_cache[disease_id] = name
-        # Save cache periodically (every 10 new entries)
-        if len(_disease_name_cache) % 10 == 0:
-            _save_disease_name_cache()
-        return name
-    
-    # Last resort: return the ID itself
+    metrics.count(metrics.NAME_LOOKUPS, 'disease', 'miss')
+    _disease_resolver.submit(disease_id)
     return disease_id
 
 # Dynamic drug name cache (populated from ChEMBL API)
+# Persisted in a SQLite store seeded from drug_names_cache.json
 _drug_name_cache = {}
-_cache_file = CHECKPOINTS_DIR / "drug_names_cache.json"
+_drug_name_store = drug_name_store()
 
 def _load_drug_name_cache():
-    """Load drug name cache from file."""
+    """Load drug names from the persistent store."""
     global _drug_name_cache
-    if _cache_file.exists():
-        try:
-            import json
-            with open(_cache_file, 'r') as f:
-                _drug_name_cache = json.load(f)
-                print(f"✓ Loaded {len(_drug_name_cache)} cached drug names")
-        except Exception as e:
-            print(f"Warning: Could not load drug name cache: {e}")
-
-def _save_drug_name_cache():
-    """Save drug name cache to file."""
     try:
-        import json
-        with open(_cache_file, 'w') as f:
-            json.dump(_drug_name_cache, f)
+        _drug_name_cache = _drug_name_store.load()
+        print(f"✓ Loaded {len(_drug_name_cache)} cached drug names")
     except Exception as e:
-        print(f"Warning: Could not save drug name cache: {e}")
+        print(f"Warning: Could not load drug name cache: {e}")
 
-def _fetch_drug_name_from_chembl(drug_id: str) -> str:
-    """Fetch drug name from ChEMBL API."""
-    try:
-        import requests
-        url = f"https://www.ebi.ac.uk/chembl/api/data/molecule/{drug_id}.json"
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            # Try pref_name first (most common)
-            name = data.get('pref_name')
-            if name:
-                return name
-            # Try molecule synonyms
-            synonyms = data.get('molecule_synonyms', [])
-            if synonyms:
-                # Prefer INN or USAN names
-                for syn in synonyms:
-                    syn_type = syn.get('syn_type', '').upper()
-                    if syn_type in ('INN', 'USAN', 'BAN'):
-                        return syn.get('molecule_synonym', drug_id)
-                # Fall back to any synonym
-                return synonyms[0].get('molecule_synonym', drug_id)
-    except Exception as e:
-        pass  # Silent fail, return drug_id
-    return None
+def _fetch_drug_names_once(drug_ids: list, session) -> dict:
+    """Batch fetcher that skips IDs another worker has already resolved."""
+    names = _drug_name_store.get_many(drug_ids)
+    missing = [d for d in drug_ids if d not in names]
+    if missing:
+        with metrics.external_call('chembl'):
+            names.update(fetch_drug_names(missing, session))
+    return names
+
+def _store_drug_names(names: dict):
+    """Cache and persist drug names resolved in the background."""
+    _drug_name_store.put_many(names)
+    _drug_name_cache.update(names)
+    # Pick up names other workers resolved in the meantime
+    _drug_name_cache.update(_drug_name_store.updates())
+
+# Unknown drug IDs are looked up off the request path (ChEMBL molecule/set)
+_drug_resolver = BackgroundResolver(_fetch_drug_names_once, _store_drug_names, DRUG_BATCH_SIZE,
+                                    on_flush=functools.partial(_names_resolved, 'drug'),
+                                    valid=CHEMBL_ID.match)
 
 def get_drug_name(drug_id: str) -> str:
-    """Get human-readable drug name from ID. Uses cache and ChEMBL API."""
+    """Get human-readable drug name from ID.
+    
+    Only reads the in-memory caches; unknown IDs are queued for a background
+    ChEMBL lookup and the ID itself is returned in the meantime.
+    """
     # Check static mapping first (fastest)
     if drug_id in DRUG_NAMES:
+        metrics.count(metrics.NAME_LOOKUPS, 'drug', 'static')
         return DRUG_NAMES[drug_id]
     
     # Check dynamic cache
     if drug_id in _drug_name_cache:
+        metrics.count(metrics.NAME_LOOKUPS, 'drug', 'cache')
         return _drug_name_cache[drug_id]
     
-    # Fetch from ChEMBL API
-    name = _fetch_drug_name_from_chembl(drug_id)
-    if name:
-        _drug_name_cache[drug_id] = name
-        # Save cache periodically (every 10 new entries)
-        if len(_drug_name_cache) % 10 == 0:
-            _save_drug_name_cache()
-        return name
-    
-    # Last resort: return the ID itself
+    metrics.count(metrics.NAME_LOOKUPS, 'drug', 'miss')
+    _drug_resolver.submit(drug_id)
     return drug_id
 
 
+def _column_values(df: pd.DataFrame, column: str, default=0.0) -> np.ndarray:
+    """Return a column as an array with NaN replaced by ``default``."""
+    return df[column].fillna(default).to_numpy()
+
+
+# Serialized prediction responses, keyed by request and model version
+_response_cache = ResponseCache()
+
+# Molecule structures: memory LRU → disk cache → ChEMBL
+_molecules = MoleculeStore()
+
+
+def _model_version():
+    return (g.model, _served_model(g.model).version, _names_version)
+
+
+# Models, tables and caches, loaded concurrently at startup (see create_app)
+_artifacts = ArtifactLoader()
+
+
+def requires(*names):
+    """Make sure the artifacts a view reads are loaded (lazy ones load on first use)."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            _artifacts.ensure(*names)
+            return view(**kwargs)
+        return wrapper
+    return decorator
+
+
+def _unknown_model():
+    return jsonify({'error': f"model must be one of: {', '.join(MODELS)}"}), 400
+
+
+def serves_model(default: str = DEFAULT_MODEL):
+    """Select the model named by the ``model`` parameter (``g.model``) and load it on first use.
+    
+    Unknown models get a 400; only the selected model's artifacts are loaded.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            name = request.args.get('model', default)
+            if name not in MODELS:
+                return _unknown_model()
+            g.model = name
+            _artifacts.ensure(*MODELS[name].artifacts)
+            return view(**kwargs)
+        return wrapper
+    return decorator
+
+
+CONFIDENCE_TIERS = ['high', 'medium', 'low']
+
+
 def get_confidence_tier(score: float) -> str:
     """Convert score to confidence tier."""
     if score >= 0.7:
@@ -642,31 +652,48 @@ def get_confidence_tier(score: float) -> str:
         return 'low'
 
 
+def confidence_tier_codes(scores: np.ndarray) -> np.ndarray:
+    """get_confidence_tier() for a whole array, as positions in CONFIDENCE_TIERS."""
+    return np.where(scores >= 0.7, 0, np.where(scores >= 0.4, 1, 2))
+
+
+# Score range [min, max) of each tier, as get_confidence_tier() assigns them
+TIER_SCORES = {'high': (0.7, None), 'medium': (0.4, 0.7), 'low': (None, 0.4)}
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
+    original = _served_model('original')
     return jsonify({
         'status': 'healthy',
-        'model_loaded': model is not None,
-        'data_loaded': train_pairs is not None
+        'model_loaded': original.booster is not None,
+        'data_loaded': original.pairs is not None
     })
 
 
 @app.route('/api/diseases', methods=['GET'])
+@requires('names')
+@serves_model('original')
 def get_diseases():
-    """Get list of available diseases."""
-    if diseases_list is None:
+    """Get list of available diseases (of the ``model`` parameter's pairs, default original)."""
+    model = _served_model(g.model)
+    if model.pairs is None and model.diseases is None:
         return jsonify({'error': 'Data not loaded'}), 500
     
     # Get unique diseases from training data
-    unique_diseases = train_pairs['disease_id'].unique() if train_pairs is not None else diseases_list['disease_id'].values
+    unique_diseases = (model.pairs['disease_id'].unique() if model.pairs is not None
+                       else model.diseases['disease_id'].values)
     
     # Build disease list with names
+    unique_diseases = unique_diseases[:100]  # Limit to 100 for performance
+    with metrics.stage('names'):
+        names = [get_disease_name(disease_id) for disease_id in unique_diseases]
     diseases = []
-    for disease_id in unique_diseases[:100]:  # Limit to 100 for performance
+    for disease_id, name in zip(unique_diseases, names):
         diseases.append({
             'id': disease_id,
-            'name': get_disease_name(disease_id),
+            'name': name,
             'category': 'Disease',  # Could be enhanced with real categories
             'description': f'Disease identifier: {disease_id}'
         })
@@ -678,93 +705,86 @@ def get_diseases():
 
 
 @app.route('/api/predict/<disease_id>', methods=['GET'])
+@requires('names')
+@serves_model('original')
+@cached_response(_response_cache, _model_version)
 def predict_drugs(disease_id: str):
     """Predict drug repurposing candidates for a disease.
     
     Only returns drugs that have actual training data for this specific disease,
-    ensuring predictions are disease-relevant.
+    ensuring predictions are disease-relevant. Ranks with the ``model``
+    parameter's model (default original).
     """
-    if train_pairs is None or train_features is None:
+    model = _served_model(g.model)
+    if not model.serving:
         return jsonify({'error': 'Data not loaded'}), 500
     
     # Get top_k parameter
     top_k = request.args.get('top_k', 10, type=int)
     
     # Get ONLY drugs that have training data for this specific disease
-    disease_mask = train_pairs['disease_id'] == disease_id
-    disease_pairs = train_pairs[disease_mask]
+    total, rows, _ = _ranked_page(model, 'disease', disease_id, top_k)
+    
+    # The disease's pairs are one block of the joined pair-feature table (see
+    # model_registry.join_features), pre-ranked by the score matrix
+    with metrics.stage('features'):
+        data = _gather(model, [rows], 'chembl_id', ['gene_overlap_count', 'max_association_score'])
     
-    if len(disease_pairs) == 0:
+    with metrics.stage('names'):
+        disease = {
+            'id': disease_id,
+            'name': get_disease_name(disease_id)
+        }
+        drug_names = [get_drug_name(drug_id) for drug_id in data['chembl_id']]
+    
+    if total == 0:
         return jsonify({
-            'disease': {
-                'id': disease_id,
-                'name': get_disease_name(disease_id)
-            },
+            'disease': disease,
             'predictions': [],
             'message': 'No training data available for this disease'
         })
     
-    predictions = []
-    
-    # Iterate only over drugs that have data for this disease
-    for idx, row in disease_pairs.iterrows():
-        drug_id = row['chembl_id']
-        
-        # Get features for this exact drug-disease pair
-        if idx < len(train_features):
-            features_row = train_features.iloc[idx]
-            feature_vector = np.array([features_row.get(f, 0.0) for f in FEATURE_NAMES])
-            
-            # Predict probability
-            try:
-                if model is not None:
-                    # Use DMatrix for Booster prediction
-                    dmatrix = xgb.DMatrix(np.array([feature_vector]), feature_names=FEATURE_NAMES)
-                    prob = float(model.predict(dmatrix)[0])
-                    # Ensure prob is between 0 and 1 (might be raw score)
-                    if prob < 0 or prob > 1:
-                        prob = 1 / (1 + np.exp(-prob))  # Sigmoid
-                else:
-                    # Fallback: use feature-based scoring
-                    gene_overlap = features_row.get('gene_overlap_count', 0)
-                    assoc_score = features_row.get('max_association_score', 0)
-                    prob = min(0.95, (gene_overlap * 0.1 + assoc_score) / 2)
-                
-                predictions.append({
-                    'drug_id': drug_id,
-                    'drug_name': get_drug_name(drug_id),
-                    'score': float(prob),
-                    'confidenceTier': get_confidence_tier(prob),
-                    'gene_overlap': int(features_row.get('gene_overlap_count', 0)),
-                    'association_score': float(features_row.get('max_association_score', 0)),
-                    'mechanismSummary': f'ML prediction score: {prob:.2%}',
-                    'diseaseRelevance': f'Predicted for {get_disease_name(disease_id)}',
-                    'knownLimitations': ['This is a computational prediction', 'Clinical validation required'],
-                    'targets': [],
-                    'pathways': []
-                })
-            except Exception as e:
-                print(f"Prediction error for {drug_id}: {e}")
-                continue
-    
-    # Sort by score descending
-    predictions.sort(key=lambda x: x['score'], reverse=True)
+    with metrics.stage('build'):
+        predictions = _original_predictions(disease['name'], data['chembl_id'], drug_names, data[SCORE_COLUMN],
+                                            data['gene_overlap_count'].astype(int),
+                                            data['max_association_score'].astype(float))
     
-    return jsonify({
-        'disease': {
-            'id': disease_id,
-            'name': get_disease_name(disease_id)
-        },
-        'predictions': predictions[:top_k]
-    })
+    with metrics.stage('serialize'):
+        return jsonify({
+            'disease': disease,
+            'predictions': predictions
+        })
+
+
+def _original_predictions(disease_name, drug_ids, drug_names, scores, gene_overlaps, assoc_scores) -> list:
+    predictions = []
+    for i, drug_id in enumerate(drug_ids):
+        prob = float(scores[i])
+        predictions.append({
+            'drug_id': drug_id,
+            'drug_name': drug_names[i],
+            'score': prob,
+            'confidenceTier': get_confidence_tier(prob),
+            'gene_overlap': int(gene_overlaps[i]),
+            'association_score': float(assoc_scores[i]),
+            'mechanismSummary': f'ML prediction score: {prob:.2%}',
+            'diseaseRelevance': f'Predicted for {disease_name}',
+            'knownLimitations': ['This is a computational prediction', 'Clinical validation required'],
+            'targets': [],
+            'pathways': []
+        })
+    return predictions
 
 
 @app.route('/api/drug/<drug_id>', methods=['GET'])
+@requires('names')
 def get_drug_details(drug_id: str):
     """Get details for a specific drug."""
+    with metrics.stage('names'):
+        name = get_drug_name(drug_id)
     return jsonify({
         'id': drug_id,
-        'name': get_drug_name(drug_id),
+        'name': name,
         'description': f'Drug identifier: {drug_id}',
         'originalUse': 'See clinical data for indications'
     })
@@ -772,136 +792,74 @@ def get_drug_details(drug_id: str):
 
 @app.route('/api/molecule/<chembl_id>', methods=['GET'])
 def get_molecule_structure(chembl_id: str):
-    """Get 3D molecular structure for a drug from ChEMBL.
+    """Get the molecular structure of a drug from ChEMBL (cached in memory and on disk).
     
-    Returns atoms with 3D coordinates and bond information for visualization.
+    Atoms come as parallel arrays: ``symbols`` and a flat ``coords`` list
+    (x, y, z per atom); ``bonds`` is a flat list of (start, end, order)
+    triples with 0-based atom positions.
     """
-    try:
-        import requests
-        
-        # Fetch SDF (3D structure) from ChEMBL
-        sdf_url = f"https://www.ebi.ac.uk/chembl/api/data/molecule/{chembl_id}.sdf"
-        response = requests.get(sdf_url, timeout=10)
-        
-        if response.status_code != 200:
-            return jsonify({
-                'error': 'Structure not available',
-                'drug_id': chembl_id,
-                'drug_name': get_drug_name(chembl_id)
-            }), 404
-        
-        sdf_content = response.text
-        
-        # Parse the SDF file
-        atoms = []
-        bonds = []
-        
-        lines = sdf_content.split('\n')
-        
-        # SDF format: header lines, then counts line, then atoms, then bonds
-        # Find the counts line (line 4 usually, format: "  X  Y  0  0  0  0...")
-        counts_line_idx = 3
-        if len(lines) > counts_line_idx:
-            counts_line = lines[counts_line_idx].strip()
-            parts = counts_line.split()
-            if len(parts) >= 2:
-                try:
-                    num_atoms = int(parts[0])
-                    num_bonds = int(parts[1])
-                except ValueError:
-                    num_atoms = 0
-                    num_bonds = 0
-                
-                # Parse atom block (starts at line 5)
-                atom_start = 4
-                for i in range(num_atoms):
-                    line_idx = atom_start + i
-                    if line_idx < len(lines):
-                        atom_line = lines[line_idx]
-                        if len(atom_line) >= 30:
-                            try:
-                                # SDF format: X, Y, Z coordinates (10 chars each), then symbol
-                                x = float(atom_line[0:10].strip())
-                                y = float(atom_line[10:20].strip())
-                                z = float(atom_line[20:30].strip())
-                                symbol = atom_line[31:34].strip()
-                                
-                                atoms.append({
-                                    'id': i,
-                                    'symbol': symbol,
-                                    'x': x,
-                                    'y': y,
-                                    'z': z
-                                })
-                            except (ValueError, IndexError):
-                                continue
-                
-                # Parse bond block (after atoms)
-                bond_start = atom_start + num_atoms
-                for i in range(num_bonds):
-                    line_idx = bond_start + i
-                    if line_idx < len(lines):
-                        bond_line = lines[line_idx]
-                        parts = bond_line.split()
-                        if len(parts) >= 3:
-                            try:
-                                # 1-indexed in SDF, convert to 0-indexed
-                                start_atom = int(parts[0]) - 1
-                                end_atom = int(parts[1]) - 1
-                                bond_type = int(parts[2])  # 1=single, 2=double, 3=triple
-                                
-                                if 0 <= start_atom < len(atoms) and 0 <= end_atom < len(atoms):
-                                    bonds.append({
-                                        'start': start_atom,
-                                        'end': end_atom,
-                                        'type': bond_type
-                                    })
-                            except (ValueError, IndexError):
-                                continue
-        
-        if not atoms:
-            return jsonify({
-                'error': 'Could not parse molecular structure',
-                'drug_id': chembl_id,
-                'drug_name': get_drug_name(chembl_id)
-            }), 404
-        
+    with metrics.stage('names'):
+        drug_name = get_drug_name(chembl_id)
+    
+    if not CHEMBL_ID.match(chembl_id):
         return jsonify({
+            'error': 'Structure not available',
             'drug_id': chembl_id,
-            'drug_name': get_drug_name(chembl_id),
-            'atoms': atoms,
-            'bonds': bonds,
-            'atom_count': len(atoms),
-            'bond_count': len(bonds)
-        })
-        
+            'drug_name': drug_name
+        }), 404
+    
+    try:
+        structure = _molecules.get(chembl_id)
+    except ValueError:
+        structure = {}
     except Exception as e:
         return jsonify({
             'error': str(e),
             'drug_id': chembl_id,
-            'drug_name': get_drug_name(chembl_id)
-        }), 500
+            'drug_name': drug_name
+        }), 502
+    
+    if structure is None:
+        return jsonify({
+            'error': 'Structure not available',
+            'drug_id': chembl_id,
+            'drug_name': drug_name
+        }), 404
+    
+    if not structure.get('symbols'):
+        return jsonify({
+            'error': 'Could not parse molecular structure',
+            'drug_id': chembl_id,
+            'drug_name': drug_name
+        }), 404
+    
+    with metrics.stage('serialize'):
+        return jsonify({
+            'drug_id': chembl_id,
+            'drug_name': drug_name,
+            **structure,
+            'atom_count': len(structure['symbols']),
+            'bond_count': len(structure['bonds']) // 3
+        })
 
 
 # ============================================================================
 # NEW API ENDPOINTS - Using Extended Dataset (153K drug-disease pairs)
 # ============================================================================
 
-# Pre-computed diseases list (built at startup for fast access)
-_precomputed_diseases = None
+# Pre-computed, search-indexed catalogs (built with the bundle for fast access)
 
-def _build_disease_cache():
-    """Pre-compute all disease data at startup for fast access."""
-    global _precomputed_diseases
-    
-    if api_features_df is None:
-        return
-    
+def _catalog_scores(bundle: ModelBundle):
+    """Score matrix of ``bundle``'s DEFAULT_MODEL, whose IDs the catalogs list (None until loaded)."""
+    model = bundle.models.get(DEFAULT_MODEL)
+    return model.scores if model is not None else None
+
+
+def _build_disease_catalog(bundle: ModelBundle) -> Catalog:
+    """Pre-compute the disease catalog of ``bundle``'s extended dataset."""
     print("  → Building disease name cache...")
-    unique_diseases = api_features_df['disease_id'].unique()
-    
     diseases = []
-    for disease_id in unique_diseases:
+    for disease_id in _catalog_scores(bundle).disease_ids.tolist():
         # Get name from caches or use ID as fallback
         name = _disease_name_cache.get(disease_id) or DISEASE_NAMES.get(disease_id) or disease_id
         diseases.append({
@@ -912,293 +870,900 @@ def _build_disease_cache():
     
     # Sort: human-readable names first, then alphabetically
     diseases.sort(key=lambda d: (d['name'] == d['id'], d['name'].lower()))
-    _precomputed_diseases = diseases
     print(f"  → Cached {len(diseases)} diseases")
+    return Catalog(diseases, app.json.dumps_bytes)
+
+
+def _build_drug_catalog(bundle: ModelBundle) -> Catalog:
+    """Build the drug catalog from the extended dataset's drugs."""
+    drugs = []
+    for drug_id in _catalog_scores(bundle).drug_ids.tolist():
+        # Use cached name only (no expensive API lookups)
+        cached_name = _drug_name_cache.get(drug_id) or DRUG_NAMES.get(drug_id)
+        name = cached_name if cached_name else drug_id
+        
+        drugs.append({
+            'id': drug_id,
+            'name': name,
+            'description': f'Drug identifier: {drug_id}'
+        })
+    
+    # Sort: human-readable names first, then by name alphabetically
+    drugs.sort(key=lambda d: (d['name'] == d['id'], d['name'].lower()))
+    return Catalog(drugs, app.json.dumps_bytes)
+
+
+def _json_bytes(body: bytes):
+    return app.response_class(body, mimetype=app.json.mimetype)
 
 
 @app.route('/api/v2/diseases', methods=['GET'])
+@requires('catalogs')
 def get_v2_diseases():
     """Get paginated list of diseases with optional search.
     
     Query params:
-        search: filter diseases by name (case-insensitive)
+        search: filter diseases by name or ID (case-insensitive)
         page: page number (default 1)
         limit: items per page (default 50, max 200)
     """
-    if _precomputed_diseases is None:
-        if api_features_df is None:
-            return jsonify({'error': 'API data not loaded'}), 500
-        _build_disease_cache()
+    catalog = _bundle().disease_catalog
+    if catalog is None:
+        return jsonify({'error': 'API data not loaded'}), 500
     
     # Get query parameters
     search = request.args.get('search', '').lower().strip()
     page = request.args.get('page', 1, type=int)
     limit = min(request.args.get('limit', 50, type=int), 200)  # Max 200
     
-    # Filter by search if provided
-    if search:
-        filtered = [d for d in _precomputed_diseases 
-                   if search in d['name'].lower() or search in d['id'].lower()]
-    else:
-        filtered = _precomputed_diseases
-    
-    # Calculate pagination
-    total = len(filtered)
-    start_idx = (page - 1) * limit
-    end_idx = start_idx + limit
-    paginated = filtered[start_idx:end_idx]
+    def build_page():
+        # Filter by search (index lookup) and slice the page out of the results
+        with metrics.stage('search'):
+            total = len(catalog.search(search))
+            start_idx = (page - 1) * limit
+            diseases = catalog.page(search, start_idx, start_idx + limit)
+        return {
+            'diseases': diseases,
+            'total': total,
+            'page': page,
+            'limit': limit,
+            'total_pages': (total + limit - 1) // limit
+        }
     
-    return jsonify({
-        'diseases': paginated,
-        'total': total,
-        'page': page,
-        'limit': limit,
-        'total_pages': (total + limit - 1) // limit
-    })
+    return _json_bytes(catalog.cached_bytes((search, page, limit), build_page))
 
 
 @app.route('/api/v2/drugs', methods=['GET'])
+@requires('catalogs')
 def get_v2_drugs():
-    """Get list of drugs from the extended API dataset."""
-    if api_features_df is None:
+    """Get list of drugs from the extended API dataset.
+    
+    Query params:
+        search: optional filter by name or ID (case-insensitive)
+    """
+    catalog = _bundle().drug_catalog
+    if catalog is None:
         return jsonify({'error': 'API data not loaded'}), 500
     
-    # Get unique drugs from the API dataset
-    unique_drugs = api_features_df['chembl_id'].unique()
+    search = request.args.get('search', '').lower().strip()
+    return _json_bytes(catalog.cached_bytes(search, lambda: catalog.page(search, 0, None)))
+
+
+# Entities ranked per vectorized gather in the bulk endpoint
+BULK_CHUNK_SIZE = 256
+BULK_MAX_ENTITIES = 10000
+
+# Text of every drug/disease prediction, filled in from the row's own fields
+# with str.format(); columnar responses send the templates once instead
+DRUG_TEXT = {
+    'mechanismSummary': 'Extended ML prediction score: {score:.2%}',
+    'diseaseRelevance': 'Based on {gene_overlap} overlapping genes',
+    'knownLimitations': [
+        'Computational prediction - requires clinical validation',
+        'Based on genetic/genomic association score of {association_score:.2f}'
+    ],
+}
+DRUG_CONSTANTS = {'targets': [], 'pathways': []}
+DISEASE_TEXT = {
+    'mechanismSummary': 'Predicted repurposing score: {score:.2%}',
+}
+
+RESPONSE_FORMATS = ('rows', 'columnar')
+
+# Query parameters a ranking response depends on (its response cache key)
+RANKING_PARAMS = ('top_k', 'format', 'min_score', 'tier', 'min_phase', 'cursor')
+
+
+def _rank_filters(args) -> dict:
+    """Ranking filters from the ``min_score``, ``tier`` and ``min_phase`` parameters.
     
-    drugs = []
-    for drug_id in unique_drugs:  # Return all drugs
-        # Use cached name only (no expensive API lookups)
-        cached_name = _drug_name_cache.get(drug_id) or DRUG_NAMES.get(drug_id)
-        name = cached_name if cached_name else drug_id
-        
-        drugs.append({
-            'id': drug_id,
-            'name': name,
-            'description': f'Drug identifier: {drug_id}'
-        })
+    Raises ValueError (with a message for the client) on invalid values.
+    """
+    filters = {}
+    for name in ('min_score', 'min_phase'):
+        value = args.get(name)
+        if value is None:
+            continue
+        try:
+            filters[name] = float(value)
+        except ValueError:
+            raise ValueError(f'{name} must be a number') from None
+        if np.isnan(filters[name]):
+            raise ValueError(f'{name} must be a number')
+    
+    tier = args.get('tier')
+    if tier is not None:
+        if tier not in TIER_SCORES:
+            raise ValueError(f"tier must be one of: {', '.join(TIER_SCORES)}")
+        low, high = TIER_SCORES[tier]
+        if low is not None:
+            filters['min_score'] = max(filters.get('min_score', low), low)
+        if high is not None:
+            filters['max_score'] = high
+    return filters
+
+
+def _cursor_scope(model: ServedModel, kind: str, key: str, filters: dict) -> str:
+    """What a cursor is valid for: one ranking, its filters and the scores it was read from."""
+    text = repr((model.name, kind, key, sorted(filters.items()), model.version))
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+def _encode_cursor(start: int, matching: int, scope: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([start, matching, scope], separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str, scope: str) -> tuple:
+    """``(start, matching)`` of an encoded cursor; ValueError if it isn't one for ``scope``.
     
-    # Sort: human-readable names first, then by name alphabetically
-    drugs.sort(key=lambda d: (d['name'] == d['id'], d['name'].lower()))
+    A reload that changes the scores expires every cursor.
+    """
+    try:
+        start, matching, cursor_scope = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        valid = cursor_scope == scope and isinstance(start, int) and start >= 0 and isinstance(matching, int)
+    except (ValueError, TypeError):
+        valid = False
+    if not valid:
+        raise ValueError('Invalid or expired cursor')
+    return start, matching
+
+
+def _ranked_page(model: ServedModel, kind: str, key: str, top_k: int, filters: dict = None,
+                 position: tuple = None):
+    """Number of rows for ``key``, a page of its rows by score (best first) and its paging fields.
+    
+    ``kind`` is 'disease' (rank its drugs) or 'drug' (rank its diseases), in
+    ``model``'s score matrix.
+    Rows and columns of the score matrix are stored pre-ranked, so a page is
+    a slice of them: ``top_k`` rows passing ``filters``, from ``position``
+    (a decoded cursor) on. The fields are ``next_cursor`` and, with filters,
+    ``total_matching``. A negative ``top_k`` slices like ``[:top_k]``, without
+    paging.
+    """
+    scores = model.scores
+    with metrics.stage('filter'):
+        if top_k < 0:
+            top = scores.top_drugs if kind == 'disease' else scores.top_diseases
+            total, rows = top(key, top_k)
+            return total, rows, {}
+        filters = filters or {}
+        start, matching = position or (0, None)
+        page = scores.drugs_page if kind == 'disease' else scores.diseases_page
+        total, counted, rows, resume = page(key, top_k, start, count=position is None, **filters)
+    
+    matching = matching if counted is None else counted
+    fields = {}
+    if filters:
+        fields['total_matching'] = matching
+    scope = _cursor_scope(model, kind, key, filters) if resume is not None else None
+    fields['next_cursor'] = None if resume is None else _encode_cursor(resume, matching, scope)
+    return total, rows, fields
+
+
+def _paging_request(model: ServedModel, kind: str, key: str, top_k: int):
+    """``(filters, position)`` of the request's filter and cursor parameters.
     
-    return jsonify(drugs)
+    Raises ValueError (with a message for the client) on invalid ones.
+    """
+    filters = _rank_filters(request.args)
+    cursor = request.args.get('cursor')
+    if top_k < 0 and (filters or cursor):
+        raise ValueError('top_k must not be negative with filters or a cursor')
+    position = _decode_cursor(cursor, _cursor_scope(model, kind, key, filters)) if cursor else None
+    return filters, position
+
+
+def _gather(model: ServedModel, row_sets: list, id_column: str, columns: list) -> dict:
+    """Scores, IDs and explanation columns of ``model``'s pairs for several row sets in one pass."""
+    rows = np.concatenate(row_sets) if row_sets else np.empty(0, dtype=np.int64)
+    data = model.pairs.iloc[rows]
+    gathered = {column: _column_values(data, column) for column in columns}
+    gathered[SCORE_COLUMN] = data[SCORE_COLUMN].to_numpy()
+    gathered[id_column] = data[id_column].to_numpy()
+    return gathered
+
+
+def _drug_predictions(data: dict, start: int, stop: int) -> list:
+    """Repurposing prediction dicts for rows ``start:stop`` of gathered data (with its ``drug_name``)."""
+    predictions = []
+    for i in range(start, stop):
+        drug_id = data['chembl_id'][i]
+        prob = float(data[SCORE_COLUMN][i])
+        gene_overlap = int(data['gene_overlap_count'][i])
+        assoc_score = float(data['max_association_score'][i])
+        predictions.append({
+            'drug_id': drug_id,
+            'drug_name': data['drug_name'][i],
+            'score': prob,
+            'confidenceTier': get_confidence_tier(prob),
+            'gene_overlap': gene_overlap,
+            'association_score': assoc_score,
+            'genetic_score': float(data['genetic_score'][i]),
+            'animal_model_score': float(data['animal_model_score'][i]),
+            'known_drug_score': float(data['known_drug_score'][i]),
+            'drug_max_phase': int(data['drug_max_phase'][i]),
+            'mechanismSummary': DRUG_TEXT['mechanismSummary'].format(score=prob),
+            'diseaseRelevance': DRUG_TEXT['diseaseRelevance'].format(gene_overlap=gene_overlap),
+            'knownLimitations': [
+                DRUG_TEXT['knownLimitations'][0],
+                DRUG_TEXT['knownLimitations'][1].format(association_score=assoc_score)
+            ],
+            'targets': [],
+            'pathways': []
+        })
+    return predictions
+
+
+def _columnar(columns: dict, text: dict, constants: dict = None) -> dict:
+    """A columnar prediction list: parallel arrays plus the text shared by every row.
+    
+    ``confidenceTier`` holds positions in ``dictionary['confidenceTier']``;
+    ``text`` fields are str.format() templates over the row's columns.
+    """
+    return {
+        'count': len(columns['score']),
+        'columns': columns,
+        'dictionary': {'confidenceTier': CONFIDENCE_TIERS},
+        'text': text,
+        'constants': constants or {},
+    }
+
+
+def _drug_columns(data: dict, start: int, stop: int) -> dict:
+    """Columnar counterpart of _drug_predictions()."""
+    scores = data[SCORE_COLUMN][start:stop]
+    drug_ids = data['chembl_id'][start:stop].tolist()
+    return _columnar({
+        'drug_id': drug_ids,
+        'drug_name': data['drug_name'][start:stop],
+        'score': scores.tolist(),
+        'confidenceTier': confidence_tier_codes(scores).tolist(),
+        'gene_overlap': data['gene_overlap_count'][start:stop].astype(np.int64).tolist(),
+        'association_score': data['max_association_score'][start:stop].tolist(),
+        'genetic_score': data['genetic_score'][start:stop].tolist(),
+        'animal_model_score': data['animal_model_score'][start:stop].tolist(),
+        'known_drug_score': data['known_drug_score'][start:stop].tolist(),
+        'drug_max_phase': data['drug_max_phase'][start:stop].astype(np.int64).tolist(),
+    }, DRUG_TEXT, DRUG_CONSTANTS)
+
+
+def _disease_predictions(data: dict, start: int, stop: int) -> list:
+    """Drug → disease prediction dicts for rows ``start:stop`` of gathered data (with its ``disease_name``)."""
+    predictions = []
+    for i in range(start, stop):
+        disease_id = data['disease_id'][i]
+        prob = float(data[SCORE_COLUMN][i])
+        predictions.append({
+            'disease_id': disease_id,
+            'disease_name': data['disease_name'][i],
+            'score': prob,
+            'confidenceTier': get_confidence_tier(prob),
+            'gene_overlap': int(data['gene_overlap_count'][i]),
+            'association_score': float(data['max_association_score'][i]),
+            'genetic_score': float(data['genetic_score'][i]),
+            'mechanismSummary': DISEASE_TEXT['mechanismSummary'].format(score=prob)
+        })
+    return predictions
+
+
+def _disease_columns(data: dict, start: int, stop: int) -> dict:
+    """Columnar counterpart of _disease_predictions()."""
+    scores = data[SCORE_COLUMN][start:stop]
+    disease_ids = data['disease_id'][start:stop].tolist()
+    return _columnar({
+        'disease_id': disease_ids,
+        'disease_name': data['disease_name'][start:stop],
+        'score': scores.tolist(),
+        'confidenceTier': confidence_tier_codes(scores).tolist(),
+        'gene_overlap': data['gene_overlap_count'][start:stop].astype(np.int64).tolist(),
+        'association_score': data['max_association_score'][start:stop].tolist(),
+        'genetic_score': data['genetic_score'][start:stop].tolist(),
+    }, DISEASE_TEXT)
+
+
+def _repurpose_results(model: ServedModel, disease_ids: list, top_k: int, columnar: bool = False,
+                       filters: dict = None, positions: dict = None, paged: bool = True):
+    """Yield the /api/repurpose response payload of ``model`` for each disease, in order.
+    
+    Diseases are ranked in chunks; each chunk's top rows are fetched from the
+    feature table with a single gather. ``columnar`` selects the columnar
+    prediction list; ``filters`` and ``positions`` (decoded cursors by
+    disease) select the page, see _ranked_page(). Without ``paged`` the
+    payloads leave out the paging fields.
+    """
+    positions = positions or {}
+    build = _drug_columns if columnar else _drug_predictions
+    for chunk_start in range(0, len(disease_ids), BULK_CHUNK_SIZE):
+        chunk = disease_ids[chunk_start:chunk_start + BULK_CHUNK_SIZE]
+        ranked = [_ranked_page(model, 'disease', disease_id, top_k, filters, positions.get(disease_id))
+                  for disease_id in chunk]
+        with metrics.stage('features'):
+            data = _gather(model, [top for _, top, _ in ranked], 'chembl_id', DRUG_EXPLAIN_COLUMNS)
+        with metrics.stage('names'):
+            data['drug_name'] = [get_drug_name(drug_id) for drug_id in data['chembl_id']]
+            disease_names = [get_disease_name(disease_id) for disease_id in chunk]
+        
+        offset = 0
+        for disease_id, disease_name, (total, top, paging) in zip(chunk, disease_names, ranked):
+            disease = {
+                'id': disease_id,
+                'name': disease_name
+            }
+            if total == 0:
+                yield {
+                    'disease': disease,
+                    'predictions': build(data, offset, offset),
+                    'message': f'No data available for this disease in the {model.name} dataset'
+                }
+                continue
+            with metrics.stage('build'):
+                predictions = build(data, offset, offset + len(top))
+            yield {
+                'disease': disease,
+                'predictions': predictions,
+                'total_candidates': total,
+                **(paging if paged else {}),
+                'model': model.spec.label
+            }
+            offset += len(top)
+
+
+def _drug_disease_results(model: ServedModel, drug_ids: list, top_k: int, columnar: bool = False,
+                          filters: dict = None, positions: dict = None, paged: bool = True):
+    """Yield the /api/drug-diseases response payload of ``model`` for each drug, in order."""
+    positions = positions or {}
+    build = _disease_columns if columnar else _disease_predictions
+    for chunk_start in range(0, len(drug_ids), BULK_CHUNK_SIZE):
+        chunk = drug_ids[chunk_start:chunk_start + BULK_CHUNK_SIZE]
+        ranked = [_ranked_page(model, 'drug', drug_id, top_k, filters, positions.get(drug_id)) for drug_id in chunk]
+        with metrics.stage('features'):
+            data = _gather(model, [top for _, top, _ in ranked], 'disease_id', DISEASE_EXPLAIN_COLUMNS)
+        with metrics.stage('names'):
+            data['disease_name'] = [get_disease_name(disease_id) for disease_id in data['disease_id']]
+            drug_names = [get_drug_name(drug_id) for drug_id in chunk]
+        
+        offset = 0
+        for drug_id, drug_name, (total, top, paging) in zip(chunk, drug_names, ranked):
+            drug = {
+                'id': drug_id,
+                'name': drug_name
+            }
+            if total == 0:
+                yield {
+                    'drug': drug,
+                    'predictions': build(data, offset, offset),
+                    'message': f'No data available for this drug in the {model.name} dataset'
+                }
+                continue
+            with metrics.stage('build'):
+                predictions = build(data, offset, offset + len(top))
+            yield {
+                'drug': drug,
+                'predictions': predictions,
+                'total_diseases': total,
+                **(paging if paged else {}),
+                'model': model.spec.label
+            }
+            offset += len(top)
 
 
 @app.route('/api/repurpose/<disease_id>', methods=['GET'])
+@requires('names')
+@serves_model()
+@cached_response(_response_cache, _model_version, params=RANKING_PARAMS)
 def repurpose_drugs_for_disease(disease_id: str):
     """Find drug repurposing candidates for a disease using the extended model.
     
     This endpoint uses the larger 153K drug-disease pairs dataset
     to predict which drugs could potentially treat a given disease.
+    
+    Query params:
+        top_k: number of candidates per page (default 20)
+        format: 'rows' (default, one object per prediction) or 'columnar'
+            (parallel arrays plus the text shared by every row)
+        min_score: only candidates scoring at least this
+        tier: only candidates of this confidence tier (high, medium, low)
+        min_phase: only candidates whose drug reached at least this max phase
+        cursor: the previous page's ``next_cursor``, to continue from there
+        model: the model to rank with (default extended, see /api/models)
+    
+    Responses carry ``next_cursor`` (null on the last page) and, when
+    filtering, ``total_matching``.
     """
-    if api_features_df is None or api_model is None:
+    model = _served_model(g.model)
+    if not model.serving:
         return jsonify({'error': 'API model not loaded'}), 500
     
     top_k = request.args.get('top_k', 20, type=int)
-    
-    # Get all drug-disease pairs for this disease
-    disease_data = api_features_df[api_features_df['disease_id'] == disease_id]
-    
-    if len(disease_data) == 0:
-        return jsonify({
-            'disease': {
-                'id': disease_id,
-                'name': get_disease_name(disease_id)
-            },
-            'predictions': [],
-            'message': 'No data available for this disease in the extended dataset'
-        })
-    
-    predictions = []
-    
-    for _, row in disease_data.iterrows():
-        drug_id = row['chembl_id']
-        
-        # Extract features for prediction
-        try:
-            # Properly extract feature values from pandas Series
-            feature_values = []
-            for f in API_FEATURE_NAMES:
-                val = row[f] if f in row.index else 0.0
-                feature_values.append(float(val) if pd.notna(val) else 0.0)
-            feature_vector = np.array(feature_values)
-            
-            if api_model is not None:
-                dmatrix = xgb.DMatrix(np.array([feature_vector]), feature_names=API_FEATURE_NAMES)
-                prob = float(api_model.predict(dmatrix)[0])
-                # Ensure prob is between 0 and 1
-                if prob < 0 or prob > 1:
-                    prob = 1 / (1 + np.exp(-prob))  # Sigmoid
-            else:
-                # Fallback scoring
-                prob = float(row['max_association_score']) if pd.notna(row['max_association_score']) else 0.5
-            
-            # Get additional feature info for explainability
-            gene_overlap = int(row['gene_overlap_count']) if pd.notna(row['gene_overlap_count']) else 0
-            assoc_score = float(row['max_association_score']) if pd.notna(row['max_association_score']) else 0.0
-            gen_score = float(row['genetic_score']) if pd.notna(row['genetic_score']) else 0.0
-            animal_score = float(row['animal_model_score']) if pd.notna(row['animal_model_score']) else 0.0
-            known_score = float(row['known_drug_score']) if pd.notna(row['known_drug_score']) else 0.0
-            max_phase = int(row['drug_max_phase']) if pd.notna(row['drug_max_phase']) else 0
-            
-            predictions.append({
-                'drug_id': drug_id,
-                'drug_name': get_drug_name(drug_id),
-                'score': float(prob),
-                'confidenceTier': get_confidence_tier(prob),
-                'gene_overlap': gene_overlap,
-                'association_score': assoc_score,
-                'genetic_score': gen_score,
-                'animal_model_score': animal_score,
-                'known_drug_score': known_score,
-                'drug_max_phase': max_phase,
-                'mechanismSummary': f'Extended ML prediction score: {prob:.2%}',
-                'diseaseRelevance': f'Based on {gene_overlap} overlapping genes',
-                'knownLimitations': [
-                    'Computational prediction - requires clinical validation',
-                    f'Based on genetic/genomic association score of {row.get("max_association_score", 0):.2f}'
-                ],
-                'targets': [],
-                'pathways': []
-            })
-        except Exception as e:
-            import traceback
-            print(f"Prediction error for {drug_id}: {e}")
-            traceback.print_exc()
-            continue
-    
-    # Sort by score descending
-    predictions.sort(key=lambda x: x['score'], reverse=True)
-    
-    return jsonify({
-        'disease': {
-            'id': disease_id,
-            'name': get_disease_name(disease_id)
-        },
-        'predictions': predictions[:top_k],
-        'total_candidates': len(predictions),
-        'model': 'extended_xgb_temporal'
-    })
+    response_format = request.args.get('format', 'rows')
+    if response_format not in RESPONSE_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(RESPONSE_FORMATS)}"}), 400
+    try:
+        filters, position = _paging_request(model, 'disease', disease_id, top_k)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    payload = next(_repurpose_results(model, [disease_id], top_k, response_format == 'columnar', filters,
+                                      {disease_id: position}))
+    with metrics.stage('serialize'):
+        return jsonify(payload)
 
 
 @app.route('/api/drug-diseases/<drug_id>', methods=['GET'])
+@requires('names')
+@serves_model()
+@cached_response(_response_cache, _model_version, params=RANKING_PARAMS)
 def predict_diseases_for_drug(drug_id: str):
     """Predict which diseases a drug could potentially treat.
     
     This is the reverse lookup - given a drug, find all diseases
     it might be repurposed for based on the extended model.
+    
+    Query params:
+        top_k: number of candidates per page (default 20)
+        format: 'rows' (default, one object per prediction) or 'columnar'
+            (parallel arrays plus the text shared by every row)
+        min_score: only candidates scoring at least this
+        tier: only candidates of this confidence tier (high, medium, low)
+        min_phase: only candidates whose drug reached at least this max phase
+        cursor: the previous page's ``next_cursor``, to continue from there
+        model: the model to rank with (default extended, see /api/models)
+    
+    Responses carry ``next_cursor`` (null on the last page) and, when
+    filtering, ``total_matching``.
     """
-    if api_features_df is None or api_model is None:
+    model = _served_model(g.model)
+    if not model.serving:
         return jsonify({'error': 'API model not loaded'}), 500
     
     top_k = request.args.get('top_k', 20, type=int)
+    response_format = request.args.get('format', 'rows')
+    if response_format not in RESPONSE_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(RESPONSE_FORMATS)}"}), 400
+    try:
+        filters, position = _paging_request(model, 'drug', drug_id, top_k)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    payload = next(_drug_disease_results(model, [drug_id], top_k, response_format == 'columnar', filters,
+                                         {drug_id: position}))
+    with metrics.stage('serialize'):
+        return jsonify(payload)
+
+
+@app.route('/api/pair/<disease_id>/<drug_id>', methods=['GET'])
+@requires('names')
+@serves_model()
+def get_pair_score(disease_id: str, drug_id: str):
+    """Score of a single drug-disease pair from the ``model`` parameter's model (default extended)."""
+    model = _served_model(g.model)
+    if not model.serving:
+        return jsonify({'error': 'API model not loaded'}), 500
     
-    # Get all entries for this drug
-    drug_data = api_features_df[api_features_df['chembl_id'] == drug_id]
-    
-    if len(drug_data) == 0:
-        return jsonify({
-            'drug': {
-                'id': drug_id,
-                'name': get_drug_name(drug_id)
-            },
-            'predictions': [],
-            'message': 'No data available for this drug in the extended dataset'
-        })
-    
-    predictions = []
-    
-    for _, row in drug_data.iterrows():
-        disease_id = row['disease_id']
-        
-        try:
-            # Properly extract feature values from pandas Series
-            feature_values = []
-            for f in API_FEATURE_NAMES:
-                val = row[f] if f in row.index else 0.0
-                feature_values.append(float(val) if pd.notna(val) else 0.0)
-            feature_vector = np.array(feature_values)
-            
-            if api_model is not None:
-                dmatrix = xgb.DMatrix(np.array([feature_vector]), feature_names=API_FEATURE_NAMES)
-                prob = float(api_model.predict(dmatrix)[0])
-                if prob < 0 or prob > 1:
-                    prob = 1 / (1 + np.exp(-prob))
-            else:
-                prob = float(row['max_association_score']) if pd.notna(row['max_association_score']) else 0.5
-            
-            gene_overlap = int(row['gene_overlap_count']) if pd.notna(row['gene_overlap_count']) else 0
-            assoc_score = float(row['max_association_score']) if pd.notna(row['max_association_score']) else 0.0
-            gen_score = float(row['genetic_score']) if pd.notna(row['genetic_score']) else 0.0
-            
-            predictions.append({
-                'disease_id': disease_id,
-                'disease_name': get_disease_name(disease_id),
-                'score': float(prob),
-                'confidenceTier': get_confidence_tier(prob),
-                'gene_overlap': gene_overlap,
-                'association_score': assoc_score,
-                'genetic_score': gen_score,
-                'mechanismSummary': f'Predicted repurposing score: {prob:.2%}'
-            })
-        except Exception as e:
-            print(f"Prediction error for {disease_id}: {e}")
-            continue
-    
-    # Sort by score descending
-    predictions.sort(key=lambda x: x['score'], reverse=True)
-    
+    score = model.scores.score(disease_id, drug_id)
+    if score is None:
+        return jsonify({'error': f'Pair not in the {model.name} dataset'}), 404
+    with metrics.stage('names'):
+        disease_name = get_disease_name(disease_id)
+        drug_name = get_drug_name(drug_id)
     return jsonify({
-        'drug': {
-            'id': drug_id,
-            'name': get_drug_name(drug_id)
-        },
-        'predictions': predictions[:top_k],
-        'total_diseases': len(predictions),
-        'model': 'extended_xgb_temporal'
+        'disease': {'id': disease_id, 'name': disease_name},
+        'drug': {'id': drug_id, 'name': drug_name},
+        'score': score,
+        'confidenceTier': get_confidence_tier(score),
+        'model': model.spec.label
     })
 
 
+@app.route('/api/bulk', methods=['POST'])
+@requires('names')
+def bulk_predict():
+    """Rank candidates for many diseases and/or drugs in one request.
+    
+    JSON body:
+        disease_ids: diseases to find drug candidates for
+        drug_ids: drugs to find disease candidates for
+        top_k: candidates per entity (default 20)
+        format: 'rows' (default) or 'columnar', as for /api/repurpose
+        model: the model to rank with (default extended, see /api/models)
+    
+    Streams NDJSON: one line per entity, diseases first, each line the same
+    payload /api/repurpose or /api/drug-diseases returns for it, without the
+    paging fields (bulk requests take no cursors; page with those endpoints).
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Expected a JSON object body'}), 400
+    
+    name = body.get('model', DEFAULT_MODEL)
+    if name not in MODELS:
+        return _unknown_model()
+    _artifacts.ensure(*MODELS[name].artifacts)
+    model = _served_model(name)
+    if not model.serving:
+        return jsonify({'error': 'API model not loaded'}), 500
+    
+    disease_ids = body.get('disease_ids') or []
+    drug_ids = body.get('drug_ids') or []
+    top_k = body.get('top_k', 20)
+    response_format = body.get('format', 'rows')
+    for name, ids in (('disease_ids', disease_ids), ('drug_ids', drug_ids)):
+        if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+            return jsonify({'error': f'{name} must be a list of strings'}), 400
+    if not isinstance(top_k, int) or isinstance(top_k, bool):
+        return jsonify({'error': 'top_k must be an integer'}), 400
+    if response_format not in RESPONSE_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(RESPONSE_FORMATS)}"}), 400
+    if len(disease_ids) + len(drug_ids) > BULK_MAX_ENTITIES:
+        return jsonify({'error': f'At most {BULK_MAX_ENTITIES} IDs per request'}), 400
+    
+    columnar = response_format == 'columnar'
+    
+    def generate():
+        for results in (_repurpose_results(model, disease_ids, top_k, columnar, paged=False),
+                        _drug_disease_results(model, drug_ids, top_k, columnar, paged=False)):
+            for payload in results:
+                with metrics.stage('serialize'):
+                    line = app.json.dumps_bytes(payload) + b'\n'
+                yield line
+    
+    return app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @app.route('/api/v2/health', methods=['GET'])
 def health_check_v2():
     """Health check for the extended API model."""
+    extended = _served_model(DEFAULT_MODEL)
     return jsonify({
         'status': 'healthy',
-        'original_model_loaded': model is not None,
-        'api_model_loaded': api_model is not None,
-        'api_data_loaded': api_features_df is not None,
-        'api_data_size': len(api_features_df) if api_features_df is not None else 0
+        'original_model_loaded': _served_model('original').booster is not None,
+        'api_model_loaded': extended.booster is not None,
+        'api_data_loaded': extended.pairs is not None,
+        'api_data_size': len(extended.pairs) if extended.pairs is not None else 0
+    })
+
+
+@app.route('/api/models', methods=['GET'])
+def list_models():
+    """The models the ``model`` parameter can name, and whether each is loaded (nothing is loaded here)."""
+    models = []
+    for name, spec in MODELS.items():
+        model = _served_model(name)
+        models.append({
+            'name': name,
+            'label': spec.label,
+            'description': spec.description,
+            'default': name == DEFAULT_MODEL,
+            'loaded': model.serving,
+            'pairs': len(model.pairs) if model.pairs is not None else 0,
+            'features': spec.feature_names,
+            'version': model.version
+        })
+    return jsonify(models)
+
+
+@app.route('/api/health/live', methods=['GET'])
+def liveness():
+    """Liveness probe: the process is up and serving requests."""
+    return jsonify({
+        'status': 'alive',
+        'uptime_seconds': round(time.monotonic() - _artifacts.created, 3)
     })
 
 
+def _ready() -> bool:
+    """True once startup has settled and at least one model can serve.
+    
+    A model serves when it loaded and its table has loaded, or is lazy and
+    will load on first use.
+    """
+    if not _artifacts.settled():
+        return False
+    return any(
+        _artifacts.state(spec.model_artifact) == READY and _artifacts.state(spec.data_artifact) in (READY, PENDING)
+        for spec in MODELS.values()
+    )
+
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness():
+    """Readiness probe with per-artifact load state and timings.
+    
+    Returns 503 until startup has settled with a model able to serve, so
+    orchestrators only route traffic to a ready process.
+    """
+    ready = _ready()
+    status = 'ready' if ready else ('starting' if not _artifacts.settled() else 'unavailable')
+    return jsonify({
+        'status': status,
+        'artifacts': _artifacts.status()
+    }), 200 if ready else 503
+
+
+def _prewarm_response_cache():
+    """Pre-compute /api/repurpose responses for the commonly requested diseases.
+    
+    PREWARM_DISEASES (comma-separated IDs) overrides the default, which is
+    every disease in the curated DISEASE_NAMES map. The responses are built
+    straight from _repurpose_results() and stored under the keys the
+    endpoint's requests without query parameters look up, so no request
+    (and no request hook) runs.
+    """
+    model = _bundles.current.models.get(DEFAULT_MODEL)
+    if model is None or not model.serving:
+        return
+    
+    requested = os.environ.get('PREWARM_DISEASES')
+    disease_ids = requested.split(',') if requested is not None else list(DISEASE_NAMES)
+    disease_ids = [d.strip() for d in disease_ids if model.scores.disease_count(d.strip()) > 0]
+    if not disease_ids:
+        return
+    
+    version = (DEFAULT_MODEL, model.version, _names_version)
+    for disease_id, payload in zip(disease_ids, _repurpose_results(model, disease_ids, 20)):
+        key = response_key(repurpose_drugs_for_disease.__name__, {'disease_id': disease_id}, {},
+                           RANKING_PARAMS, version)
+        _response_cache.put(key, app.json.response(payload).get_data())
+    print(f"  → Pre-warmed {len(disease_ids)} disease responses")
+
+
+def _catalog_parts(bundle: ModelBundle) -> dict:
+    """The derived caches of ``bundle``'s extended dataset."""
+    if _catalog_scores(bundle) is None:
+        return {'disease_catalog': None, 'drug_catalog': None}
+    return {'disease_catalog': _build_disease_catalog(bundle), 'drug_catalog': _build_drug_catalog(bundle)}
+
+
+def _publish(model: ServedModel, *required) -> bool:
+    """Swap ``model`` into the current bundle; False (unavailable) if a ``required`` part is missing."""
+    _bundles.update_model(model)
+    return all(getattr(model, name) is not None for name in required)
+
+
+def _build_catalogs():
+    """Build the derived caches of the extended dataset."""
+    if _catalog_scores(_bundles.current) is None:
+        return False
+    _bundles.update(**_catalog_parts(_bundles.current))
+
+
+def _register_model(spec: ModelSpec):
+    """Register the artifacts of ``spec``: its booster, then the data scored with it."""
+    def load_data():
+        model = _bundles.current.models.get(spec.name) or ServedModel(spec)
+        return _publish(load_model_data(model), 'pairs')
+    
+    _artifacts.register(spec.model_artifact, lambda: _publish(load_model(spec), 'booster'))
+    _artifacts.register(spec.data_artifact, load_data, depends=(spec.model_artifact,))
+
+
+_artifacts.register('names', load_name_caches)
+for spec in MODELS.values():
+    _register_model(spec)
+_artifacts.register('catalogs', _build_catalogs, depends=('names', *MODELS[DEFAULT_MODEL].artifacts))
+
+
+def _reload_model(spec: ModelSpec, previous: ServedModel, data: bool = True) -> ServedModel:
+    """Load one model (booster, then data unless not ``data``) for a reload, without publishing it.
+    
+    Refuses (raises) when something the previous model had fails to load, so a
+    broken deploy keeps serving the old model instead of none.
+    """
+    model = load_served_model(spec) if data else load_model(spec)
+    missing = [
+        name for name in (('booster', 'pairs') if data else ('booster',))
+        if getattr(model, name) is None and getattr(previous, name) is not None
+    ]
+    if missing:
+        raise RuntimeError(f"{spec.name} {', '.join(missing)} did not load")
+    return model
+
+
+def _model_files() -> list:
+    """Files of every registered model (watched for reloads)."""
+    return [path for spec in MODELS.values() for path in spec.files()]
+
+
+def reload_bundle(force: bool = False) -> dict:
+    """Build a new bundle from the files on disk and swap it in.
+    
+    Models (and name caches) whose files are unchanged are carried over
+    unless ``force``. Changed models load side by side; the catalogs are
+    rebuilt for the new bundle before it is swapped in, and requests already
+    running finish on the previous one. A model whose table is still lazy
+    only reloads its booster, which the table is scored with on first use.
+    """
+    global _names_version
+    
+    # Let startup finish first; models whose booster is still lazy load fresh on first use
+    _artifacts.wait()
+    previous = _bundles.current
+    changed = []
+    if force or file_stamp(_name_files()) != _names_stamp:
+        load_name_caches()
+        changed.append('names')
+    
+    loaded = {name: previous.models.get(name) or ServedModel(spec) for name, spec in MODELS.items()}
+    stale = [
+        spec for spec in MODELS.values()
+        if _artifacts.state(spec.model_artifact) != PENDING
+        and (force or file_stamp(spec.files()) != loaded[spec.name].stamp)
+    ]
+    models = dict(previous.models)
+    if stale:
+        with ThreadPoolExecutor(max_workers=len(stale), thread_name_prefix='reload') as pool:
+            futures = {
+                spec.name: pool.submit(_reload_model, spec, loaded[spec.name],
+                                       _artifacts.state(spec.data_artifact) != PENDING)
+                for spec in stale
+            }
+            for name, future in futures.items():
+                models[name] = future.result()
+                changed.append(name)
+    if not changed:
+        return {'changed': []}
+    
+    bundle = previous.replace(models=models)
+    if DEFAULT_MODEL in changed or 'names' in changed:
+        bundle = bundle.replace(**_catalog_parts(bundle))
+    _bundles.swap(bundle)
+    if 'names' in changed:
+        _names_version += 1
+    # Entries of the previous versions can't be hit any more
+    _response_cache.clear()
+    _prewarm_response_cache()
+    return {
+        'changed': changed,
+        'versions': {name: model.version for name, model in bundle.models.items()}
+    }
+
+
+_reloader = Reloader(reload_bundle)
+_watcher = FileWatcher(lambda: [*_model_files(), *_name_files()],
+                       lambda: _reloader.trigger('files changed'))
+# Admin reloads reach every gunicorn worker through this file
+_reload_broadcast = ReloadBroadcast(
+    os.environ.get('RELOAD_GENERATION_FILE', CHECKPOINTS_DIR / "reload_generation.json"),
+    lambda force: _reloader.trigger('admin (another worker)', force=force)
+)
+
+
+# Pre-warms the response cache of each serving process, off the request path
+_prewarm = ProcessThread(_prewarm_response_cache, 'prewarm')
+
+
+def start_background_threads():
+    """Start this process's file watcher, reload broadcast poller and cache pre-warm (once per process)."""
+    _watcher.ensure_started()
+    _reload_broadcast.ensure_started()
+    _prewarm.ensure_started()
+
+
+@app.before_request
+def _start_background_threads():
+    # Started per process on the first request (gunicorn workers are forked),
+    # unless gunicorn's post_worker_init already did
+    start_background_threads()
+
+
+# Bearer token for the admin endpoints; they are disabled when it is unset
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+
+@app.route('/api/admin/reload', methods=['GET', 'POST'])
+def admin_reload():
+    """Trigger (POST) or inspect (GET) a hot reload of the models and data.
+    
+    Needs ``Authorization: Bearer $ADMIN_TOKEN``. POST query params:
+        force: 1 to reload files that have not changed too
+        wait: 1 to answer once the reload has finished
+    
+    A POST reloads every worker: the others pick the reload up from the
+    reload generation file within RELOAD_POLL_INTERVAL seconds. ``wait`` and
+    GET only report on the worker that answers.
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Admin endpoints are disabled (ADMIN_TOKEN is not set)'}), 404
+    supplied = request.headers.get('Authorization', '').encode()
+    if not hmac.compare_digest(supplied, f'Bearer {ADMIN_TOKEN}'.encode()):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    if request.method == 'GET':
+        return jsonify(_reloader.status())
+    
+    force = request.args.get('force') == '1'
+    _reload_broadcast.publish(force)
+    thread = _reloader.trigger('admin', force=force)
+    if request.args.get('wait') == '1':
+        thread.join()
+        return jsonify(_reloader.status())
+    return jsonify(_reloader.status()), 202
+
+
+def start_loading(default_lazy: str = ''):
+    """Start loading the artifacts in a thread pool.
+    
+    LAZY_ARTIFACTS (comma-separated artifact names, e.g.
+    "original_data,api_data") defers those, and whatever is built from them,
+    to their first use.
+    """
+    lazy = os.environ.get('LAZY_ARTIFACTS', default_lazy)
+    _artifacts.start([name.strip() for name in lazy.split(',') if name.strip()])
+
+
+def create_app():
+    """Load both models and their data, then return the Flask app.
+    
+    This is the production entry point (see wsgi.py and gunicorn.conf.py).
+    With gunicorn's preload_app, it runs once in the master process and the
+    loaded models, tables and caches are shared copy-on-write by the workers,
+    so it loads concurrently but waits for everything before returning
+    (tables are only lazy if LAZY_ARTIFACTS asks for it).
+    """
+    start_loading()
+    _artifacts.wait()
+    if not _ready():
+        raise RuntimeError("Failed to load any model or data")
+    return app
+
+
+def _report_when_loaded():
+    _artifacts.wait()
+    timings = ', '.join(
+        f"{name} {entry['load_seconds']:.1f}s"
+        for name, entry in _artifacts.status().items() if 'load_seconds' in entry
+    )
+    if _ready():
+        print(f"\n✓ Ready ({timings})")
+    else:
+        print(f"\n✗ Failed to load any model or data ({timings})")
+
+
 if __name__ == '__main__':
     print("\n" + "="*50)
     print("🧬 Drug Repurposing Prediction API")
     print("="*50 + "\n")
     
-    # Load original model
-    original_loaded = load_model_and_data()
-    if original_loaded:
-        print("\n✓ Original model data loaded successfully")
-    
-    # Load new API model with extended dataset
-    api_loaded = load_api_model()
-    if api_loaded:
-        print("\n✓ Extended API model loaded successfully")
-    
-    if original_loaded or api_loaded:
-        print("\n" + "="*50)
-        print("Available endpoints:")
-        print("  - /api/diseases (original model)")
-        print("  - /api/predict/<disease_id> (original model)")
-        print("  - /api/v2/diseases (extended model)")
-        print("  - /api/v2/drugs (extended model)")
-        print("  - /api/repurpose/<disease_id> (extended model)")
-        print("  - /api/drug-diseases/<drug_id> (extended model)")
-        print("="*50)
-        print("\nStarting server on http://localhost:5001\n")
-        app.run(host='0.0.0.0', port=5001, debug=True)
-    else:
-        print("\n✗ Failed to load any model or data")
-        exit(1)
-
+    # Serve straight away and load in the background; the heavy tables load on
+    # first use. The debug reloader's parent process only watches files, so
+    # only the serving child loads anything.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_loading(default_lazy='original_data,api_data')
+        threading.Thread(target=_report_when_loaded, name='startup-report', daemon=True).start()
+        start_background_threads()
+    
+    print("\n" + "="*50)
+    print("Available endpoints:")
+    print("  - /api/diseases (original model)")
+    print("  - /api/predict/<disease_id> (original model)")
+    print("  - /api/v2/diseases (extended model)")
+    print("  - /api/v2/drugs (extended model)")
+    print("  - /api/repurpose/<disease_id> (extended model)")
+    print("  - /api/drug-diseases/<drug_id> (extended model)")
+    print("  - /api/pair/<disease_id>/<drug_id> (extended model)")
+    print("  - /api/bulk [POST] (extended model, NDJSON)")
+    print("  - /api/models (the models the ranking endpoints' model= parameter can name)")
+    print("  - /api/health/live, /api/health/ready (probes)")
+    print("  - /api/admin/reload [POST] (hot reload, needs ADMIN_TOKEN)")
+    print("="*50)
+    print("\nStarting development server on http://localhost:5001")
+    print("(for production use: gunicorn -c gunicorn.conf.py)\n")
+    app.run(host='0.0.0.0', port=5001, debug=True)
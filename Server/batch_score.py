@@ -0,0 +1,180 @@
+"""
+Offline batch scoring of every drug-disease pair in the API feature table.
+
+Scores the table without going through Flask: the table is read in chunks,
+each chunk is scored by a pool of worker processes (each holding its own copy
+of the booster) and written as one part of a Parquet dataset:
+
+    <out>/_manifest.json        model/feature fingerprint and chunk size
+    <out>/part-00000.parquet    chembl_id, disease_id, score, tier
+    ...
+
+At most two chunks per worker are in flight, so memory stays bounded whatever
+the table size. Parts are written atomically; rerunning after an interruption
+skips the parts that already exist (as long as the model, features and chunk
+size are unchanged).
+
+Usage:
+    python batch_score.py
+    python batch_score.py --features API/features_merged.csv --out API/batch_scores --workers 8
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from columnar import read_table, source_files, table_exists
+from features import FeaturePipeline
+from model_config import API_FEATURE_NAMES, API_MODEL_DIR  # Same feature order and files the API serves from
+from score_store import fingerprint
+from tree_engine import load_booster
+
+SERVER_DIR = Path(__file__).parent
+MANIFEST_FILE = "_manifest.json"  # Leading underscore: skipped by Parquet dataset readers
+ID_COLUMNS = ['chembl_id', 'disease_id']
+
+# Same thresholds as app.get_confidence_tier
+TIER_THRESHOLDS = [(0.7, 'high'), (0.4, 'medium')]
+
+_booster = None
+_pipeline = None
+
+
+def _load_pipeline(model_path: Path, scaler_path: Path, feature_names: list):
+    booster = load_booster(model_path)
+    scaler = joblib.load(scaler_path) if scaler_path is not None else None
+    return booster, FeaturePipeline(feature_names, scaler, booster)
+
+
+def _init_worker(model_path: Path, scaler_path: Path, feature_names: list):
+    global _booster, _pipeline
+    _booster, _pipeline = _load_pipeline(model_path, scaler_path, feature_names)
+
+
+def confidence_tiers(scores: np.ndarray) -> np.ndarray:
+    """Vectorized get_confidence_tier."""
+    return np.select([scores >= t for t, _ in TIER_THRESHOLDS], [n for _, n in TIER_THRESHOLDS], 'low')
+
+
+def _write_part(part_path: Path, chunk: pd.DataFrame) -> int:
+    """Score one chunk and write it as a Parquet part (runs in a worker)."""
+    scores = _pipeline.predict(_booster, chunk)
+    table = pa.table({
+        'chembl_id': pa.array(chunk['chembl_id'].to_numpy(dtype=object)).dictionary_encode(),
+        'disease_id': pa.array(chunk['disease_id'].to_numpy(dtype=object)).dictionary_encode(),
+        'score': pa.array(scores, type=pa.float64()),
+        'tier': pa.array(confidence_tiers(scores)).dictionary_encode(),
+    })
+    tmp_path = part_path.with_name(part_path.name + '.tmp')
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, part_path)
+    return len(chunk)
+
+
+def _iter_chunks(features_path: Path, columns: list, chunk_rows: int):
+    """Yield ``(chunk_number, frame)`` without holding the whole table in memory."""
+    if source_files(features_path) != [features_path]:
+        # Memory-mapped columnar copy: slicing only touches the pages it needs
+        table = read_table(features_path, columns)
+        for number, start in enumerate(range(0, len(table), chunk_rows)):
+            yield number, table.iloc[start:start + chunk_rows]
+    else:
+        reader = pd.read_csv(features_path, usecols=lambda c: c in columns, chunksize=chunk_rows)
+        for number, chunk in enumerate(reader):
+            yield number, chunk
+
+
+def _prepare_output(out_dir: Path, manifest: dict) -> set:
+    """Create ``out_dir`` and return the chunk numbers already written."""
+    manifest_path = out_dir / MANIFEST_FILE
+    if manifest_path.exists():
+        with open(manifest_path, 'r') as f:
+            if json.load(f) != manifest:
+                print(f"  → Model, features or chunk size changed; discarding old parts in {out_dir}")
+                shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return {int(p.stem.split('-')[1]) for p in out_dir.glob('part-*.parquet')}
+
+
+def score_all(features_path: Path, model_path: Path, scaler_path: Path, out_dir: Path, feature_names: list,
+              chunk_rows: int = 250_000, workers: int = None) -> int:
+    """Score every row of the feature table into ``out_dir``; returns rows scored.
+
+    ``scaler_path`` may be None for a model trained on unscaled features.
+    """
+    # Fail on a model/scaler/feature mismatch before starting any workers
+    _load_pipeline(model_path, scaler_path, feature_names)
+
+    workers = workers or os.cpu_count() or 1
+    manifest = {
+        'fingerprint': fingerprint(model_path, *([scaler_path] if scaler_path else []), tables=[features_path]),
+        'chunk_rows': chunk_rows,
+        'features': feature_names,
+    }
+    done = _prepare_output(out_dir, manifest)
+    if done:
+        print(f"  → Resuming: {len(done)} parts already written")
+
+    start = time.perf_counter()
+    rows = 0
+    pending = set()
+
+    def collect(block):
+        nonlocal rows, pending
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED if block else ALL_COMPLETED)
+        for future in finished:
+            rows += future.result()
+        elapsed = time.perf_counter() - start
+        print(f"  Progress: {rows:,} rows | {rows / max(elapsed, 1e-9):,.0f} rows/s")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_path, scaler_path, feature_names)) as executor:
+        for number, chunk in _iter_chunks(features_path, ID_COLUMNS + feature_names, chunk_rows):
+            if number in done:
+                continue
+            part_path = out_dir / f"part-{number:05d}.parquet"
+            # Copy so only this chunk (not the whole mapped table) is sent to the worker
+            pending.add(executor.submit(_write_part, part_path, chunk.copy()))
+            if len(pending) >= 2 * workers:
+                collect(block=True)
+        if pending:
+            collect(block=False)
+
+    elapsed = time.perf_counter() - start
+    print(f"✓ Scored {rows:,} pairs in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s) → {out_dir}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score every drug-disease pair to Parquet')
+    parser.add_argument('--features', type=Path, default=API_MODEL_DIR / "features_merged.csv")
+    parser.add_argument('--model', type=Path, default=API_MODEL_DIR / "xgb_temporal_model.json")
+    parser.add_argument('--scaler', type=Path, default=API_MODEL_DIR / "feature_scaler.joblib",
+                        help='Fitted feature scaler (skipped if the file does not exist)')
+    parser.add_argument('--out', type=Path, default=API_MODEL_DIR / "batch_scores")
+    parser.add_argument('--chunk-rows', type=int, default=250_000)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    if not table_exists(args.features):
+        parser.error(f"Features file not found at {args.features}")
+    if not args.model.exists():
+        parser.error(f"Model not found at {args.model}")
+    scaler_path = args.scaler if args.scaler.exists() else None
+    score_all(args.features, args.model, scaler_path, args.out, API_FEATURE_NAMES, args.chunk_rows, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,360 @@
+"""
+Benchmarks for the prediction API and the scoring kernels.
+
+Each scenario is an API feature table served next to the shipped models in
+checkpoints/ and API/:
+
+    shipped     the tables as shipped (API/features_merged.csv if present)
+    1m, 10m     synthetic tables of 1M / 10M pairs, bootstrapped from the
+                feature rows in API/X_train.parquet with synthetic IDs
+
+Every measurement runs in a fresh subprocess, so cold start and peak RSS are
+those of a real server process:
+
+    build   startup with no score artifacts (scores the whole table)
+    serve   startup with artifacts present, then per-endpoint latency
+            percentiles through the Flask test client
+    batch   batch_score.py over the whole table (rows/second)
+
+ChEMBL/OpenTargets are replaced by name_stub_server.py and names go to a
+throwaway SQLite store; the response cache and pre-warming are turned off so
+requests measure the actual work. Synthetic tables are generated once into
+--data-dir (seeded) and reused.
+
+    python benchmark.py                          # shipped + 1m → benchmark_report.json
+    python benchmark.py --scenarios 1m 10m --out after.json
+    python benchmark.py --compare before.json after.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+SERVER_DIR = Path(__file__).parent
+API_DIR = SERVER_DIR / "API"
+# Derived from the model and table on startup; deleted before the "build" run
+SCORE_ARTIFACTS = ("pair_scores.parquet", "score_matrix.npz")
+DEFAULT_DATA_DIR = SERVER_DIR / "benchmark_data"
+
+SIZES = {'1m': 1_000_000, '10m': 10_000_000}
+SEED = 20240601
+
+# Average pairs per disease / per drug, as in the shipped extended dataset
+PAIRS_PER_DISEASE = 25
+PAIRS_PER_DRUG = 120
+
+REQUESTS_PER_ENDPOINT = 200
+WARMUP_REQUESTS = 5
+
+
+def _peak_rss_mb(children: bool = False) -> float:
+    if not children:
+        # ru_maxrss survives execve (it would include the parent's peak); VmHWM doesn't
+        try:
+            with open('/proc/self/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _percentiles(seconds: list) -> dict:
+    ms = np.asarray(seconds) * 1000
+    return {
+        'requests': len(ms),
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p90_ms': round(float(np.percentile(ms, 90)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'max_ms': round(float(ms.max()), 3),
+    }
+
+
+# ----------------------------------------------------------------------------
+# Scenario data
+# ----------------------------------------------------------------------------
+
+def make_synthetic_table(directory: Path, rows: int, seed: int = SEED) -> Path:
+    """Write a ``rows``-pair features_merged table (CSV + columnar copy) into ``directory``."""
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    from columnar import convert_csv
+
+    csv_path = directory / "features_merged.csv"
+    marker = directory / "synthetic.json"
+    spec = {'rows': rows, 'seed': seed}
+    if marker.exists() and json.loads(marker.read_text()) == spec:
+        return csv_path
+
+    if directory.exists():
+        shutil.rmtree(directory)
+    directory.mkdir(parents=True)
+    print(f"  → Generating {rows:,} synthetic pairs in {directory}")
+
+    rng = np.random.default_rng(seed)
+    source = pd.read_parquet(API_DIR / "X_train.parquet").drop(columns=['index'], errors='ignore')
+    sample = source.iloc[rng.integers(0, len(source), size=rows)].reset_index(drop=True)
+    n_diseases = max(1, rows // PAIRS_PER_DISEASE)
+    n_drugs = max(1, rows // PAIRS_PER_DRUG)
+    disease_ids = np.char.add('EFO_', np.char.zfill(np.arange(n_diseases).astype(str), 7))
+    drug_ids = np.char.add('CHEMBL', (np.arange(n_drugs) + 1000).astype(str))
+    table = pa.table({
+        'chembl_id': drug_ids[rng.integers(0, n_drugs, size=rows)],
+        'disease_id': disease_ids[rng.integers(0, n_diseases, size=rows)],
+        **{name: sample[name].to_numpy() for name in sample.columns},
+    })
+    pacsv.write_csv(table, csv_path)
+    convert_csv(csv_path)
+
+    for name in ("xgb_temporal_model.json", "feature_scaler.joblib"):
+        shutil.copy(API_DIR / name, directory / name)
+    marker.write_text(json.dumps(spec))
+    return csv_path
+
+
+def _child_generate(directory: Path) -> dict:
+    make_synthetic_table(directory, SIZES[directory.name])
+    return {}
+
+
+# ----------------------------------------------------------------------------
+# Measurements (run in a child process)
+# ----------------------------------------------------------------------------
+
+def _import_app(model_dir: Path):
+    """Import the server with stubbed name services, serving ``model_dir``."""
+    from name_stub_server import start_stub_server
+
+    _, env = start_stub_server()
+    os.environ.update(env)
+    import app
+
+    app.MODELS['extended'].directory = model_dir
+    return app
+
+
+def _child_build(model_dir: Path) -> dict:
+    start = time.perf_counter()
+    app = _import_app(model_dir)
+    app.create_app()
+    return {'startup_seconds': round(time.perf_counter() - start, 3), 'peak_rss_mb': round(_peak_rss_mb(), 1)}
+
+
+def _time_requests(send, requests: list) -> dict:
+    for request in requests[:WARMUP_REQUESTS]:
+        send(request)
+    timings = []
+    for request in requests:
+        start = time.perf_counter()
+        response = send(request)
+        response.get_data()  # Drain streamed bodies
+        timings.append(time.perf_counter() - start)
+        if response.status_code >= 500:
+            raise RuntimeError(f"{request} failed with {response.status_code}")
+    return _percentiles(timings)
+
+
+def _child_serve(model_dir: Path) -> dict:
+    start = time.perf_counter()
+    app = _import_app(model_dir)
+    imported = time.perf_counter()
+    app.create_app()
+    result = {
+        'cold_start_seconds': round(time.perf_counter() - start, 3),
+        'import_seconds': round(imported - start, 3),
+        'endpoints': {},
+    }
+
+    rng = np.random.default_rng(SEED)
+    client = app.app.test_client()
+    get = client.get
+    endpoints = result['endpoints']
+
+    def sample(keys, n=REQUESTS_PER_ENDPOINT):
+        return list(rng.choice(np.asarray(keys, dtype=object), size=n))
+
+    endpoints['health'] = _time_requests(get, ['/api/v2/health'] * REQUESTS_PER_ENDPOINT)
+    original, extended = app.models.get('original'), app.models.get('extended')
+    if original is not None and original.serving:
+        endpoints['predict'] = _time_requests(
+            get, [f'/api/predict/{d}?top_k=10' for d in sample(original.scores.disease_ids)])
+    if extended is not None and extended.pairs is not None:
+        diseases = extended.scores.disease_ids
+        drugs = extended.scores.drug_ids
+        repurpose_urls = [f'/api/repurpose/{d}?top_k=20' for d in sample(diseases)]
+        endpoints['repurpose'] = _time_requests(get, repurpose_urls)
+        endpoints['repurpose_columnar'] = _time_requests(get, [f'{u}&format=columnar' for u in repurpose_urls])
+        endpoints['drug_diseases'] = _time_requests(
+            get, [f'/api/drug-diseases/{d}?top_k=20' for d in sample(drugs)])
+        queries = [str(d)[i:i + 4].lower() for d, i in zip(sample(diseases), rng.integers(0, 6, REQUESTS_PER_ENDPOINT))]
+        endpoints['v2_diseases_search'] = _time_requests(
+            get, [f'/api/v2/diseases?search={q}&page=1&limit=50' for q in queries])
+        endpoints['v2_drugs'] = _time_requests(get, ['/api/v2/drugs'] * 20)
+        bulk_bodies = [{'disease_ids': sample(diseases, 100), 'top_k': 20} for _ in range(20)]
+        endpoints['bulk_100_diseases'] = _time_requests(lambda body: client.post('/api/bulk', json=body), bulk_bodies)
+
+    result['peak_rss_mb'] = round(_peak_rss_mb(), 1)
+    return result
+
+
+def _child_batch(model_dir: Path) -> dict:
+    from batch_score import score_all
+    from model_config import API_FEATURE_NAMES
+
+    features_path = model_dir / "features_merged.csv"
+    scaler_path = model_dir / "feature_scaler.joblib"
+    with tempfile.TemporaryDirectory() as out_dir:
+        start = time.perf_counter()
+        rows = score_all(features_path, model_dir / "xgb_temporal_model.json",
+                         scaler_path if scaler_path.exists() else None, Path(out_dir) / "scores", API_FEATURE_NAMES)
+        elapsed = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(rows / elapsed),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'peak_worker_rss_mb': round(_peak_rss_mb(children=True), 1),
+    }
+
+
+CHILD_MODES = {'generate': _child_generate, 'build': _child_build, 'serve': _child_serve, 'batch': _child_batch}
+
+
+def _run_child(mode: str, model_dir: Path, env: dict) -> dict:
+    with tempfile.NamedTemporaryFile(suffix='.json') as result_file:
+        subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), '--child', mode, str(model_dir), result_file.name],
+            cwd=SERVER_DIR, env=env, check=True,
+            stdout=None if mode == 'generate' else subprocess.DEVNULL,
+        )
+        return json.loads(Path(result_file.name).read_text())
+
+
+# ----------------------------------------------------------------------------
+# Orchestration and reports
+# ----------------------------------------------------------------------------
+
+def _git_commit() -> dict:
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=SERVER_DIR, capture_output=True, text=True).stdout.strip()
+    try:
+        return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(git('status', '--porcelain'))}
+    except OSError:
+        return {'commit': None, 'dirty': None}
+
+
+def _environment() -> dict:
+    import pandas as pd
+    versions = {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__}
+    try:
+        import xgboost
+        versions['xgboost'] = xgboost.__version__
+    except ImportError:
+        versions['xgboost'] = None
+    return {
+        **_git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'versions': versions,
+        'settings': {k: os.environ[k] for k in ('INFERENCE_BACKEND', 'METRICS_ENABLED') if k in os.environ},
+    }
+
+
+def run_benchmarks(scenarios: list, data_dir: Path, skip_batch: bool = False) -> dict:
+    report = {'environment': _environment(), 'scenarios': {}}
+    with tempfile.TemporaryDirectory() as scratch:
+        env = {
+            **os.environ,
+            'NAME_STORE_DB': str(Path(scratch) / "names.sqlite3"),
+            'RESPONSE_CACHE_SIZE': '0',
+            'PREWARM_DISEASES': '',
+        }
+        for name in scenarios:
+            model_dir = API_DIR if name == 'shipped' else data_dir / name
+            if name != 'shipped':
+                # In a child too, so generating the table doesn't inflate later peak RSS readings
+                _run_child('generate', model_dir, env)
+            has_table = (model_dir / "features_merged.csv").exists()
+            print(f"▶ {name} ({model_dir})")
+            result = {}
+            if has_table and name != 'shipped':
+                # Start without score artifacts once, to time the scoring on startup
+                # (a current score matrix alone would be mapped without scoring)
+                for artifact in SCORE_ARTIFACTS:
+                    (model_dir / artifact).unlink(missing_ok=True)
+                result['build'] = _run_child('build', model_dir, env)
+                print(f"  build: {result['build']['startup_seconds']}s")
+            result['serve'] = _run_child('serve', model_dir, env)
+            print(f"  serve: cold start {result['serve']['cold_start_seconds']}s, "
+                  f"peak RSS {result['serve']['peak_rss_mb']} MB")
+            for endpoint, stats in result['serve']['endpoints'].items():
+                print(f"    {endpoint:<20} p50 {stats['p50_ms']:>9.3f} ms   p99 {stats['p99_ms']:>9.3f} ms")
+            if has_table and not skip_batch:
+                result['batch'] = _run_child('batch', model_dir, env)
+                print(f"  batch: {result['batch']['rows_per_second']:,} rows/s")
+            report['scenarios'][name] = result
+    return report
+
+
+def _flatten(tree, prefix=''):
+    if isinstance(tree, dict):
+        for key, value in tree.items():
+            yield from _flatten(value, f"{prefix}{key}.")
+    elif isinstance(tree, (int, float)) and not isinstance(tree, bool):
+        yield prefix[:-1], tree
+
+
+def compare(before_path: Path, after_path: Path):
+    """Print every metric of two reports side by side."""
+    before = dict(_flatten(json.loads(before_path.read_text())['scenarios']))
+    after = dict(_flatten(json.loads(after_path.read_text())['scenarios']))
+    print(f"{'metric':<60} {'before':>12} {'after':>12} {'after/before':>12}")
+    for key in sorted(before.keys() | after.keys()):
+        old, new = before.get(key), after.get(key)
+        ratio = f"{new / old:.2f}x" if old and new is not None else '-'
+        print(f"{key:<60} {old if old is not None else '-':>12} {new if new is not None else '-':>12} {ratio:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the prediction API and scoring kernels')
+    parser.add_argument('--scenarios', nargs='+', default=['shipped', '1m'], choices=['shipped', *SIZES])
+    parser.add_argument('--data-dir', type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument('--out', type=Path, default=Path('benchmark_report.json'))
+    parser.add_argument('--skip-batch', action='store_true', help='Skip the batch scoring runs')
+    parser.add_argument('--compare', nargs=2, type=Path, metavar=('BEFORE', 'AFTER'))
+    parser.add_argument('--child', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, model_dir, result_path = args.child
+        result = CHILD_MODES[mode](Path(model_dir))
+        Path(result_path).write_text(json.dumps(result))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run_benchmarks(args.scenarios, args.data_dir, args.skip_batch)
+    args.out.write_text(json.dumps(report, indent=2))
+    print(f"✓ Wrote benchmark report to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Search-indexed disease and drug catalogs.
+
+A Catalog is built once at load time from a sorted list of entries. Searches
+(case-insensitive substring match on name or ID, as the typeahead expects) go
+through a trigram index: the posting lists of the query's trigrams are
+intersected and only the surviving candidates are checked. Results are row
+positions into the sorted entries, so paging slices an index array instead of
+copying entries, and the serialized bytes of recently served pages are cached.
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+import threading
+
+import numpy as np
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class Catalog:
+    """Sorted entries (dicts with ``id`` and ``name``) plus a trigram search index."""
+
+    def __init__(self, entries: list, serialize, page_cache_size: int = 1024):
+        self.entries = entries
+        self._serialize = serialize
+        self._names = [e['name'].lower() for e in entries]
+        self._ids = [e['id'].lower() for e in entries]
+        self._all = np.arange(len(entries), dtype=np.int32)
+
+        postings = {}
+        for position, (name, entry_id) in enumerate(zip(self._names, self._ids)):
+            for trigram in _trigrams(name) | _trigrams(entry_id):
+                postings.setdefault(trigram, []).append(position)
+        self._postings = {t: np.array(p, dtype=np.int32) for t, p in postings.items()}
+
+        # Short queries can't use the index; there are few of them, so memoize
+        self._short_search = lru_cache(maxsize=4096)(self._scan)
+
+        self._pages = OrderedDict()
+        self._page_cache_size = page_cache_size
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _matches(self, query: str, position: int) -> bool:
+        return query in self._names[position] or query in self._ids[position]
+
+    def _scan(self, query: str) -> np.ndarray:
+        return np.array([p for p in range(len(self.entries)) if self._matches(query, p)], dtype=np.int32)
+
+    def search(self, query: str) -> np.ndarray:
+        """Positions of matching entries, in catalog order."""
+        query = query.lower().strip()
+        if not query:
+            return self._all
+        if len(query) < 3:
+            return self._short_search(query)
+
+        lists = []
+        for trigram in _trigrams(query):
+            posting = self._postings.get(trigram)
+            if posting is None:
+                return self._all[:0]
+            lists.append(posting)
+        lists.sort(key=len)
+        candidates = lists[0]
+        for posting in lists[1:]:
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+            if len(candidates) == 0:
+                return candidates
+        # Trigrams can match out of order; confirm the substring itself
+        return np.array([p for p in candidates if self._matches(query, p)], dtype=np.int32)
+
+    def page(self, query: str, start: int, stop: int) -> list:
+        """Entries ``start:stop`` of the search results (list slice semantics)."""
+        return [self.entries[p] for p in self.search(query)[start:stop]]
+
+    def cached_bytes(self, key, build):
+        """Serialized ``build()`` result, cached under ``key`` (LRU)."""
+        with self._lock:
+            body = self._pages.get(key)
+            if body is not None:
+                self._pages.move_to_end(key)
+                return body
+        body = self._serialize(build())
+        with self._lock:
+            self._pages[key] = body
+            if len(self._pages) > self._page_cache_size:
+                self._pages.popitem(last=False)
+        return body
@@ -0,0 +1,212 @@
+"""
+Columnar binary copies of the pair/feature tables.
+
+Parsing the large CSVs dominates server cold start. A converted table lives in
+a ``<name>.cols/`` directory next to its CSV:
+
+    meta.json                 column layout, the CSV it was built from and
+                              the SHA-256 of that CSV's contents
+    numeric_<dtype>.npy       one column-major block per numeric dtype
+    <column>.codes.npy        dictionary codes for each ID/string column
+    <column>.categories.npy   the dictionary itself
+
+Numeric blocks and codes are memory-mapped read-only, so loading is close to
+free and several server workers share the same pages. ID columns come back as
+pandas categoricals.
+
+Convert the default tables (or the CSVs given on the command line) with:
+    python columnar.py
+    python columnar.py API/features_merged.csv
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SERVER_DIR = Path(__file__).parent
+DEFAULT_TABLES = [
+    SERVER_DIR / "checkpoints" / "train_pairs.csv",
+    SERVER_DIR / "checkpoints" / "train_features_checkpoint.csv",
+    SERVER_DIR / "API" / "features_merged.csv",
+]
+
+META_FILE = "meta.json"
+
+
+def columnar_path(csv_path: Path) -> Path:
+    """Directory holding the columnar copy of ``csv_path``."""
+    return csv_path.with_name(csv_path.stem + ".cols")
+
+
+def _codes_dtype(n_categories: int):
+    # Same widths pandas uses for categorical codes, so they can be used as-is
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _source_stamp(csv_path: Path) -> dict:
+    stat = csv_path.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _is_current(csv_path: Path) -> bool:
+    """True if a columnar copy exists and was built from the CSV as it is now."""
+    meta_path = columnar_path(csv_path) / META_FILE
+    if not meta_path.exists():
+        return False
+    if not csv_path.exists():
+        return True  # Shipped without the CSV
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    return meta.get('source') == _source_stamp(csv_path)
+
+
+def _hash_files(paths) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_hash(csv_path: Path) -> str:
+    """SHA-256 of the CSV's contents."""
+    return _hash_files([csv_path])
+
+
+def table_fingerprint(csv_path: Path) -> str:
+    """Identity of the table's contents, the same whether it is read from the CSV or its columnar copy.
+
+    The columnar copy records the hash of the CSV it was converted from, so
+    a current copy doesn't need the CSV re-read. Only a copy shipped without
+    its CSV and from before the hash was recorded falls back to hashing the
+    copy's own files.
+    """
+    if _is_current(csv_path):
+        with open(columnar_path(csv_path) / META_FILE, 'r') as f:
+            recorded = json.load(f).get('sha256')
+        if recorded:
+            return recorded
+        if not csv_path.exists():
+            return _hash_files(source_files(csv_path))
+    return content_hash(csv_path)
+
+
+def table_source(csv_path: Path) -> Path:
+    """The path ``read_table`` reads the table from (the CSV or its columnar copy)."""
+    return columnar_path(csv_path) if _is_current(csv_path) else csv_path
+
+
+def table_exists(csv_path: Path) -> bool:
+    """True if the table is available as CSV or as a columnar copy."""
+    return csv_path.exists() or (columnar_path(csv_path) / META_FILE).exists()
+
+
+def source_files(csv_path: Path) -> list:
+    """The files ``read_table`` reads for this table (e.g. for fingerprinting)."""
+    if _is_current(csv_path):
+        directory = columnar_path(csv_path)
+        return sorted(p for p in directory.iterdir() if p.is_file())
+    return [csv_path]
+
+
+def convert_csv(csv_path: Path) -> Path:
+    """Write the columnar copy of a CSV and return its directory."""
+    df = pd.read_csv(csv_path)
+    target = columnar_path(csv_path)
+    tmp_dir = target.with_name(target.name + ".tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir()
+
+    columns = []
+    blocks = {}
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            dtype = series.dtype.name
+            blocks.setdefault(dtype, []).append(name)
+            columns.append({'name': name, 'kind': 'numeric', 'dtype': dtype})
+        else:
+            codes, categories = pd.factorize(series)
+            categories = np.asarray(categories, dtype=str)
+            np.save(tmp_dir / f"{name}.codes.npy", codes.astype(_codes_dtype(len(categories))))
+            np.save(tmp_dir / f"{name}.categories.npy", categories)
+            columns.append({'name': name, 'kind': 'category'})
+
+    for dtype, names in blocks.items():
+        # Column-major so each column is one contiguous run of the file
+        np.save(tmp_dir / f"numeric_{dtype}.npy", np.asfortranarray(df[names].to_numpy(dtype=dtype)))
+
+    meta = {
+        'rows': len(df),
+        'columns': columns,
+        'blocks': blocks,
+        'source': _source_stamp(csv_path),
+        'sha256': content_hash(csv_path),
+    }
+    with open(tmp_dir / META_FILE, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(tmp_dir, target)
+    return target
+
+
+def _read_columnar(directory: Path, columns=None) -> pd.DataFrame:
+    with open(directory / META_FILE, 'r') as f:
+        meta = json.load(f)
+    wanted = [c['name'] for c in meta['columns'] if columns is None or c['name'] in columns]
+
+    frames = []
+    for dtype, names in meta['blocks'].items():
+        keep = [i for i, name in enumerate(names) if name in wanted]
+        if not keep:
+            continue
+        block = np.load(directory / f"numeric_{dtype}.npy", mmap_mode='r')
+        if len(keep) < len(names):
+            block = block[:, keep]
+        frames.append(pd.DataFrame(block, columns=[names[i] for i in keep], copy=False))
+
+    for column in meta['columns']:
+        name = column['name']
+        if column['kind'] != 'category' or name not in wanted:
+            continue
+        codes = np.load(directory / f"{name}.codes.npy", mmap_mode='r')
+        categories = pd.Index(np.load(directory / f"{name}.categories.npy"))
+        frames.append(pd.DataFrame({
+            name: pd.Categorical.from_codes(codes, categories=categories, validate=False)
+        }, copy=False))
+
+    if not frames:
+        return pd.DataFrame(index=pd.RangeIndex(meta['rows']))
+    # concat keeps the mmapped blocks as they are; column selection is lazy
+    return pd.concat(frames, axis=1)[wanted]
+
+
+def read_table(csv_path: Path, columns=None) -> pd.DataFrame:
+    """Read a table, preferring an up-to-date columnar copy over the CSV."""
+    if _is_current(csv_path):
+        return _read_columnar(columnar_path(csv_path), columns)
+    return pd.read_csv(csv_path, usecols=columns)
+
+
+def main():
+    paths = [Path(p) for p in sys.argv[1:]] or [p for p in DEFAULT_TABLES if p.exists()]
+    for csv_path in paths:
+        target = convert_csv(csv_path)
+        print(f"✓ Converted {csv_path} → {target}")
+
+
+if __name__ == '__main__':
+    main()
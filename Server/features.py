@@ -0,0 +1,111 @@
+"""
+Feature preparation shared by every scoring path.
+
+The models were trained on StandardScaler-scaled features in a fixed column
+order. FeaturePipeline reproduces that preprocessing for whole blocks of rows
+at once:
+
+- selects the model's feature columns, in training order (missing columns
+  and NaN values become 0.0);
+- applies the fitted scaler as one vectorized ``(x - mean) / scale`` pass
+  and hands the model a float32 block;
+- checks once, when it is built, that the scaler and booster were fitted on
+  the same feature names, so a schema mismatch fails at load time rather than
+  producing silently wrong scores.
+
+The arithmetic is done in float64 and only the result is cast to float32: tree
+split thresholds sit exactly on (scaled) training values, so scaling in
+float32 would move values across splits and change scores.
+
+Used by app.py, batch_score.py and "predict (1).py".
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    import xgboost as xgb
+except ImportError:  # Models may be served by tree_engine.TreeEnsemble instead
+    xgb = None
+
+# Rows prepared per block in predict(), to bound the float64 working copy
+BLOCK_ROWS = 1_000_000
+
+
+class FeaturePipeline:
+    """Turns frames (or lists of feature dicts) into model-ready float32 blocks."""
+
+    def __init__(self, feature_names: list, scaler=None, booster=None):
+        self.feature_names = list(feature_names)
+        self.scaler = scaler
+        self._validate(booster)
+
+        self._mean = self._scale = None
+        if scaler is not None and hasattr(scaler, 'scale_') and hasattr(scaler, 'mean_'):
+            # StandardScaler: apply it directly instead of through sklearn
+            width = len(self.feature_names)
+            mean = scaler.mean_ if getattr(scaler, 'with_mean', True) and scaler.mean_ is not None else np.zeros(width)
+            scale = scaler.scale_ if getattr(scaler, 'with_std', True) and scaler.scale_ is not None else np.ones(width)
+            self._mean = np.asarray(mean, dtype=np.float64)
+            self._scale = np.asarray(scale, dtype=np.float64)
+
+    def _validate(self, booster):
+        if booster is not None and booster.feature_names is not None:
+            if list(booster.feature_names) != self.feature_names:
+                raise ValueError(
+                    f"Model expects features {list(booster.feature_names)}, pipeline provides {self.feature_names}"
+                )
+        if self.scaler is None:
+            return
+        fitted = getattr(self.scaler, 'feature_names_in_', None)
+        if fitted is not None and list(fitted) != self.feature_names:
+            raise ValueError(f"Scaler was fitted on {list(fitted)}, pipeline provides {self.feature_names}")
+        if getattr(self.scaler, 'n_features_in_', len(self.feature_names)) != len(self.feature_names):
+            raise ValueError(
+                f"Scaler expects {self.scaler.n_features_in_} features, pipeline provides {len(self.feature_names)}"
+            )
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        """Select, fill and scale the feature columns of ``df`` as one float32 block."""
+        matrix = df.reindex(columns=self.feature_names, fill_value=0.0).to_numpy(dtype=np.float64)
+        # to_numpy() can hand back a read-only view (e.g. of a memory-mapped table)
+        matrix = np.nan_to_num(matrix, nan=0.0, copy=not matrix.flags.writeable)
+        if self._scale is not None:
+            matrix -= self._mean
+            matrix /= self._scale
+        elif self.scaler is not None:
+            frame = pd.DataFrame(matrix, columns=self.feature_names, copy=False)
+            matrix = self.scaler.transform(frame)
+        return np.asarray(matrix, dtype=np.float32)
+
+    def transform_records(self, records: list) -> np.ndarray:
+        """Same as transform() for a list of ``{feature: value}`` dicts."""
+        return self.transform(pd.DataFrame.from_records(records, columns=self.feature_names))
+
+    def predict(self, booster, df: pd.DataFrame) -> np.ndarray:
+        """Probabilities for every row of ``df``, one booster call per block of rows."""
+        if len(df) <= BLOCK_ROWS:
+            return predict_scores(booster, self.transform(df), self.feature_names)
+        return np.concatenate([
+            predict_scores(booster, self.transform(df.iloc[start:start + BLOCK_ROWS]), self.feature_names)
+            for start in range(0, len(df), BLOCK_ROWS)
+        ])
+
+
+def predict_scores(booster, matrix: np.ndarray, feature_names: list) -> np.ndarray:
+    """Score a prepared feature block with a single call.
+
+    ``booster`` is an ``xgb.Booster`` or a ``tree_engine.TreeEnsemble``.
+    """
+    if len(matrix) == 0:
+        return np.empty(0, dtype=np.float64)
+    if hasattr(booster, 'predict_matrix'):
+        scores = booster.predict_matrix(matrix).astype(np.float64)
+    else:
+        dmatrix = xgb.DMatrix(matrix, feature_names=feature_names)
+        scores = booster.predict(dmatrix).astype(np.float64)
+    # Ensure scores are between 0 and 1 (might be raw margins)
+    raw = (scores < 0) | (scores > 1)
+    if raw.any():
+        scores[raw] = 1 / (1 + np.exp(-scores[raw]))  # Sigmoid
+    return scores
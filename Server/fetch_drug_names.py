@@ -1,34 +1,42 @@
 """
 Fetch drug names from ChEMBL API and save to CSV.
 This only needs to run once to create the mapping file.
+
+Lookups are batched (molecule/set), run concurrently and rate-limited through
+name_resolver. Progress is checkpointed to the output file, so rerunning after
+an interruption only fetches the drugs that are still missing.
 """
 import csv
-import requests
-import time
 from pathlib import Path
 
+from name_resolver import DRUG_BATCH_SIZE, fetch_drug_names, resolve_all
+
 # Read all drug IDs from training data
 drugs_file = Path(__file__).parent / "checkpoints" / "drugs_list.csv"
 output_file = Path(__file__).parent / "checkpoints" / "drug_names.csv"
 
-def fetch_drug_name(chembl_id):
-    """Fetch drug name from ChEMBL API."""
-    try:
-        url = f"https://www.ebi.ac.uk/chembl/api/data/molecule/{chembl_id}.json"
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            # Try different name fields in order of preference
-            name = data.get('pref_name') or data.get('molecule_synonyms', [{}])[0].get('molecule_synonym') if data.get('molecule_synonyms') else None
-            if not name and data.get('molecule_synonyms'):
-                for syn in data['molecule_synonyms']:
-                    if syn.get('molecule_synonym'):
-                        name = syn['molecule_synonym']
-                        break
-            return name
-    except Exception as e:
-        print(f"Error fetching {chembl_id}: {e}")
-    return None
+
+def load_existing_names():
+    """Names already fetched by a previous (possibly interrupted) run."""
+    names = {}
+    if output_file.exists():
+        with open(output_file, 'r') as f:
+            for row in csv.DictReader(f):
+                # IDs saved as their own name were not found; try them again
+                if row['drug_name'] and row['drug_name'] != row['drug_id']:
+                    names[row['drug_id']] = row['drug_name']
+    return names
+
+
+def save_names(drug_ids, drug_names):
+    tmp_file = output_file.with_name(output_file.name + '.tmp')
+    with open(tmp_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['drug_id', 'drug_name'])
+        for drug_id in drug_ids:
+            writer.writerow([drug_id, drug_names.get(drug_id, drug_id)])  # Fallback to ID
+    tmp_file.replace(output_file)
+
 
 def main():
     # Read drug IDs
@@ -38,32 +46,18 @@ def main():
         for row in reader:
             drug_ids.append(row['drug_id'])
     
-    print(f"Found {len(drug_ids)} drugs to look up")
+    existing = load_existing_names()
+    print(f"Found {len(drug_ids)} drugs to look up ({len(existing)} already named)")
     
     # Fetch names
-    drug_names = {}
-    for i, drug_id in enumerate(drug_ids):
-        if (i + 1) % 50 == 0:
-            print(f"Progress: {i+1}/{len(drug_ids)}")
-        
-        name = fetch_drug_name(drug_id)
-        if name:
-            drug_names[drug_id] = name
-            print(f"  {drug_id} -> {name}")
-        else:
-            drug_names[drug_id] = drug_id  # Fallback to ID
-        
-        # Rate limiting
-        time.sleep(0.1)
-    
-    # Save to CSV
-    with open(output_file, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['drug_id', 'drug_name'])
-        for drug_id, name in drug_names.items():
-            writer.writerow([drug_id, name])
+    drug_names = resolve_all(
+        drug_ids, fetch_drug_names, DRUG_BATCH_SIZE,
+        known=existing,
+        checkpoint=lambda names: save_names(drug_ids, names)
+    )
     
-    print(f"\nSaved {len(drug_names)} drug names to {output_file}")
+    found = sum(1 for drug_id in drug_ids if drug_id in drug_names)
+    print(f"\nSaved {len(drug_ids)} drug names ({found} resolved) to {output_file}")
 
 if __name__ == '__main__':
     main()
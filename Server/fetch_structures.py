@@ -0,0 +1,53 @@
+"""
+Prefetch the molecule structures of every drug in drugs_list.csv into the
+disk cache /api/molecule serves from (see molecule_store.py).
+
+Molfiles are fetched in batches (molecule/set), concurrently and rate-limited
+through name_resolver. Drugs already cached are skipped, so rerunning after an
+interruption only fetches what is still missing:
+    python fetch_structures.py
+"""
+import csv
+from pathlib import Path
+
+from molecule_store import MISSING, MoleculeStore, fetch_molfiles, parse_molfile
+from name_resolver import DRUG_BATCH_SIZE, resolve_all
+
+drugs_file = Path(__file__).parent / "checkpoints" / "drugs_list.csv"
+
+
+def main():
+    store = MoleculeStore()
+
+    drug_ids = []
+    with open(drugs_file, 'r') as f:
+        for row in csv.DictReader(f):
+            drug_ids.append(row['drug_id'])
+
+    cached = store.cached_ids()
+    print(f"Found {len(drug_ids)} drugs ({len(cached & set(drug_ids))} already cached in {store.cache_dir})")
+
+    def fetch_batch(batch, session):
+        molfiles = fetch_molfiles(batch, session)
+        for drug_id in batch:
+            store.save(drug_id, molfiles.get(drug_id))
+        return {drug_id: True for drug_id in molfiles}
+
+    resolve_all(drug_ids, fetch_batch, DRUG_BATCH_SIZE, known=dict.fromkeys(cached, True))
+
+    found = missing = unreadable = 0
+    for drug_id in drug_ids:
+        molfile = store.read(drug_id)
+        if molfile is None or molfile is MISSING:
+            missing += 1
+            continue
+        try:
+            parse_molfile(molfile)
+            found += 1
+        except ValueError:
+            unreadable += 1
+    print(f"\nCached {found} structures ({missing} drugs without one, {unreadable} unreadable) in {store.cache_dir}")
+
+
+if __name__ == '__main__':
+    main()
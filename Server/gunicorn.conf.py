@@ -0,0 +1,37 @@
+"""
+Gunicorn settings for the prediction API.
+
+    gunicorn -c gunicorn.conf.py
+
+The app is preloaded in the master process, so the models and pair tables are
+loaded once and shared copy-on-write (memory-mapped tables are shared outright)
+by the forked workers. Override the defaults with environment variables:
+    BIND, WEB_CONCURRENCY (workers), GUNICORN_THREADS, GUNICORN_TIMEOUT
+"""
+
+import gc
+import multiprocessing
+import os
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Load the models once in the master instead of once per worker
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the collector's reach, so garbage
+    # collection in the workers doesn't touch (and un-share) those pages
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Start the worker's background threads now, not on its first request, so
+    # an idle worker still follows reloads published by the others and its
+    # response cache is warm before traffic arrives
+    from app import start_background_threads
+    start_background_threads()
@@ -0,0 +1,173 @@
+"""
+Request and stage timings, exposed in Prometheus text format at /api/metrics.
+
+The hot paths wrap their stages (filter, feature extraction, name lookups,
+predict, building the response, serialization) in ``stage('name')``; the
+timing is recorded per endpoint and stage in a fixed-bucket histogram. Whole
+requests, name lookups (static map / cache / miss), response cache results,
+molecule structure lookups and calls to external services are recorded too.
+
+Metrics are kept per process: under gunicorn each worker reports its own
+numbers. Set METRICS_ENABLED=0 to turn recording off; the helpers then return
+straight away and /api/metrics is not registered.
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from flask import Response, g, has_request_context, request
+
+ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PREFIX = 'drug_repurposing_'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ''
+    pairs = (f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return '{' + ','.join(pairs) + '}'
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name, self.help, self.labels = PREFIX + name, help_text, labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, values)} {total}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name, self.help, self.labels = PREFIX + name, help_text, labels
+        self._series = {}  # label values -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *label_values):
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(BUCKETS) + 1), 0.0]
+            series[0][bucket] += 1
+            series[1] += seconds
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for values, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), counts):
+                    cumulative += count
+                    labels = _format_labels(self.labels + ('le',), values + (bound,))
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                labels = _format_labels(self.labels, values)
+                lines.append(f'{self.name}_sum{labels} {total}')
+                lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+REQUEST_SECONDS = Histogram('request_seconds', 'Request latency by endpoint and status', ('endpoint', 'status'))
+STAGE_SECONDS = Histogram('stage_seconds', 'Time spent in each stage of an endpoint', ('endpoint', 'stage'))
+NAME_LOOKUPS = Counter('name_lookups_total', 'Drug/disease name lookups by where the name came from', ('kind', 'source'))
+RESPONSE_CACHE = Counter('response_cache_total', 'Prediction response cache lookups', ('endpoint', 'result'))
+EXTERNAL_CALLS = Counter('external_calls_total', 'Calls to external services', ('service', 'outcome'))
+EXTERNAL_SECONDS = Histogram('external_call_seconds', 'Latency of calls to external services', ('service',))
+MOLECULE_CACHE = Counter('molecule_cache_total', 'Molecule structure lookups by where the structure came from', ('source',))
+
+_ALL = [REQUEST_SECONDS, STAGE_SECONDS, NAME_LOOKUPS, RESPONSE_CACHE, EXTERNAL_CALLS, EXTERNAL_SECONDS,
+        MOLECULE_CACHE]
+
+
+def _endpoint() -> str:
+    return (request.endpoint or 'unknown') if has_request_context() else 'startup'
+
+
+@contextmanager
+def _timed_stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, _endpoint(), name)
+
+
+def stage(name: str):
+    """Context manager timing one stage of the current endpoint."""
+    if not ENABLED:
+        return nullcontext()
+    return _timed_stage(name)
+
+
+@contextmanager
+def _timed_call(service: str):
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        EXTERNAL_SECONDS.observe(time.perf_counter() - start, service)
+        EXTERNAL_CALLS.inc(service, outcome)
+
+
+def external_call(service: str):
+    """Context manager counting and timing one call to an external service."""
+    if not ENABLED:
+        return nullcontext()
+    return _timed_call(service)
+
+
+def count(counter: Counter, *label_values):
+    if ENABLED:
+        counter.inc(*label_values)
+
+
+def render() -> str:
+    lines = []
+    for metric in _ALL:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app):
+    """Time every request and serve the metrics at /api/metrics."""
+    if not ENABLED:
+        return
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            REQUEST_SECONDS.observe(time.perf_counter() - start, _endpoint(), response.status_code)
+        return response
+
+    @app.route('/api/metrics', methods=['GET'])
+    def get_metrics():
+        """Prometheus text exposition of this process's metrics."""
+        return Response(render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,248 @@
+"""
+Hot reloading of the models, tables and derived caches.
+
+Everything the endpoints read (every loaded model with its pipeline, pair
+table and scores, see model_registry.py; the catalogs) lives in one immutable
+ModelBundle. The server holds a single reference to the current bundle; a
+reload builds a complete new bundle in the background and replaces that
+reference in one assignment. A request pins the bundle it started with, so
+in-flight requests finish on the old bundle while new ones get the new one.
+Nothing is ever mutated in place: updates go through ``replace()``.
+
+Reloads are triggered by ``POST /api/admin/reload`` or, when
+RELOAD_WATCH_INTERVAL is set, by FileWatcher noticing that a watched file
+(model, scaler, feature tables, name caches) changed. Only one reload runs at
+a time; a trigger arriving during a reload is coalesced into one follow-up.
+
+Under gunicorn each worker holds (and reloads) its own bundle. File watching
+reaches every worker, and so does the admin endpoint: the worker serving it
+publishes the reload through ReloadBroadcast's generation file, which every
+worker polls. After a reload the new tables are no longer shared
+copy-on-write with the master.
+"""
+
+import json
+import os
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from process_thread import ProcessThread
+
+# Environment: seconds between file checks (0 disables watching)
+WATCH_INTERVAL = float(os.environ.get('RELOAD_WATCH_INTERVAL', 0))
+# Environment: seconds between checks for reloads published by other workers (0 disables)
+POLL_INTERVAL = float(os.environ.get('RELOAD_POLL_INTERVAL', 1))
+
+
+class ModelBundle:
+    """Immutable set of references to everything the endpoints read."""
+
+    __slots__ = (
+        # Loaded models by name (model_registry.ServedModel)
+        'models',
+        # Derived caches of the catalog model's dataset
+        'disease_catalog', 'drug_catalog',
+    )
+
+    def __init__(self, **parts):
+        unknown = set(parts) - set(self.__slots__)
+        if unknown:
+            raise TypeError(f"Unknown bundle parts: {sorted(unknown)}")
+        for name in self.__slots__:
+            object.__setattr__(self, name, parts.get(name))
+        if self.models is None:
+            object.__setattr__(self, 'models', {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ModelBundle is immutable; use replace()")
+
+    def parts(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def replace(self, **changes) -> 'ModelBundle':
+        """A new bundle with ``changes`` applied."""
+        return ModelBundle(**{**self.parts(), **changes})
+
+
+class BundleHolder:
+    """The current bundle. Readers just read ``current``; writers swap it under a lock."""
+
+    def __init__(self):
+        self.current = ModelBundle()
+        self._lock = threading.Lock()
+
+    def update(self, **parts) -> ModelBundle:
+        """Swap in the current bundle with ``parts`` replaced."""
+        with self._lock:
+            self.current = self.current.replace(**parts)
+            return self.current
+
+    def update_model(self, model) -> ModelBundle:
+        """Swap in the current bundle with ``model`` replacing the model of its name."""
+        with self._lock:
+            self.current = self.current.replace(models={**self.current.models, model.name: model})
+            return self.current
+
+    def update_if_current(self, bundle: ModelBundle, **parts) -> bool:
+        """Like update(), unless ``bundle`` has been replaced in the meantime."""
+        with self._lock:
+            if self.current is not bundle:
+                return False
+            self.current = bundle.replace(**parts)
+            return True
+
+    def swap(self, bundle: ModelBundle):
+        with self._lock:
+            self.current = bundle
+
+
+def file_stamp(paths) -> tuple:
+    """Cheap change detector: (path, size, mtime) of each existing file."""
+    stamp = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stamp.append((str(path), None, None))
+            continue
+        stamp.append((str(path), stat.st_size, stat.st_mtime_ns))
+    return tuple(stamp)
+
+
+class Reloader:
+    """Runs ``reload(force)`` on a background thread, one reload at a time.
+
+    ``reload`` returns a summary dict (e.g. what changed), which is kept for
+    the status endpoint along with the timings or the error.
+    """
+
+    def __init__(self, reload):
+        self.reload = reload
+        self._lock = threading.Lock()
+        self._thread = None
+        self._queued = None  # force flag of a coalesced follow-up reload
+        self.last = None
+        self.count = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def trigger(self, reason: str, force: bool = False) -> threading.Thread:
+        """Start a reload (or queue one behind the running reload); returns its thread."""
+        with self._lock:
+            if self.running:
+                self._queued = bool(self._queued) or force
+                return self._thread
+            self._thread = threading.Thread(target=self._run, args=(reason, force), name='reload', daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def _run(self, reason: str, force: bool):
+        while True:
+            print(f"→ Reloading ({reason})")
+            started = time.time()
+            start = time.perf_counter()
+            status = {'reason': reason, 'force': force, 'started_at': started}
+            try:
+                status.update(self.reload(force))
+                status['status'] = 'ok'
+                print(f"✓ Reloaded in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                status['status'] = 'failed'
+                status['error'] = f"{type(e).__name__}: {e}"
+                print(f"✗ Reload failed, still serving the previous bundle: {status['error']}")
+                traceback.print_exc()
+            status['seconds'] = round(time.perf_counter() - start, 3)
+            with self._lock:
+                self.last = status
+                self.count += 1
+                if self._queued is None:
+                    return
+                reason, force, self._queued = 'queued', self._queued, None
+
+    def status(self) -> dict:
+        return {'running': self.running, 'reloads': self.count, 'last': self.last}
+
+
+class FileWatcher:
+    """Polls the stamps of ``paths()`` and calls ``on_change()`` when they change.
+
+    A change has to hold still for one more interval before it fires, so a
+    file that is still being copied into place doesn't trigger a reload.
+    """
+
+    def __init__(self, paths, on_change, interval: float = WATCH_INTERVAL):
+        self.paths = paths
+        self.on_change = on_change
+        self.interval = interval
+        self._thread = ProcessThread(self._run, 'reload-watcher')
+
+    def ensure_started(self):
+        if self.interval > 0:
+            self._thread.ensure_started()
+
+    def _run(self):
+        seen = file_stamp(self.paths())
+        candidate = None
+        while True:
+            time.sleep(self.interval)
+            stamp = file_stamp(self.paths())
+            if stamp == seen:
+                candidate = None
+            elif stamp == candidate:
+                seen, candidate = stamp, None
+                self.on_change()
+            else:
+                candidate = stamp
+
+
+class ReloadBroadcast:
+    """Fans reloads out to every process serving the app, through a shared generation file.
+
+    publish() writes a new generation to ``path``; each process polls the
+    file (from ensure_started() on) and calls ``on_reload(force)`` for every
+    generation it hasn't seen. A process starts out having seen the
+    generation current when it was created, so a worker forked later from
+    gunicorn's master catches up on the reloads published since.
+    """
+
+    def __init__(self, path, on_reload, interval: float = POLL_INTERVAL):
+        self.path = Path(path)
+        self.on_reload = on_reload
+        self.interval = interval
+        self._seen = self._read()[0]
+        self._thread = ProcessThread(self._run, 'reload-broadcast')
+
+    def _read(self) -> tuple:
+        try:
+            with open(self.path, 'r') as f:
+                published = json.load(f)
+            return published['generation'], bool(published.get('force'))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, False
+
+    def publish(self, force: bool = False) -> str:
+        """Ask every other process to reload; the caller reloads itself."""
+        generation = f"{time.time_ns()}-{os.getpid()}"
+        # Seen before it is visible, so this process's own poll skips it
+        self._seen = generation
+        tmp_path = self.path.with_name(self.path.name + f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'generation': generation, 'force': force}, f)
+        os.replace(tmp_path, self.path)
+        return generation
+
+    def ensure_started(self):
+        if self.interval > 0:
+            self._thread.ensure_started()
+
+    def _run(self):
+        while True:
+            generation, force = self._read()
+            if generation is not None and generation != self._seen:
+                self._seen = generation
+                self.on_reload(force)
+            time.sleep(self.interval)
@@ -0,0 +1,35 @@
+"""
+Where the served models live and the features they read.
+
+Kept apart from app.py so offline tools (batch_score.py, benchmark.py) can
+use them without importing the Flask app.
+"""
+
+from pathlib import Path
+
+# Paths
+CHECKPOINTS_DIR = Path(__file__).parent / "checkpoints"
+API_MODEL_DIR = Path(__file__).parent / "API"
+
+# Feature names (must match the XGBoost model's expected features exactly)
+FEATURE_NAMES = [
+    'genetic_score',
+    'somatic_score_raw',
+    'somatic_score_masked',
+    'max_association_score',
+    'gene_overlap_count',
+    'mean_plddt',
+    'low_confidence_frac'
+]
+
+# Extended feature names for the new API model - must match model's expected features exactly
+# The model was trained on 7 features in this exact order (verified via model.feature_names)
+API_FEATURE_NAMES = [
+    'genetic_score',
+    'somatic_score_raw',
+    'somatic_score_masked',
+    'max_association_score',
+    'gene_overlap_count',
+    'mean_plddt',
+    'low_confidence_frac'
+]
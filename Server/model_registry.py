@@ -0,0 +1,304 @@
+"""
+The models the server can serve, and how each one is loaded.
+
+A model is registered as a ModelSpec: its directory, pair table (and feature
+table, when the features live in a separate file), feature schema and the
+artifact names it loads under. Loading a spec gives a ServedModel, the
+immutable set of everything served for that model:
+
+    booster, scaler, pipeline   the model and its training preprocessing
+    pairs                       the pair table with its features and a score
+                                column
+    scores                      the ScoreMatrix every ranking endpoint reads
+    booster_version             fingerprint of the model files as they loaded
+    version, stamp              fingerprint of the inputs (response and score
+                                caches) and file stamp (hot reloads)
+
+Scores are cached per model next to its files, in pair_scores.parquet and
+score_matrix.npz (see score_store.py and score_matrix.py).
+
+A separate feature table is joined to its pairs once, at load time: each
+feature row names the pair it describes in its ``join_column`` (the row of
+the pair in the pair table). The join is validated, and the joined table is
+laid out grouped by disease (keyed by that column, in pair order within each
+disease), so a disease's rows are one contiguous block of it.
+
+Every model loads in two steps, booster then data, so a model's memory is only
+spent once one of its endpoints is used when its data artifact is lazy (see
+startup.py).
+"""
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from columnar import read_table, source_files, table_exists, table_source
+from features import FeaturePipeline
+import metrics
+from model_bundle import file_stamp
+from score_matrix import ScoreMatrix, load_or_build_matrix
+from score_store import SCORE_COLUMN, fingerprint, load_or_build_scores
+from tree_engine import load_booster
+
+MODEL_FILE = "xgb_temporal_model.json"
+SCALER_FILE = "feature_scaler.joblib"
+
+
+class ModelSpec:
+    """How to load one model and its pair table.
+
+    ``artifacts`` are the names of its (booster, data) startup artifacts;
+    ``join_column`` is the column of ``features_file`` naming the pair row
+    each feature row belongs to.
+    ``fallback(pairs)`` scores the pairs when the booster can't be loaded;
+    without one the model only serves once its booster loads.
+    ``columns`` are the columns its endpoints read from the pair table.
+    """
+
+    def __init__(self, name: str, label: str, directory, pairs_file: str, feature_names: list,
+                 artifacts: tuple, features_file: str = None, join_column: str = 'index',
+                 diseases_file: str = None, fallback=None, columns=(), description: str = ''):
+        self.name = name
+        self.label = label
+        self.directory = directory
+        self.pairs_file = pairs_file
+        self.features_file = features_file
+        self.join_column = join_column
+        self.diseases_file = diseases_file
+        self.feature_names = feature_names
+        self.model_artifact, self.data_artifact = artifacts
+        self.fallback = fallback
+        self.columns = tuple(columns)
+        self.description = description
+
+    @property
+    def artifacts(self) -> tuple:
+        return (self.model_artifact, self.data_artifact)
+
+    def path(self, file_name: str):
+        return self.directory / file_name
+
+    def files(self) -> list:
+        """Files the model is built from (watched for reloads)."""
+        files = [self.path(MODEL_FILE), self.path(SCALER_FILE), *source_files(self.path(self.pairs_file))]
+        if self.features_file:
+            files.extend(source_files(self.path(self.features_file)))
+        if self.diseases_file:
+            files.append(self.path(self.diseases_file))
+        return files
+
+
+class ServedModel:
+    """Immutable set of references to everything loaded for one model."""
+
+    __slots__ = ('spec', 'booster', 'scaler', 'pipeline', 'booster_version', 'pairs', 'scores', 'diseases',
+                 'version', 'stamp')
+
+    def __init__(self, spec: ModelSpec, **parts):
+        unknown = set(parts) - set(self.__slots__)
+        if unknown:
+            raise TypeError(f"Unknown model parts: {sorted(unknown)}")
+        object.__setattr__(self, 'spec', spec)
+        for name in self.__slots__[1:]:
+            object.__setattr__(self, name, parts.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ServedModel is immutable; use replace()")
+
+    def replace(self, **changes) -> 'ServedModel':
+        """A new model with ``changes`` applied."""
+        parts = {name: getattr(self, name) for name in self.__slots__[1:]}
+        return ServedModel(self.spec, **{**parts, **changes})
+
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    @property
+    def serving(self) -> bool:
+        """True if the model's pairs are loaded and scored (by the booster or the fallback)."""
+        return self.scores is not None and (self.booster is not None or self.spec.fallback is not None)
+
+
+def load_model(spec: ModelSpec) -> ServedModel:
+    """Load the booster, scaler and feature pipeline of ``spec``.
+
+    The model files are fingerprinted before and after they are read, and
+    read again if they changed in between, so ``booster_version`` always
+    names the booster that loaded.
+    """
+    booster = scaler = pipeline = None
+    # Taken before reading anything, so a file replaced mid-load triggers another reload
+    stamp = file_stamp(spec.files())
+    booster_version = _model_files_version(spec)
+
+    model_path = spec.path(MODEL_FILE)
+    if model_path.exists():
+        try:
+            booster = load_booster(model_path)
+            print(f"✓ Loaded {spec.name} XGBoost model from {model_path} ({type(booster).__name__})")
+        except Exception as e:
+            print(f"✗ Error loading {spec.name} model: {e}")
+            booster = None
+    else:
+        print(f"✗ {spec.name} model not found at {model_path}")
+
+    scaler_path = spec.path(SCALER_FILE)
+    if scaler_path.exists():
+        scaler = joblib.load(scaler_path)
+        print(f"✓ Loaded {spec.name} scaler from {scaler_path}")
+
+    # Preprocess exactly as in training; a schema mismatch disables the model
+    if booster is not None:
+        try:
+            pipeline = FeaturePipeline(spec.feature_names, scaler, booster)
+        except ValueError as e:
+            print(f"✗ {spec.name} model/feature schema mismatch: {e}")
+            booster = None
+
+    if _model_files_version(spec) != booster_version:
+        print(f"  → {spec.name} model files changed while loading; loading them again")
+        return load_model(spec)
+    return ServedModel(spec, booster=booster, scaler=scaler, pipeline=pipeline,
+                       booster_version=booster_version, stamp=stamp)
+
+
+def _model_files_version(spec: ModelSpec) -> str:
+    return fingerprint(*[path for path in (spec.path(MODEL_FILE), spec.path(SCALER_FILE)) if path.exists()])
+
+
+def load_model_data(model: ServedModel) -> ServedModel:
+    """Load ``model``'s pair table (joined with its features) and score its pairs into a ScoreMatrix."""
+    spec = model.spec
+    pairs = scores = diseases = version = None
+
+    pairs_path = spec.path(spec.pairs_file)
+    if table_exists(pairs_path):
+        pairs = read_table(pairs_path)
+        print(f"✓ Loaded {len(pairs)} {spec.name} pairs from {table_source(pairs_path)}")
+    else:
+        print(f"✗ Pair table not found at {pairs_path}")
+
+    features_path = spec.path(spec.features_file) if spec.features_file else pairs_path
+    if pairs is not None and spec.features_file:
+        if table_exists(features_path):
+            features = read_table(features_path)
+            print(f"✓ Loaded {len(features)} {spec.name} feature rows from {table_source(features_path)}")
+            pairs = join_features(pairs, features, spec.join_column)
+        else:
+            print(f"✗ Feature table not found at {features_path}")
+            pairs = None
+
+    if pairs is not None:
+        missing = [column for column in spec.columns if column not in pairs]
+        if missing:
+            raise ValueError(f"{spec.name} pair table has no {', '.join(missing)} column(s), which its endpoints read")
+
+    if spec.diseases_file and spec.path(spec.diseases_file).exists():
+        diseases = pd.read_csv(spec.path(spec.diseases_file))
+        print(f"✓ Loaded {len(diseases)} diseases")
+
+    if pairs is not None:
+        version = _version(model, pairs_path, features_path)
+        scores = _score_pairs(model, pairs, version)
+        print(f"  → {len(scores.drug_ids)} unique drugs, {len(scores.disease_ids)} unique diseases")
+
+    return model.replace(pairs=pairs, scores=scores, diseases=diseases, version=version)
+
+
+def load_served_model(spec: ModelSpec) -> ServedModel:
+    """Load ``spec`` completely (booster, then data)."""
+    return load_model_data(load_model(spec))
+
+
+def join_features(pairs: pd.DataFrame, features: pd.DataFrame, column: str) -> pd.DataFrame:
+    """One pair-feature table: every feature row next to the pair its ``column`` names.
+
+    Rows are grouped by disease (diseases in order of first appearance,
+    pairs in table order within each), and the frame is indexed by
+    ``column``. Raises ValueError when a feature row names no pair or a pair
+    twice; pairs without a feature row are left out, and reported.
+    """
+    if column not in features:
+        raise ValueError(f"Feature table has no {column!r} column to join it to its pairs")
+    keys = features[column].to_numpy()
+    if not np.issubdtype(keys.dtype, np.integer):
+        if np.isnan(keys.astype(np.float64)).any() or (keys != np.floor(keys)).any():
+            raise ValueError(f"Feature table {column!r} values must be integers")
+        keys = keys.astype(np.int64)
+    if len(keys) and (keys.min() < 0 or keys.max() >= len(pairs)):
+        raise ValueError(f"Feature table {column!r} values must be pair rows (0 to {len(pairs) - 1})")
+    by_pair = np.argsort(keys, kind='stable')
+    pair_rows = keys[by_pair]
+    duplicated = pair_rows[1:][pair_rows[1:] == pair_rows[:-1]]
+    if len(duplicated):
+        raise ValueError(f"{len(duplicated)} pairs have more than one feature row (e.g. {column} {duplicated[0]})")
+
+    missing = len(pairs) - len(pair_rows)
+    if missing:
+        print(f"  → {missing} pairs have no feature row and are not served")
+
+    disease_codes, _ = pd.factorize(pairs['disease_id'])
+    layout = np.argsort(disease_codes[pair_rows], kind='stable')
+    pair_rows, feature_rows = pair_rows[layout], by_pair[layout]
+
+    joined = pd.concat([
+        pairs.iloc[pair_rows].reset_index(drop=True),
+        features.drop(columns=[column]).iloc[feature_rows].reset_index(drop=True),
+    ], axis=1)
+    joined.index = pd.Index(pair_rows, name=column)
+    return joined
+
+
+# Part of the versions of joined tables: bump it when join_features() changes
+# the row order, so score caches stored by row are rebuilt
+JOIN_LAYOUT = 'by-disease-1'
+
+
+def _version(model: ServedModel, pairs_path, features_path) -> str:
+    """Fingerprint of everything the model's scores are computed from.
+
+    The booster counts as the files it was loaded from (not as they are on
+    disk now), and tables by their contents, so the version doesn't change
+    when a table is converted to (or read from) its columnar copy.
+    """
+    parts = [model.booster_version] if model.booster is not None else []
+    if features_path == pairs_path:
+        return fingerprint(parts=parts, tables=[pairs_path])
+    return f"{fingerprint(parts=parts, tables=[pairs_path, features_path])}-{JOIN_LAYOUT}"
+
+
+def score_frame(feature_pipeline: FeaturePipeline, booster, df: pd.DataFrame) -> np.ndarray:
+    """Model scores for every row of ``df``."""
+    with metrics.stage('predict'):
+        return feature_pipeline.predict(booster, df)
+
+
+def _score_pairs(model: ServedModel, pairs: pd.DataFrame, version: str) -> ScoreMatrix:
+    """Score every pair once, in one batch, into the matrix the endpoints rank from.
+
+    The matrix is memory-mapped from score_matrix.npz when it is up to date,
+    and the score column is attached to ``pairs`` (before it is published).
+    """
+    spec = model.spec
+
+    if model.booster is not None:
+        score_fn = lambda: load_or_build_scores(
+            spec.path("pair_scores.parquet"),
+            version,
+            pairs,
+            lambda: score_frame(model.pipeline, model.booster, pairs)
+        )
+    elif spec.fallback is not None:
+        score_fn = lambda: spec.fallback(pairs)
+    else:
+        score_fn = None
+
+    if score_fn is not None:
+        scores = load_or_build_matrix(spec.path("score_matrix.npz"), version, pairs, score_fn)
+    else:
+        # No model: unscored, but the IDs still back the catalogs
+        scores = ScoreMatrix.build(pairs['disease_id'], pairs['chembl_id'], np.full(len(pairs), np.nan))
+
+    pairs[SCORE_COLUMN] = scores.scores_by_row()
+    return scores
@@ -0,0 +1,303 @@
+"""
+Molecule structures for /api/molecule/<chembl_id>.
+
+Structures are ChEMBL molfiles, kept at two levels so a drug click rarely
+leaves the process:
+
+- an in-memory LRU of parsed structures (MOLECULE_CACHE_SIZE entries);
+- the raw molfiles on local disk (MOLECULE_CACHE_DIR/<id>.mol), written
+  atomically, so restarts and the other workers don't fetch them again. IDs
+  ChEMBL has no structure for (most biologics) are remembered as <id>.missing
+  and asked for again after MOLECULE_MISSING_TTL seconds.
+
+Fetches share one pooled HTTP session per process, and concurrent requests
+for the same uncached ID wait for a single fetch.
+
+parse_molfile() reads V2000 and V3000 connection tables with NumPy, slicing
+the fixed-width columns of the whole atom and bond blocks at once, and returns
+compact arrays (symbols, a flat xyz coordinate list, flat bond triples)
+instead of one object per atom.
+
+Fill the disk cache for every drug in drugs_list.csv with:
+    python fetch_structures.py
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from name_resolver import CHEMBL_API_URL
+
+CACHE_DIR = Path(os.environ.get('MOLECULE_CACHE_DIR', Path(__file__).parent / "checkpoints" / "molecules"))
+CACHE_SIZE = int(os.environ.get('MOLECULE_CACHE_SIZE', 1024))
+MISSING_TTL = float(os.environ.get('MOLECULE_MISSING_TTL', 7 * 24 * 3600))
+# Connections kept open to ChEMBL; at least the number of request threads
+POOL_SIZE = int(os.environ.get('MOLECULE_POOL_SIZE', 16))
+
+CHEMBL_ID = re.compile(r'^CHEMBL\d+$')
+
+MISSING = object()  # disk cache entry of an ID without a structure
+
+
+def _fixed_columns(lines: list, width: int) -> np.ndarray:
+    """``lines`` as an (n, width) byte matrix, padded or cut to ``width``."""
+    return np.array(lines, dtype=f'S{width}').view('S1').reshape(len(lines), width)
+
+
+def _field(chars: np.ndarray, start: int, end: int) -> np.ndarray:
+    """The fixed-width field ``[start:end)`` of every row, as byte strings."""
+    return np.ascontiguousarray(chars[:, start:end]).view(f'S{end - start}').ravel()
+
+
+def _v2000_tables(lines: list, counts: str):
+    num_atoms, num_bonds = int(counts[0:3]), int(counts[3:6])
+    atom_lines = lines[4:4 + num_atoms]
+    bond_lines = lines[4 + num_atoms:4 + num_atoms + num_bonds]
+    if len(atom_lines) != num_atoms or len(bond_lines) != num_bonds:
+        raise ValueError("Truncated molfile")
+
+    # xxxxx.xxxxyyyyy.yyyyzzzzz.zzzz aaa ...
+    atoms = _fixed_columns(atom_lines, 34)
+    coords = np.column_stack([_field(atoms, 0, 10), _field(atoms, 10, 20), _field(atoms, 20, 30)])
+    symbols = np.char.strip(_field(atoms, 31, 34))
+    # 111222tttsss ...
+    bonds = _fixed_columns(bond_lines, 9)
+    bond_table = np.column_stack([_field(bonds, 0, 3), _field(bonds, 3, 6), _field(bonds, 6, 9)])
+    return symbols, coords.astype(np.float64), bond_table.astype(np.int64), None
+
+
+def _v3000_block(lines: list, name: str) -> list:
+    """Entries of ``M  V30 BEGIN <name>`` ... ``END <name>``, continuations joined."""
+    try:
+        start = lines.index(f'M  V30 BEGIN {name}')
+        end = lines.index(f'M  V30 END {name}', start)
+    except ValueError:
+        return []
+    entries, pending = [], ''
+    for line in lines[start + 1:end]:
+        text = pending + line[7:]
+        if text.endswith('-'):
+            pending = text[:-1]
+            continue
+        entries.append(text)
+        pending = ''
+    return entries
+
+
+def _v3000_tables(lines: list):
+    lines = [line.rstrip() for line in lines]
+    # Entries are whitespace separated: "index type x y z aamap [key=value ...]"
+    # and "index type atom1 atom2 [key=value ...]"
+    atom_entries = _v3000_block(lines, 'ATOM')
+    bond_entries = _v3000_block(lines, 'BOND')
+    atoms = np.array([entry.split(None, 5)[:5] for entry in atom_entries] or np.empty((0, 5)), dtype=str)
+    bonds = np.array([entry.split(None, 4)[:4] for entry in bond_entries] or np.empty((0, 4)), dtype=str)
+    if atoms.shape[1:] != (5,) or bonds.shape[1:] != (4,):
+        raise ValueError("Malformed V3000 connection table")
+    bond_table = bonds[:, [2, 3, 1]].astype(np.int64)
+    return atoms[:, 1], atoms[:, 2:5].astype(np.float64), bond_table, atoms[:, 0].astype(np.int64)
+
+
+def parse_molfile(molfile: str) -> dict:
+    """Parse a V2000 or V3000 molfile (or the first record of an SDF).
+
+    Returns ``{'symbols': [...], 'coords': [x0, y0, z0, x1, ...],
+    'bonds': [start0, end0, order0, ...]}`` with 0-based atom positions.
+    Bonds to atoms outside the atom block are dropped. Raises ValueError when
+    the connection table can't be read.
+    """
+    lines = molfile.split('$$$$', 1)[0].splitlines()
+    if len(lines) < 4:
+        raise ValueError("Truncated molfile")
+    counts = lines[3]
+    if 'V3000' in counts[33:]:
+        symbols, coords, bond_table, atom_numbers = _v3000_tables(lines)
+    else:
+        symbols, coords, bond_table, atom_numbers = _v2000_tables(lines, counts)
+
+    # Atom references to positions: V2000 numbers atoms 1..n, V3000 by their index field
+    ends = bond_table[:, :2]
+    if atom_numbers is None:
+        positions = ends - 1
+    elif len(atom_numbers):
+        order = np.argsort(atom_numbers, kind='stable')
+        found = order[np.searchsorted(atom_numbers, ends, sorter=order).clip(max=len(order) - 1)]
+        positions = np.where(atom_numbers[found] == ends, found, -1)
+    else:
+        positions = np.full_like(ends, -1)
+    valid = ((positions >= 0) & (positions < len(symbols))).all(axis=1)
+    bond_table = np.column_stack([positions, bond_table[:, 2]])[valid]
+
+    if symbols.dtype.kind == 'S':
+        symbols = symbols.astype(str)
+    return {
+        'symbols': symbols.tolist(),
+        'coords': coords.ravel().tolist(),
+        'bonds': bond_table.ravel().tolist(),
+    }
+
+
+def pooled_session(pool_size: int = POOL_SIZE) -> requests.Session:
+    """A session keeping up to ``pool_size`` connections per host alive."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def fetch_molfile(chembl_id: str, session=None, timeout: float = 10):
+    """The molfile of one molecule from ChEMBL's SDF endpoint; None if it has no structure."""
+    session = session or requests
+    response = session.get(f"{CHEMBL_API_URL}/molecule/{chembl_id}.sdf", timeout=timeout)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.text if response.text.strip() else None
+
+
+def fetch_molfiles(chembl_ids: list, session=None, timeout: float = 30) -> dict:
+    """Molfiles for a batch of ChEMBL IDs with one molecule/set request.
+
+    IDs without a structure (or unknown to ChEMBL) are left out.
+    """
+    session = session or requests
+    url = f"{CHEMBL_API_URL}/molecule/set/{';'.join(chembl_ids)}.json"
+    response = session.get(url, params={'only': 'molecule_chembl_id,molecule_structures'}, timeout=timeout)
+    response.raise_for_status()
+
+    molfiles = {}
+    for molecule in response.json().get('molecules', []):
+        molfile = (molecule.get('molecule_structures') or {}).get('molfile')
+        if molfile and molecule.get('molecule_chembl_id'):
+            molfiles[molecule['molecule_chembl_id']] = molfile
+    return molfiles
+
+
+class MoleculeStore:
+    """ChEMBL ID → parsed structure, through the memory LRU, the disk cache and ChEMBL."""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_entries: int = CACHE_SIZE,
+                 missing_ttl: float = MISSING_TTL):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.missing_ttl = missing_ttl
+        self._memory = OrderedDict()
+        self._fetching = {}  # ID -> Future of the fetch in progress
+        self._lock = threading.Lock()
+        self._session = None
+        self._session_pid = None
+
+    @property
+    def session(self) -> requests.Session:
+        # Pooled connections must not be shared across (gunicorn's) fork
+        if self._session_pid != os.getpid():
+            self._session, self._session_pid = pooled_session(), os.getpid()
+        return self._session
+
+    def get(self, chembl_id: str):
+        """The parsed structure of ``chembl_id``, or None if ChEMBL has none.
+
+        Raises ValueError for IDs that aren't ChEMBL IDs or molfiles that
+        can't be parsed, and requests' exceptions when ChEMBL can't be reached.
+        """
+        if not CHEMBL_ID.match(chembl_id):
+            raise ValueError(f"Not a ChEMBL ID: {chembl_id!r}")
+        with self._lock:
+            structure = self._memory.get(chembl_id)
+            if structure is not None:
+                self._memory.move_to_end(chembl_id)
+        if structure is not None:
+            metrics.count(metrics.MOLECULE_CACHE, 'memory')
+            return structure
+
+        molfile = self.read(chembl_id)
+        if molfile is None:
+            metrics.count(metrics.MOLECULE_CACHE, 'fetch')
+            molfile = self._fetch_once(chembl_id)
+        else:
+            metrics.count(metrics.MOLECULE_CACHE, 'disk')
+        if molfile is MISSING:
+            return None
+
+        structure = parse_molfile(molfile)
+        self._remember(chembl_id, structure)
+        return structure
+
+    def _remember(self, chembl_id: str, structure: dict):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[chembl_id] = structure
+            self._memory.move_to_end(chembl_id)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _fetch_once(self, chembl_id: str):
+        # The first request for an ID fetches it; concurrent ones wait for that fetch
+        with self._lock:
+            future = self._fetching.get(chembl_id)
+            owner = future is None
+            if owner:
+                future = self._fetching[chembl_id] = Future()
+        if not owner:
+            return future.result()
+        try:
+            with metrics.external_call('chembl_sdf'):
+                molfile = fetch_molfile(chembl_id, self.session)
+            self.save(chembl_id, molfile)
+            result = MISSING if molfile is None else molfile
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._fetching[chembl_id]
+
+    def _path(self, chembl_id: str, suffix: str) -> Path:
+        return self.cache_dir / f"{chembl_id}{suffix}"
+
+    def read(self, chembl_id: str):
+        """The cached molfile, MISSING for a fresh no-structure entry, else None."""
+        try:
+            return self._path(chembl_id, '.mol').read_text()
+        except FileNotFoundError:
+            pass
+        try:
+            if time.time() - self._path(chembl_id, '.missing').stat().st_mtime < self.missing_ttl:
+                return MISSING
+        except FileNotFoundError:
+            pass
+        return None
+
+    def save(self, chembl_id: str, molfile):
+        """Write ``molfile`` (None: no structure) to the disk cache atomically."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(chembl_id, '.missing' if molfile is None else '.mol')
+        tmp_path = path.with_name(path.name + f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp_path.write_text(molfile or '')
+        os.replace(tmp_path, path)
+        if molfile is not None:
+            self._path(chembl_id, '.missing').unlink(missing_ok=True)
+
+    def cached_ids(self) -> set:
+        """IDs the disk cache can answer without asking ChEMBL."""
+        if not self.cache_dir.exists():
+            return set()
+        return {chembl_id for chembl_id in (p.name.split('.', 1)[0] for p in self.cache_dir.iterdir())
+                if self.read(chembl_id) is not None}
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
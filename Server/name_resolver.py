@@ -0,0 +1,327 @@
+"""
+Drug and disease name lookups against ChEMBL and OpenTargets.
+
+Shared by the server and the fetch_*_names.py scripts. Lookups always go
+through the batch endpoints (ChEMBL molecule/set, OpenTargets diseases(efoIds:)),
+a token-bucket rate limit and retry with exponential backoff.
+
+- resolve_all() refreshes a whole name cache with a bounded thread pool and
+  periodic checkpoints, so an interrupted run resumes where it stopped.
+- Request handlers never call the services directly: they read names from the
+  in-memory caches and hand unknown IDs to a BackgroundResolver, which batches
+  and dedupes the lookups on a worker thread and reports the results back so
+  they can be cached and persisted.
+
+The service URLs can be overridden with CHEMBL_API_URL and OPENTARGETS_API_URL,
+e.g. to point tests at the local stand-in in name_stub_server.py.
+"""
+
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
+
+import requests
+
+from process_thread import ProcessThread
+
+CHEMBL_API_URL = os.environ.get('CHEMBL_API_URL', 'https://www.ebi.ac.uk/chembl/api/data')
+OPENTARGETS_API_URL = os.environ.get('OPENTARGETS_API_URL', 'https://api.platform.opentargets.org/api/v4/graphql')
+
+# Largest batch each service accepts comfortably in one request
+DRUG_BATCH_SIZE = 50
+DISEASE_BATCH_SIZE = 100
+
+# OpenTargets disease IDs: ontology prefix and local ID (EFO_0000270, MONDO_0004975, Orphanet_558, ...)
+DISEASE_ID = re.compile(r'^[A-Za-z][A-Za-z0-9]*_[A-Za-z0-9]+$')
+
+# Seconds before an ID a service didn't know, or whose lookup failed, is tried again
+UNRESOLVABLE_TTL = 24 * 3600
+FAILED_TTL = 300
+
+DISEASE_NAMES_QUERY = """
+query diseaseNames($ids: [String!]!) {
+    diseases(efoIds: $ids) {
+        id
+        name
+    }
+}
+"""
+
+DISEASE_NAME_QUERY = """
+query diseaseName($id: String!) {
+    disease(efoId: $id) {
+        id
+        name
+    }
+}
+"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: on average ``rate`` acquisitions per second."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def with_retries(fn, attempts: int = 4, backoff: float = 0.5):
+    """Call ``fn()``, retrying failures with exponential backoff and jitter."""
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except requests.RequestException:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(backoff * (2 ** attempt) * (1 + random.random()))
+
+
+def pick_drug_name(molecule: dict):
+    """Choose a display name from a ChEMBL molecule record."""
+    # Try pref_name first (most common)
+    name = molecule.get('pref_name')
+    if name:
+        return name
+    # Try molecule synonyms
+    synonyms = molecule.get('molecule_synonyms') or []
+    if synonyms:
+        # Prefer INN or USAN names
+        for syn in synonyms:
+            syn_type = (syn.get('syn_type') or '').upper()
+            if syn_type in ('INN', 'USAN', 'BAN') and syn.get('molecule_synonym'):
+                return syn['molecule_synonym']
+        # Fall back to any synonym
+        for syn in synonyms:
+            if syn.get('molecule_synonym'):
+                return syn['molecule_synonym']
+    return None
+
+
+def fetch_drug_names(drug_ids: list, session=None, timeout: float = 10) -> dict:
+    """Fetch names for a batch of ChEMBL IDs with one molecule/set request."""
+    session = session or requests
+    url = f"{CHEMBL_API_URL}/molecule/set/{';'.join(quote(drug_id, safe='') for drug_id in drug_ids)}.json"
+    response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+
+    names = {}
+    for molecule in response.json().get('molecules', []):
+        name = pick_drug_name(molecule)
+        if name and molecule.get('molecule_chembl_id'):
+            names[molecule['molecule_chembl_id']] = name
+    return names
+
+
+def fetch_disease_names(disease_ids: list, session=None, timeout: float = 30) -> dict:
+    """Fetch names for a batch of disease IDs with one OpenTargets GraphQL query."""
+    session = session or requests
+    response = session.post(
+        OPENTARGETS_API_URL,
+        json={"query": DISEASE_NAMES_QUERY, "variables": {"ids": disease_ids}},
+        headers={"Content-Type": "application/json"},
+        timeout=timeout
+    )
+    response.raise_for_status()
+
+    diseases = (response.json().get('data') or {}).get('diseases') or []
+    return {d['id']: d['name'] for d in diseases if d and d.get('name')}
+
+
+def fetch_disease_name_single(disease_ids: list, session=None, timeout: float = 10) -> dict:
+    """Look diseases up one ``disease(efoId:)`` query at a time.
+
+    Fallback for IDs the batch query doesn't return; same signature as the
+    batch fetchers so it can be used with resolve_all(batch_size=1).
+    """
+    session = session or requests
+    names = {}
+    for disease_id in disease_ids:
+        response = session.post(
+            OPENTARGETS_API_URL,
+            json={"query": DISEASE_NAME_QUERY, "variables": {"id": disease_id}},
+            headers={"Content-Type": "application/json"},
+            timeout=timeout
+        )
+        response.raise_for_status()
+        disease = (response.json().get('data') or {}).get('disease')
+        if disease and disease.get('name'):
+            names[disease_id] = disease['name']
+    return names
+
+
+def resolve_all(ids, fetch_batch, batch_size: int, known: dict = None, workers: int = 8,
+                rate: float = 5.0, checkpoint=None, checkpoint_every: int = 10) -> dict:
+    """Resolve every ID not already in ``known`` and return all names.
+
+    Batches run on a pool of ``workers`` threads, limited to ``rate`` requests
+    per second overall, each retried with backoff. ``checkpoint(names)`` is
+    called every ``checkpoint_every`` completed batches (and at the end) so an
+    interrupted refresh can resume from the saved names.
+    """
+    names = dict(known or {})
+    missing = list(dict.fromkeys(i for i in ids if i not in names))
+    batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+    if not batches:
+        return names
+
+    bucket = TokenBucket(rate)
+    local = threading.local()
+
+    def run(batch):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+
+        def call():
+            bucket.acquire()
+            return fetch_batch(batch, local.session)
+        return with_retries(call)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run, batch): batch for batch in batches}
+        for done, future in enumerate(as_completed(futures), 1):
+            batch = futures[future]
+            try:
+                found = future.result()
+            except Exception as e:
+                print(f"Warning: Batch of {len(batch)} failed after retries: {e}")
+                found = {}
+            names.update(found)
+            print(f"  Progress: {done}/{len(batches)} batches | Batch success: {len(found)}/{len(batch)}")
+            if checkpoint and done % checkpoint_every == 0:
+                checkpoint(names)
+
+    if checkpoint:
+        checkpoint(names)
+    return names
+
+
+class BackgroundResolver:
+    """Resolve IDs on a background thread, in deduplicated, rate-limited batches.
+
+    Used by the server so request handlers never wait on a name service.
+
+    ``fetch_batch(ids, session)`` returns a dict of the IDs it could resolve;
+    ``on_resolved(names)`` is called with each non-empty result, and
+    ``on_flush()`` once the queue has drained after names were resolved, for
+    work that should run once per burst of lookups rather than per batch.
+    IDs failing ``valid(id)`` are never queued. IDs a service doesn't know
+    (or whose batch failed) are not looked up again for UNRESOLVABLE_TTL
+    (FAILED_TTL) seconds; at most ``max_unresolvable`` are remembered.
+    """
+
+    def __init__(self, fetch_batch, on_resolved, batch_size: int,
+                 rate: float = 1.0, max_pending: int = 10000, on_flush=None, valid=None,
+                 max_unresolvable: int = 100000):
+        self.fetch_batch = fetch_batch
+        self.on_resolved = on_resolved
+        self.on_flush = on_flush
+        self.valid = valid
+        self.batch_size = batch_size
+        self.rate = rate
+        self.max_pending = max_pending
+        self.max_unresolvable = max_unresolvable
+        # ID -> time.monotonic() it may be tried again, oldest first
+        self._unresolvable = OrderedDict()
+        self._thread = ProcessThread(self._run, 'name-resolver', setup=self._setup)
+
+    def _setup(self):
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._session = requests.Session()
+        self._bucket = TokenBucket(self.rate, capacity=1)
+
+    def submit(self, key: str):
+        """Queue ``key`` for lookup; cheap and non-blocking."""
+        if self.valid is not None and not self.valid(key):
+            return
+        retry_at = self._unresolvable.get(key)
+        if retry_at is not None:
+            if retry_at > time.monotonic():
+                return
+            self._unresolvable.pop(key, None)
+        self._thread.ensure_started()
+        with self._lock:
+            if key in self._pending or len(self._pending) >= self.max_pending:
+                return
+            self._pending.add(key)
+        self._queue.put(key)
+
+    def _remember_unresolvable(self, keys, ttl: float):
+        retry_at = time.monotonic() + ttl
+        for key in keys:
+            self._unresolvable[key] = retry_at
+            self._unresolvable.move_to_end(key)
+        while len(self._unresolvable) > self.max_unresolvable:
+            self._unresolvable.popitem(last=False)
+
+    def pending(self) -> int:
+        """Number of IDs waiting to be looked up."""
+        return len(self._pending) if self._thread.started else 0
+
+    def _next_batch(self) -> list:
+        batch = [self._queue.get()]
+        # Give a burst of submissions (one response's worth of IDs) a moment to arrive
+        deadline = time.monotonic() + 0.05
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        resolved = False
+        while True:
+            batch = self._next_batch()
+
+            def call():
+                self._bucket.acquire()
+                return self.fetch_batch(batch, self._session)
+
+            try:
+                names = with_retries(call)
+            except Exception as e:
+                print(f"Warning: Name lookup failed for {len(batch)} IDs: {e}")
+                self._remember_unresolvable(batch, FAILED_TTL)
+                names = None
+
+            if names is not None:
+                self._remember_unresolvable([key for key in batch if key not in names], UNRESOLVABLE_TTL)
+                if names:
+                    try:
+                        self.on_resolved(names)
+                        resolved = True
+                    except Exception as e:
+                        print(f"Warning: Could not store resolved names: {e}")
+            with self._lock:
+                self._pending.difference_update(batch)
+
+            if resolved and self.on_flush is not None and self._queue.empty():
+                resolved = False
+                try:
+                    self.on_flush()
+                except Exception as e:
+                    print(f"Warning: Could not publish resolved names: {e}")
@@ -0,0 +1,168 @@
+"""
+Persistent drug/disease name store.
+
+Resolved names are kept in a SQLite database (one table per kind) instead of
+rewriting a whole JSON file on every save:
+
+- writes are single-row upserts in one short transaction, so they cost O(1)
+  per name however large the cache gets;
+- SQLite's file locking (in WAL mode) lets several server workers and the
+  fetch scripts write concurrently without lost updates or torn files;
+- the JSON caches produced by fetch_*_names.py are imported whenever they
+  change, filling in IDs without a name, and export_json() writes an atomic
+  JSON snapshot back out.
+
+Export the stores to their JSON files with:
+    python name_store.py
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+CHECKPOINTS_DIR = Path(__file__).parent / "checkpoints"
+# NAME_STORE_DB points the server and scripts at another database (e.g. for benchmarks)
+DEFAULT_DB = Path(os.environ.get('NAME_STORE_DB', CHECKPOINTS_DIR / "names.sqlite3"))
+
+_SQLITE_MAX_VARIABLES = 500
+
+
+class NameStore:
+    """ID → name map persisted in one table of a SQLite database.
+
+    ``seed_files`` are JSON caches imported on ``load()`` whenever their size
+    or modification time changed. They only add IDs the store has no name
+    for, so a re-imported file never overwrites names already resolved;
+    among files imported together, later files win on conflicting IDs.
+    """
+
+    def __init__(self, table: str, db_path: Path = DEFAULT_DB, seed_files=()):
+        self.table = table
+        self.db_path = Path(db_path)
+        self.seed_files = [Path(p) for p in seed_files]
+        self._local = threading.local()
+        self._last_rowid = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and process; sqlite connections survive neither
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {self.table} (id TEXT PRIMARY KEY, name TEXT NOT NULL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS seed_files (path TEXT PRIMARY KEY, stamp TEXT NOT NULL)')
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def put_many(self, names: dict):
+        """Insert or update names in a single transaction."""
+        if not names:
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # Delete + insert (rather than UPDATE) gives changed rows a new rowid
+            conn.executemany(f'INSERT OR REPLACE INTO {self.table} (id, name) VALUES (?, ?)', names.items())
+
+    def get_many(self, ids) -> dict:
+        """Stored names for the given IDs (unknown IDs are left out)."""
+        ids = list(ids)
+        conn = self._connect()
+        names = {}
+        for i in range(0, len(ids), _SQLITE_MAX_VARIABLES):
+            chunk = ids[i:i + _SQLITE_MAX_VARIABLES]
+            placeholders = ','.join('?' * len(chunk))
+            names.update(conn.execute(
+                f'SELECT id, name FROM {self.table} WHERE id IN ({placeholders})', chunk
+            ).fetchall())
+        return names
+
+    def _import_seed_files(self):
+        conn = self._connect()
+        names, stamps = {}, []
+        for path in self.seed_files:
+            if not path.exists():
+                continue
+            stat = path.stat()
+            stamp = f"{stat.st_size}:{stat.st_mtime_ns}"
+            key = f"{self.table}:{path.resolve()}"
+            row = conn.execute('SELECT stamp FROM seed_files WHERE path = ?', (key,)).fetchone()
+            if row and row[0] == stamp:
+                continue
+            try:
+                with open(path, 'r') as f:
+                    seed = json.load(f)
+            except Exception as e:
+                print(f"Warning: Could not import name cache {path}: {e}")
+                continue
+            names.update(seed)
+            stamps.append((key, stamp))
+            print(f"✓ Imported {len(seed)} names from {path}")
+        if not stamps:
+            return
+
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(f'INSERT OR IGNORE INTO {self.table} (id, name) VALUES (?, ?)', names.items())
+            conn.executemany('INSERT OR REPLACE INTO seed_files (path, stamp) VALUES (?, ?)', stamps)
+
+    def load(self) -> dict:
+        """Import changed seed files, then return every stored name."""
+        self._import_seed_files()
+        rows = self._connect().execute(f'SELECT rowid, id, name FROM {self.table}').fetchall()
+        self._last_rowid = max((r[0] for r in rows), default=0)
+        return {r[1]: r[2] for r in rows}
+
+    def updates(self) -> dict:
+        """Names written (by any process) since the last load() or updates() call."""
+        rows = self._connect().execute(
+            f'SELECT rowid, id, name FROM {self.table} WHERE rowid > ?', (self._last_rowid,)
+        ).fetchall()
+        if rows:
+            self._last_rowid = max(r[0] for r in rows)
+        return {r[1]: r[2] for r in rows}
+
+    def export_json(self, path: Path):
+        """Write every stored name to ``path`` atomically."""
+        rows = self._connect().execute(f'SELECT id, name FROM {self.table}').fetchall()
+        tmp_path = Path(path).with_name(Path(path).name + f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(dict(rows), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        # Don't re-import our own snapshot on the next load()
+        stat = Path(path).stat()
+        self._connect().execute('INSERT OR REPLACE INTO seed_files (path, stamp) VALUES (?, ?)', (
+            f"{self.table}:{Path(path).resolve()}", f"{stat.st_size}:{stat.st_mtime_ns}"
+        ))
+        return len(rows)
+
+
+def drug_name_store(db_path: Path = DEFAULT_DB) -> NameStore:
+    return NameStore('drug_names', db_path, [CHECKPOINTS_DIR / "drug_names_cache.json"])
+
+
+def disease_name_store(db_path: Path = DEFAULT_DB) -> NameStore:
+    # Both JSON caches feed the store; imported together, the full cache wins on conflicts
+    return NameStore('disease_names', db_path, [
+        CHECKPOINTS_DIR / "disease_names_cache.json",
+        CHECKPOINTS_DIR / "disease_names_full_cache.json",
+    ])
+
+
+def main():
+    for store in (drug_name_store(), disease_name_store()):
+        store.load()
+        target = store.seed_files[-1]
+        count = store.export_json(target)
+        print(f"✓ Exported {count} {store.table.replace('_', ' ')} to {target}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Local stand-in for the ChEMBL and OpenTargets name lookups.
+
+Serves the endpoints name_resolver.py and molecule_store.py use, from
+in-memory name and molfile maps, so tests and benchmarks can run without
+touching the real services:
+
+    python name_stub_server.py --port 8765
+    CHEMBL_API_URL=http://localhost:8765/chembl \\
+    OPENTARGETS_API_URL=http://localhost:8765/opentargets/graphql python app.py
+
+By default every ID resolves to a synthetic name and structure; pass name or
+molfile maps to start_stub_server() to control which IDs are known.
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+# Ethanol, heavy atoms only
+SYNTHETIC_MOLFILE = """{name}
+  stub
+
+  3  2  0  0  0  0  0  0  0  0999 V2000
+   -0.8883    0.1670    0.0000 C   0  0  0  0  0  0  0  0  0  0  0  0
+    0.4658   -0.5116    0.0000 C   0  0  0  0  0  0  0  0  0  0  0  0
+    1.4225    0.3447    0.0000 O   0  0  0  0  0  0  0  0  0  0  0  0
+  1  2  1  0
+  2  3  1  0
+M  END
+"""
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    drug_names = None
+    disease_names = None
+    molfiles = None
+
+    def _lookup(self, names, key, prefix):
+        if names is None:
+            return f"{prefix} {key}"
+        return names.get(key)
+
+    def _molfile(self, chembl_id):
+        if self.molfiles is None:
+            return SYNTHETIC_MOLFILE.format(name=chembl_id)
+        return self.molfiles.get(chembl_id)
+
+    def _send_json(self, payload, status=200):
+        self._send(json.dumps(payload).encode(), 'application/json', status)
+
+    def _send(self, body: bytes, content_type: str, status=200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        prefix = '/chembl/molecule/'
+        if path.startswith(prefix) and path.endswith('.sdf'):
+            molfile = self._molfile(unquote(path[len(prefix):-len('.sdf')]))
+            if molfile is None:
+                return self._send(b'', 'chemical/x-mdl-sdfile', 404)
+            return self._send(f"{molfile}$$$$\n".encode(), 'chemical/x-mdl-sdfile')
+
+        prefix = '/chembl/molecule/set/'
+        if not (path.startswith(prefix) and path.endswith('.json')):
+            return self._send_json({'error': 'not found'}, 404)
+
+        ids = unquote(path[len(prefix):-len('.json')]).split(';')
+        molecules, not_found = [], []
+        for chembl_id in ids:
+            name = self._lookup(self.drug_names, chembl_id, 'Drug')
+            if name is None:
+                not_found.append(chembl_id)
+                continue
+            molfile = self._molfile(chembl_id)
+            molecules.append({
+                'molecule_chembl_id': chembl_id,
+                'pref_name': name,
+                'molecule_synonyms': [],
+                'molecule_structures': {'molfile': molfile} if molfile else None,
+            })
+        self._send_json({'molecules': molecules, 'not_found': not_found})
+
+    def do_POST(self):
+        if self.path != '/opentargets/graphql':
+            return self._send_json({'error': 'not found'}, 404)
+
+        length = int(self.headers.get('Content-Length', 0))
+        variables = json.loads(self.rfile.read(length) or b'{}').get('variables') or {}
+        diseases = []
+        for disease_id in variables.get('ids', []):
+            name = self._lookup(self.disease_names, disease_id, 'Disease')
+            if name is not None:
+                diseases.append({'id': disease_id, 'name': name})
+        self._send_json({'data': {'diseases': diseases}})
+
+    def log_message(self, format, *args):
+        pass  # Keep test output quiet
+
+
+def start_stub_server(drug_names: dict = None, disease_names: dict = None, port: int = 0,
+                      molfiles: dict = None):
+    """Start the stand-in on a background thread.
+
+    Returns ``(server, env)`` where ``env`` holds the CHEMBL_API_URL and
+    OPENTARGETS_API_URL values pointing at it. Call ``server.shutdown()`` to stop.
+    """
+    handler = type('StubHandler', (_StubHandler,), {
+        'drug_names': drug_names,
+        'disease_names': disease_names,
+        'molfiles': molfiles,
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    env = {
+        'CHEMBL_API_URL': f"{base_url}/chembl",
+        'OPENTARGETS_API_URL': f"{base_url}/opentargets/graphql",
+    }
+    return server, env
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stand-in ChEMBL/OpenTargets name server')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server, env = start_stub_server(port=args.port)
+    for key, value in env.items():
+        print(f"{key}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -20,7 +20,6 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 import pandas as pd
-import numpy as np
 import joblib
 
 from config import CHECKPOINTS_DIR, FEATURE_NAMES
@@ -29,6 +28,7 @@ from src.data_loader import DataLoader
 from src.feature_engine import FeatureEngine
 from src.gates import PostModelGates
 from src.explainer import DrugExplainer
+from features import FeaturePipeline
 
 
 def search_disease(client: OpenTargetsClient, query: str) -> dict:
@@ -261,9 +261,14 @@ def predict_drug_repurposing(disease_query: str, top_k: int = 10, output_format:
         structure_handler=loader.structure_handler
     )
     
+    # Same column order, NaN fill and scaling as training (and the API server)
+    booster = model.get_booster() if hasattr(model, 'get_booster') else None
+    pipeline = FeaturePipeline(FEATURE_NAMES, scaler, booster)
+    
     # Compute features for each drug-disease pair
     print("🔧 Computing features...", file=sys.stderr)
     predictions = []
+    feature_rows = []
     
     for drug in candidate_drugs:
         drug_id = drug['drug_id']
@@ -272,32 +277,27 @@ def predict_drug_repurposing(disease_query: str, top_k: int = 10, output_format:
         try:
             # Compute features
             features = engine.compute_features(drug_id, disease_id)
-            feature_vector = [features.get(f, 0.0) for f in FEATURE_NAMES]
-            
-            # Scale features if scaler available (use DataFrame to avoid warnings)
-            if scaler:
-                import warnings
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore")
-                    feature_vector = scaler.transform([feature_vector])[0]
-            
-            # Predict probability
-            prob = model.predict_proba([feature_vector])[0][1]
-            
-            predictions.append({
-                'drug_id': drug_id,
-                'drug_name': drug_name,
-                'score': float(prob),
-                'gene_overlap': features.get('gene_overlap_count', 0),
-                'association_score': features.get('max_association_score', 0)
-            })
         except Exception as e:
             # Skip drugs that fail feature computation
             continue
+        
+        feature_rows.append(features)
+        predictions.append({
+            'drug_id': drug_id,
+            'drug_name': drug_name,
+            'score': None,
+            'gene_overlap': features.get('gene_overlap_count', 0),
+            'association_score': features.get('max_association_score', 0)
+        })
     
     if not predictions:
         return "❌ Could not compute predictions for any candidates"
     
+    # Scale and score all candidates in one block
+    probs = model.predict_proba(pipeline.transform_records(feature_rows))[:, 1]
+    for pred, prob in zip(predictions, probs):
+        pred['score'] = float(prob)
+    
     # Apply guardrails (domain-based penalties)
     predictions = apply_guardrails(predictions, disease_name, disease_id, engine, client)
     
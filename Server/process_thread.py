@@ -0,0 +1,37 @@
+"""
+Background threads that run in every server process.
+
+Threads don't survive fork, so a thread started in gunicorn's master (or
+before a worker forked) is gone in the workers. A ProcessThread is started
+lazily instead, the first time each process needs it.
+"""
+
+import os
+import threading
+
+
+class ProcessThread:
+    """A daemon thread running ``target()``, started once per process by ensure_started().
+
+    ``setup()``, if given, runs first in each process, to create the
+    per-process state (queues, sessions, locks) the thread works with.
+    """
+
+    def __init__(self, target, name: str, setup=None):
+        self.target = target
+        self.name = name
+        self.setup = setup
+        self._pid = None
+
+    @property
+    def started(self) -> bool:
+        """True if the thread was started in this process."""
+        return self._pid == os.getpid()
+
+    def ensure_started(self):
+        if self.started:
+            return
+        self._pid = os.getpid()
+        if self.setup is not None:
+            self.setup()
+        threading.Thread(target=self.target, name=self.name, daemon=True).start()
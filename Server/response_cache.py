@@ -0,0 +1,126 @@
+"""
+HTTP response cache for the prediction endpoints.
+
+A prediction response only depends on the model and feature files it was
+scored from, the request's ID and query parameters, and the names known at the
+time. Serialized responses are kept in a bounded LRU (with a TTL) keyed on
+exactly that, and served with a strong ETag so clients can revalidate with
+``If-None-Match`` and get a bodiless 304.
+
+Settings (environment variables):
+    RESPONSE_CACHE_SIZE     entries kept per process (default 4096, 0 disables)
+    RESPONSE_CACHE_TTL      seconds an entry is reused (default 3600)
+    RESPONSE_MAX_AGE        Cache-Control max-age sent to clients (default 60)
+"""
+
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request
+
+import metrics
+
+CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 4096))
+CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', 3600))
+MAX_AGE = int(os.environ.get('RESPONSE_MAX_AGE', 60))
+
+
+class ResponseCache:
+    """Thread-safe LRU of ``key -> (body, etag)`` with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key, body: bytes) -> str:
+        """Store ``body`` and return its (strong) ETag."""
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        if self.max_entries <= 0:
+            return etag
+        with self._lock:
+            self._entries[key] = (body, etag, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def response_key(view_name: str, kwargs: dict, args, params, version) -> tuple:
+    """Cache key of a view's response: its URL arguments, the ``params`` of ``args`` and ``version``."""
+    return (view_name, tuple(sorted(kwargs.items())), tuple(args.get(p) for p in params), version)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """True if an If-None-Match header value matches ``etag``.
+
+    The header is a comma-separated list of entity tags, or ``*``; tags are
+    compared weakly (``W/"x"`` matches ``"x"``), as If-None-Match requires.
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    if '*' in tags:
+        return True
+    return any(tag.removeprefix('W/') == etag for tag in tags)
+
+
+def cached_response(cache: ResponseCache, version, params=('top_k',)):
+    """Serve a JSON view from ``cache``, with ETag/304 handling.
+
+    ``version()`` identifies what the view's output depends on besides the
+    request (model/feature fingerprints, name updates); it is part of the key,
+    so a new model never serves an old answer. Only the query parameters in
+    ``params`` are part of the key. Non-200 responses are not cached.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            key = response_key(view.__name__, kwargs, request.args, params, version())
+            entry = cache.get(key)
+            metrics.count(metrics.RESPONSE_CACHE, view.__name__, 'miss' if entry is None else 'hit')
+            if entry is None:
+                response = current_app.make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+                body = response.get_data()
+                etag = cache.put(key, body)
+            else:
+                body, etag = entry
+
+            if etag_matches(request.headers.get('If-None-Match'), etag):
+                metrics.count(metrics.RESPONSE_CACHE, view.__name__, 'not_modified')
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.response_class(body, mimetype='application/json')
+            response.headers['ETag'] = etag
+            response.headers['Cache-Control'] = f'public, max-age={MAX_AGE}'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,372 @@
+"""
+Sparse disease x drug score matrix.
+
+A model's pair scores as a sparse matrix in two layouts:
+
+    CSR (by disease)   row_ptr[d]:row_ptr[d + 1] slices row_drug / row_score /
+                       row_pos / row_phase, the disease's drugs, scores, table
+                       rows and drug max phases
+    CSC (by drug)      the same by drug (col_ptr, col_disease, col_score, ...)
+
+Within every row and column the entries are stored best first (score
+descending, ties by table row), so a top-k query is a slice: O(k), no
+selection at request time. Score thresholds cut a contiguous window out of
+that order (found by binary search), and a page resumes at an entry offset,
+so deep pages and filtered queries cost O(page) too; only a max-phase filter
+has to scan, from the resume offset until the page is full. A single pair is
+found by binary search in the
+sorted ``disease code * n_drugs + drug code`` keys. IDs map to codes through
+sorted copies of the ID arrays, so nothing is rebuilt into Python dicts.
+
+Entries are table rows: a pair that appears twice in the table has two
+entries, and a score lookup returns the better one.
+
+The matrix is saved as an uncompressed .npz next to the model's files, with
+the same fingerprint as the score artifact, and loaded by memory-mapping the
+arrays inside it (np.load can't map .npz members), so startup doesn't
+rebuild it and gunicorn workers share its pages.
+"""
+
+import bisect
+import io
+import mmap
+import os
+import struct
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from score_store import build_lock, temporary_path
+
+_ARRAYS = (
+    'disease_ids', 'drug_ids', 'disease_sorted', 'disease_sorted_codes', 'drug_sorted', 'drug_sorted_codes',
+    'row_ptr', 'row_drug', 'row_score', 'row_pos', 'row_phase',
+    'col_ptr', 'col_disease', 'col_score', 'col_pos', 'col_phase',
+    'pair_keys', 'pair_entry',
+)
+
+_LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+
+# Array data is aligned to this many bytes inside the file, so mapped arrays
+# are as fast as in-memory ones (misaligned arrays get copied by many ufuncs)
+ALIGNMENT = 64
+# Extra field ID used for the padding (the one Android's zipalign uses)
+_PADDING_FIELD = 0xD935
+
+
+class ScoreMatrix:
+    """Scores by (disease, drug), with pre-ranked rows and columns."""
+
+    def __init__(self, arrays: dict, fingerprint: str = ''):
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+        self.fingerprint = fingerprint
+        self.num_rows = int(arrays['num_rows'][0])
+
+    @classmethod
+    def build(cls, disease_ids: pd.Series, drug_ids: pd.Series, scores: np.ndarray,
+              fingerprint: str = '', phases: np.ndarray = None) -> 'ScoreMatrix':
+        """Build the matrix from a long-format pair table (one entry per row).
+
+        ``phases`` are the rows' drug max phases (0 where not given).
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        phases = np.zeros(len(scores), np.float32) if phases is None else np.asarray(phases, dtype=np.float32)
+        disease_codes, diseases = pd.factorize(disease_ids)
+        drug_codes, drugs = pd.factorize(drug_ids)
+        pos_dtype = np.int32 if len(scores) < 2 ** 31 else np.int64
+        n_diseases, n_drugs = len(diseases), len(drugs)
+
+        # NaN scores rank last
+        neg_scores = -np.nan_to_num(scores, nan=-np.inf)
+        # A row without a disease ID is still an entry of its drug's column
+        # (and vice versa): each axis is indexed independently
+        rows = np.flatnonzero(disease_codes >= 0)
+        row_order = rows[np.lexsort((rows, neg_scores[rows], disease_codes[rows]))]
+        cols = np.flatnonzero(drug_codes >= 0)
+        col_order = cols[np.lexsort((cols, neg_scores[cols], drug_codes[cols]))]
+        # Within a disease, entries are best first, so a stable sort by pair
+        # key puts the best entry of a duplicated pair first
+        paired = np.flatnonzero(drug_codes[row_order] >= 0)
+        pair_keys = disease_codes[row_order[paired]].astype(np.int64) * n_drugs + drug_codes[row_order[paired]]
+        pair_entry = paired[np.argsort(pair_keys, kind='stable')]
+        pair_keys = np.sort(pair_keys, kind='stable')
+
+        disease_ids = np.asarray(diseases, dtype=str)
+        drug_ids = np.asarray(drugs, dtype=str)
+        disease_sorted_codes = np.argsort(disease_ids).astype(np.int32)
+        drug_sorted_codes = np.argsort(drug_ids).astype(np.int32)
+        arrays = {
+            'disease_ids': disease_ids,
+            'drug_ids': drug_ids,
+            'disease_sorted': disease_ids[disease_sorted_codes],
+            'disease_sorted_codes': disease_sorted_codes,
+            'drug_sorted': drug_ids[drug_sorted_codes],
+            'drug_sorted_codes': drug_sorted_codes,
+            'row_ptr': _pointers(disease_codes[rows], n_diseases),
+            'row_drug': drug_codes[row_order].astype(np.int32),  # -1: no drug ID
+            'row_score': scores[row_order],
+            'row_pos': row_order.astype(pos_dtype),
+            'row_phase': phases[row_order],
+            'col_ptr': _pointers(drug_codes[cols], n_drugs),
+            'col_disease': disease_codes[col_order].astype(np.int32),  # -1: no disease ID
+            'col_score': scores[col_order],
+            'col_pos': col_order.astype(pos_dtype),
+            'col_phase': phases[col_order],
+            'pair_keys': pair_keys,
+            'pair_entry': pair_entry.astype(pos_dtype),
+            'num_rows': np.array([len(scores)], dtype=np.int64),
+        }
+        return cls(arrays, fingerprint)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def disease_code(self, disease_id: str) -> int:
+        """Code of ``disease_id``, or -1 if it has no entries."""
+        return _code(self.disease_sorted, self.disease_sorted_codes, disease_id)
+
+    def drug_code(self, drug_id: str) -> int:
+        """Code of ``drug_id``, or -1 if it has no entries."""
+        return _code(self.drug_sorted, self.drug_sorted_codes, drug_id)
+
+    def disease_count(self, disease_id: str) -> int:
+        code = self.disease_code(disease_id)
+        return 0 if code < 0 else int(self.row_ptr[code + 1] - self.row_ptr[code])
+
+    def drug_count(self, drug_id: str) -> int:
+        code = self.drug_code(drug_id)
+        return 0 if code < 0 else int(self.col_ptr[code + 1] - self.col_ptr[code])
+
+    def top_drugs(self, disease_id: str, k: int):
+        """``(entries for the disease, table rows of its top k)``, best first.
+
+        ``k`` slices like ``[:k]`` (so a negative ``k`` drops the worst entries).
+        """
+        return _top(self.row_ptr, self.row_pos, self.disease_code(disease_id), k)
+
+    def top_diseases(self, drug_id: str, k: int):
+        """``(entries for the drug, table rows of its top k)``, best first."""
+        return _top(self.col_ptr, self.col_pos, self.drug_code(drug_id), k)
+
+    def drugs_page(self, disease_id: str, limit: int, start: int = 0, min_score: float = None,
+                   max_score: float = None, min_phase: float = None, count: bool = True):
+        """One page of the disease's ranked drugs that pass the filters.
+
+        Keeps entries with ``min_score <= score < max_score`` (NaN scores only
+        pass without ``min_score``) and ``phase >= min_phase``, best first,
+        from entry offset ``start`` on. Returns ``(entries for the disease,
+        matching entries or None, table rows of the page, offset the next page
+        starts at or None)``. Counting the matches of a phase filter scans the
+        window, so pass ``count=False`` when the caller already knows it.
+        """
+        return _page(self.row_ptr, self.row_pos, self.row_score, self.row_phase, self.disease_code(disease_id),
+                     limit, start, min_score, max_score, min_phase, count)
+
+    def diseases_page(self, drug_id: str, limit: int, start: int = 0, min_score: float = None,
+                      max_score: float = None, min_phase: float = None, count: bool = True):
+        """One page of the drug's ranked diseases that pass the filters; see drugs_page()."""
+        return _page(self.col_ptr, self.col_pos, self.col_score, self.col_phase, self.drug_code(drug_id),
+                     limit, start, min_score, max_score, min_phase, count)
+
+    def score(self, disease_id: str, drug_id: str):
+        """Score of the pair, or None if the table has no such pair."""
+        disease, drug = self.disease_code(disease_id), self.drug_code(drug_id)
+        if disease < 0 or drug < 0:
+            return None
+        key = disease * len(self.drug_ids) + drug
+        i = int(np.searchsorted(self.pair_keys, key))
+        if i == len(self.pair_keys) or self.pair_keys[i] != key:
+            return None
+        score = float(self.row_score[self.pair_entry[i]])
+        return None if np.isnan(score) else score
+
+    def scores_by_row(self) -> np.ndarray:
+        """Scores in table row order (NaN for rows without an entry)."""
+        scores = np.full(self.num_rows, np.nan)
+        scores[self.col_pos] = self.col_score
+        scores[self.row_pos] = self.row_score
+        return scores
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: Path):
+        """Write the matrix as an uncompressed .npz with aligned arrays (atomically).
+
+        np.load() reads it like any .npz; np.savez can't align the members.
+        """
+        tmp_path = temporary_path(path)
+        arrays = {name: getattr(self, name) for name in _ARRAYS}
+        arrays['fingerprint'] = np.array([self.fingerprint])
+        arrays['num_rows'] = np.array([self.num_rows], dtype=np.int64)
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for name, array in arrays.items():
+                _write_aligned(archive, name + '.npy', np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'ScoreMatrix':
+        """Memory-map a matrix written by save()."""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        arrays = {}
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.compress_type != zipfile.ZIP_STORED:
+                    raise ValueError(f"{path}: {info.filename} is compressed and can't be mapped")
+                arrays[info.filename[:-len('.npy')]] = _map_member(mapped, info)
+        missing = [name for name in _ARRAYS if name not in arrays]
+        if missing:
+            raise ValueError(f"{path} was written by an older version (no {', '.join(missing)})")
+        return cls(arrays, str(arrays['fingerprint'][0]))
+
+
+def load_or_build_matrix(path: Path, fp: str, pairs: pd.DataFrame, score_fn) -> ScoreMatrix:
+    """The stored matrix if it was built for ``fp`` and ``pairs``, else build and save one.
+
+    Drug max phases are read from the ``drug_max_phase`` column of ``pairs``, if it has one.
+    """
+    matrix = _load_current(path, fp, len(pairs))
+    if matrix is not None:
+        return matrix
+
+    with build_lock(path):
+        # Built by another process while this one waited for the lock?
+        matrix = _load_current(path, fp, len(pairs))
+        if matrix is not None:
+            return matrix
+        phases = pairs['drug_max_phase'].fillna(0).to_numpy() if 'drug_max_phase' in pairs else None
+        matrix = ScoreMatrix.build(pairs['disease_id'], pairs['chembl_id'], score_fn(), fp, phases)
+        try:
+            matrix.save(path)
+            print(f"✓ Built score matrix ({len(matrix.disease_ids)} diseases x {len(matrix.drug_ids)} drugs) at {path}")
+        except Exception as e:
+            print(f"Warning: Could not save score matrix {path}: {e}")
+    return matrix
+
+
+def _load_current(path: Path, fp: str, num_rows: int):
+    """The matrix stored at ``path`` if it was built for ``fp`` and ``num_rows`` pairs, else None."""
+    if not path.exists():
+        return None
+    try:
+        matrix = ScoreMatrix.load(path)
+    except Exception as e:
+        print(f"Warning: Could not read score matrix {path}: {e}")
+        return None
+    if matrix.fingerprint == fp and matrix.num_rows == num_rows:
+        print(f"✓ Mapped score matrix from {path}")
+        return matrix
+    return None
+
+
+def _pointers(codes: np.ndarray, n: int) -> np.ndarray:
+    return np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=n)))).astype(np.int64)
+
+
+def _code(sorted_ids: np.ndarray, sorted_codes: np.ndarray, key: str) -> int:
+    i = int(np.searchsorted(sorted_ids, key))
+    if i == len(sorted_ids) or sorted_ids[i] != key:
+        return -1
+    return int(sorted_codes[i])
+
+
+def _top(ptr: np.ndarray, positions: np.ndarray, code: int, k: int):
+    if code < 0:
+        return 0, positions[:0]
+    start, stop = int(ptr[code]), int(ptr[code + 1])
+    return stop - start, positions[start:stop][:k]
+
+
+def _count_at_least(scores: np.ndarray, threshold: float) -> int:
+    """Number of leading entries of a best-first score run with ``score >= threshold``."""
+    # Binary search on the array itself; negating it for np.searchsorted would copy the run
+    return bisect.bisect_left(scores, True, key=lambda score: not score >= threshold)
+
+
+def _scan_phases(phases: np.ndarray, start: int, stop: int, limit: int, min_phase: float) -> np.ndarray:
+    """Offsets of the first ``limit`` entries in ``[start, stop)`` with ``phase >= min_phase``."""
+    found, needed, chunk = [], limit, max(limit, 64)
+    while start < stop and needed > 0:
+        end = min(stop, start + chunk)
+        hits = np.flatnonzero(phases[start:end] >= min_phase)[:needed] + start
+        found.append(hits)
+        needed -= len(hits)
+        start, chunk = end, chunk * 2
+    return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+def _page(ptr, positions, scores, phases, code: int, limit: int, start: int,
+          min_score, max_score, min_phase, count: bool):
+    if code < 0 or limit <= 0:
+        total = 0 if code < 0 else int(ptr[code + 1] - ptr[code])
+        return total, 0 if count else None, positions[:0], None
+    begin, end = int(ptr[code]), int(ptr[code + 1])
+    scores, phases = scores[begin:end], phases[begin:end]
+    # Entries are best first, so the score filter is the window [low, high)
+    low = 0 if max_score is None else _count_at_least(scores, max_score)
+    high = end - begin if min_score is None else _count_at_least(scores, min_score)
+    first = max(low, start)
+    if min_phase is None:
+        matching = max(high - low, 0)
+        offsets = np.arange(first, max(first, min(high, first + limit)))
+    else:
+        matching = int(np.count_nonzero(phases[low:high] >= min_phase)) if count else None
+        offsets = _scan_phases(phases, first, high, limit, min_phase)
+    resume = int(offsets[-1]) + 1 if len(offsets) == limit else None
+    if resume is not None and resume >= high:
+        resume = None
+    return end - begin, matching if count else None, positions[begin:end][offsets], resume
+
+
+def _write_aligned(archive: zipfile.ZipFile, name: str, array: np.ndarray):
+    buffer = io.BytesIO()
+    np.lib.format.write_array(buffer, array, allow_pickle=False)
+    data = buffer.getvalue()
+    data_start = len(data) - array.nbytes  # Length of the .npy header
+    # Pad the local header's extra field so the array data lands on ALIGNMENT
+    unpadded = archive.fp.tell() + _LOCAL_HEADER.size + len(name.encode()) + 4 + data_start
+    padding = -unpadded % ALIGNMENT
+    info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_STORED
+    info.extra = struct.pack('<HH', _PADDING_FIELD, padding) + bytes(padding)
+    archive.writestr(info, data)
+
+
+def _map_member(mapped: mmap.mmap, info: zipfile.ZipInfo) -> np.ndarray:
+    """A read-only array over one stored .npy member of a mapped zip file."""
+    header = _LOCAL_HEADER.unpack_from(mapped, info.header_offset)
+    name_length, extra_length = header[-2], header[-1]
+    start = info.header_offset + _LOCAL_HEADER.size + name_length + extra_length
+    member = memoryview(mapped)[start:start + info.file_size]
+
+    reader = _Reader(member)
+    version = np.lib.format.read_magic(reader)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(reader)
+    elif version == (2, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(reader)
+    else:
+        raise ValueError(f"Unsupported .npy format version {version} in {info.filename}")
+    array = np.frombuffer(member, dtype=dtype, count=int(np.prod(shape)), offset=reader.offset)
+    if (start + reader.offset) % dtype.alignment:
+        array = array.copy()  # Not written by save(); don't pay for misalignment on every access
+    return array.reshape(shape, order='F' if fortran_order else 'C')
+
+
+class _Reader:
+    """Minimal file-like view of a buffer, for numpy's .npy header parser."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.offset = 0
+
+    def read(self, size: int) -> bytes:
+        data = bytes(self.buffer[self.offset:self.offset + size])
+        self.offset += size
+        return data
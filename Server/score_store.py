@@ -0,0 +1,160 @@
+"""
+Precomputed drug-disease pair scores.
+
+The feature tables behind the API are static between deploys, so every pair is
+scored once and the result is stored next to the pair IDs in a Parquet file.
+The file carries a fingerprint of the model and feature files it was built
+from; a stale artifact is ignored and rebuilt.
+
+The server builds the artifacts on startup when they are missing; when several
+processes need the same artifact (e.g. every gunicorn worker reloading), one
+builds it under build_lock() while the others wait and then read it. To build
+them offline (e.g. as a deploy step), run:
+    python score_store.py
+"""
+
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # Not on POSIX: no cross-process locking
+    fcntl = None
+
+from columnar import table_fingerprint
+
+SCORE_COLUMN = 'score'
+FINGERPRINT_KEY = b'fingerprint'
+ID_COLUMNS = ['chembl_id', 'disease_id']
+
+
+def fingerprint(*paths, parts=(), tables=()) -> str:
+    """SHA-256 over the contents of the given files, in order, then of ``parts`` and ``tables``.
+
+    ``parts`` are fingerprints taken earlier (e.g. of files as they were
+    loaded). Tables (CSV paths) count by their contents as
+    columnar.table_fingerprint() reports them, so converting a table to its
+    columnar copy keeps the fingerprint.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    for part in parts:
+        digest.update(part.encode())
+    for table in tables:
+        digest.update(table_fingerprint(table).encode())
+    return digest.hexdigest()
+
+
+def load_scores(artifact_path: Path, expected_fingerprint: str, pairs: pd.DataFrame):
+    """Load stored scores for ``pairs``, or None if the artifact is missing or stale."""
+    if not artifact_path.exists():
+        return None
+    try:
+        table = pq.read_table(artifact_path)
+    except Exception as e:
+        print(f"Warning: Could not read score artifact {artifact_path}: {e}")
+        return None
+
+    metadata = table.schema.metadata or {}
+    if metadata.get(FINGERPRINT_KEY, b'').decode() != expected_fingerprint:
+        return None
+    if table.num_rows != len(pairs):
+        return None
+    # Scores are stored positionally; make sure the pair IDs still line up
+    for column in ID_COLUMNS:
+        stored = table.column(column).to_numpy(zero_copy_only=False)
+        if not np.array_equal(stored, pairs[column].to_numpy(dtype=object)):
+            return None
+    return table.column(SCORE_COLUMN).to_numpy()
+
+
+def save_scores(artifact_path: Path, fp: str, pairs: pd.DataFrame, scores: np.ndarray):
+    """Write pair IDs and scores to a Parquet artifact (atomically)."""
+    table = pa.table({
+        'chembl_id': pa.array(pairs['chembl_id'].to_numpy(dtype=object)).dictionary_encode(),
+        'disease_id': pa.array(pairs['disease_id'].to_numpy(dtype=object)).dictionary_encode(),
+        SCORE_COLUMN: pa.array(scores, type=pa.float64()),
+    }, metadata={FINGERPRINT_KEY: fp.encode()})
+
+    tmp_path = temporary_path(artifact_path)
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, artifact_path)
+
+
+def temporary_path(path: Path) -> Path:
+    """A path next to ``path`` to write it to before os.replace(), unique to this process and thread."""
+    path = Path(path)
+    return path.with_name(path.name + f'.{os.getpid()}.{threading.get_ident()}.tmp')
+
+
+@contextmanager
+def build_lock(path: Path):
+    """Hold an exclusive lock on building ``path``, shared by every process on the host.
+
+    Whoever gets it second finds the artifact built when it checks again.
+    """
+    if fcntl is None:
+        yield
+        return
+    lock_path = Path(path).with_name(Path(path).name + '.lock')
+    try:
+        lock_file = open(lock_path, 'a')
+    except OSError:
+        # Read-only directory: the save fails anyway, so just build
+        yield
+        return
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_or_build_scores(artifact_path: Path, fp: str, pairs: pd.DataFrame, score_fn) -> np.ndarray:
+    """Return scores for ``pairs``, building and saving them with ``score_fn`` if needed."""
+    scores = _load_current(artifact_path, fp, pairs)
+    if scores is not None:
+        return scores
+
+    with build_lock(artifact_path):
+        # Built by another process while this one waited for the lock?
+        scores = _load_current(artifact_path, fp, pairs)
+        if scores is not None:
+            return scores
+        scores = score_fn()
+        try:
+            save_scores(artifact_path, fp, pairs, scores)
+            print(f"✓ Scored {len(scores)} pairs and saved them to {artifact_path}")
+        except Exception as e:
+            print(f"Warning: Could not save score artifact {artifact_path}: {e}")
+    return scores
+
+
+def _load_current(artifact_path: Path, fp: str, pairs: pd.DataFrame):
+    scores = load_scores(artifact_path, fp, pairs)
+    if scores is not None:
+        print(f"✓ Loaded {len(scores)} precomputed pair scores from {artifact_path}")
+    return scores
+
+
+def main():
+    # The loaders build (or validate) the artifacts as a side effect
+    import app
+
+    app.load_models()
+
+
+if __name__ == '__main__':
+    main()
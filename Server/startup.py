@@ -0,0 +1,150 @@
+"""
+Concurrent, optionally lazy loading of the server's artifacts.
+
+Each artifact (a model, a table and its scores, the name caches, ...) is
+registered with a load function and the artifacts it needs. start() loads
+every eager artifact in a thread pool, in dependency order, so independent
+artifacts load side by side. Lazy artifacts (and anything depending on them)
+are loaded by the first caller that needs them (ensure()), in that caller's
+thread; so is everything when start() is never called.
+
+Every artifact records its state and load timings for the readiness endpoint:
+    pending       not started yet (lazy artifacts stay here until first use)
+    loading       being loaded
+    ready         loaded
+    unavailable   the load function returned False (e.g. files not found)
+    failed        the load function raised
+
+A dependency only has to have finished, not succeeded: load functions check
+what they actually got, as they did when everything loaded in sequence.
+"""
+
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING, LOADING, READY, UNAVAILABLE, FAILED = 'pending', 'loading', 'ready', 'unavailable', 'failed'
+
+
+class Artifact:
+    def __init__(self, name: str, load, depends: tuple):
+        self.name = name
+        self.load = load
+        self.depends = tuple(depends)
+        self.lazy = False
+        self.scheduled = False
+        self.state = PENDING
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    @property
+    def settled(self) -> bool:
+        return self.done.is_set()
+
+
+class ArtifactLoader:
+    """Loads registered artifacts concurrently and tracks their state."""
+
+    def __init__(self):
+        self._artifacts = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.created = time.monotonic()
+
+    def register(self, name: str, load, depends=()):
+        """Register ``load()``; it runs once, after every artifact in ``depends``."""
+        for dependency in depends:
+            if dependency not in self._artifacts:
+                raise ValueError(f"Unknown dependency {dependency!r} of {name!r}")
+        self._artifacts[name] = Artifact(name, load, depends)
+
+    def start(self, lazy=()):
+        """Start loading every artifact not named in ``lazy`` in the background."""
+        for name in lazy:
+            if name not in self._artifacts:
+                raise ValueError(f"Unknown artifact {name!r}")
+        # Registration order is dependency order, and anything built from a
+        # lazy artifact has to wait for its first use too
+        for artifact in self._artifacts.values():
+            artifact.lazy = artifact.name in lazy or any(self._artifacts[d].lazy for d in artifact.depends)
+        eager = [a for a in self._artifacts.values() if not a.lazy and a.state == PENDING]
+        if not eager:
+            return self
+        # One thread per artifact: a task blocked on its dependencies never
+        # starves the tasks it is waiting for
+        self._executor = ThreadPoolExecutor(max_workers=len(eager), thread_name_prefix='startup')
+        for artifact in eager:
+            artifact.scheduled = True
+            self._executor.submit(self._load, artifact)
+        return self
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the artifacts being loaded have settled, then stop the pool."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for artifact in self._artifacts.values():
+            if not (artifact.scheduled or artifact.state == LOADING):
+                continue
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not artifact.done.wait(remaining):
+                return False
+        if self._executor is not None:
+            # No idle threads left behind, e.g. across gunicorn's fork
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        return True
+
+    def ensure(self, *names) -> bool:
+        """Make sure ``names`` are loaded, loading lazy ones now; True if all are ready."""
+        for name in names:
+            self._load(self._artifacts[name])
+        return all(self._artifacts[name].state == READY for name in names)
+
+    def _load(self, artifact: Artifact):
+        with self._lock:
+            claimed = artifact.state == PENDING
+            if claimed:
+                artifact.state = LOADING
+        if not claimed:
+            artifact.done.wait()
+            return
+
+        for dependency in artifact.depends:
+            self._load(self._artifacts[dependency])
+        artifact.started = time.monotonic()
+        try:
+            loaded = artifact.load()
+            artifact.state = UNAVAILABLE if loaded is False else READY
+        except Exception as e:
+            artifact.state = FAILED
+            artifact.error = f"{type(e).__name__}: {e}"
+            print(f"✗ Loading {artifact.name} failed: {artifact.error}")
+            traceback.print_exc()
+        finally:
+            artifact.finished = time.monotonic()
+            artifact.done.set()
+
+    def state(self, name: str) -> str:
+        return self._artifacts[name].state
+
+    def settled(self) -> bool:
+        """True once no eager artifact is still pending or loading."""
+        return all(a.settled for a in self._artifacts.values() if not a.lazy)
+
+    def status(self) -> dict:
+        """Per-artifact state and timings (seconds, relative to process start)."""
+        report = {}
+        for artifact in self._artifacts.values():
+            entry = {'state': artifact.state, 'lazy': artifact.lazy}
+            if artifact.started is not None:
+                entry['started_at'] = round(artifact.started - self.created, 3)
+            if artifact.finished is not None and artifact.started is not None:
+                entry['load_seconds'] = round(artifact.finished - artifact.started, 3)
+            if artifact.depends:
+                entry['depends'] = list(artifact.depends)
+            if artifact.error:
+                entry['error'] = artifact.error
+            report[artifact.name] = entry
+        return report
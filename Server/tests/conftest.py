@@ -0,0 +1,61 @@
+"""
+Shared fixtures: the server, serving a copy of the shipped checkpoints, with
+its name lookups pointed at name_stub_server.py.
+
+Everything the server writes (score artifacts, columnar tables, the name
+store) goes to a temporary directory, never to Server/checkpoints.
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVER_DIR))
+
+# Files of the shipped 'original' model and its tables
+CHECKPOINT_FILES = [
+    "xgb_temporal_model.json",
+    "feature_scaler.joblib",
+    "train_pairs.csv",
+    "train_features_checkpoint.csv",
+    "diseases_list.csv",
+]
+
+
+@pytest.fixture(scope='session')
+def checkpoints(tmp_path_factory) -> Path:
+    """A copy of the shipped checkpoints the tests can build artifacts next to."""
+    directory = tmp_path_factory.mktemp('checkpoints')
+    for name in CHECKPOINT_FILES:
+        shutil.copy(SERVER_DIR / "checkpoints" / name, directory / name)
+    return directory
+
+
+@pytest.fixture(scope='session')
+def server(checkpoints, tmp_path_factory):
+    """The app module, with the original model loaded from ``checkpoints``."""
+    from name_stub_server import start_stub_server
+
+    state = tmp_path_factory.mktemp('state')
+    stub, env = start_stub_server()
+    os.environ.update(env)
+    os.environ['NAME_STORE_DB'] = str(state / "names.sqlite3")
+    os.environ['MOLECULE_CACHE_DIR'] = str(state / "molecules")
+    os.environ['RELOAD_GENERATION_FILE'] = str(state / "reload_generation.json")
+    import app
+
+    app.MODELS['original'].directory = checkpoints
+    # No extended model is shipped; keep the server from looking for one in the tree
+    app.MODELS['extended'].directory = state / "API"
+    assert app.load_models('original')
+    yield app
+    stub.shutdown()
+
+
+@pytest.fixture
+def client(server):
+    return server.app.test_client()
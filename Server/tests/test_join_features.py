@@ -0,0 +1,57 @@
+"""model_registry.join_features() against an independent pandas merge of the shipped tables."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SERVER_DIR
+from model_registry import join_features
+
+
+@pytest.fixture(scope='module')
+def tables():
+    pairs = pd.read_csv(SERVER_DIR / "checkpoints" / "train_pairs.csv")
+    features = pd.read_csv(SERVER_DIR / "checkpoints" / "train_features_checkpoint.csv")
+    # Shuffled, and with some pairs left without a feature row
+    keep = np.random.default_rng(0).permutation(len(features))[:len(features) - 3000]
+    return pairs, features.iloc[keep].reset_index(drop=True)
+
+
+def test_matches_merge(tables):
+    pairs, features = tables
+    joined = join_features(pairs, features, 'index')
+    merged = pairs.reset_index().merge(features, on='index')
+
+    assert len(joined) == len(merged)
+    assert joined.index.name == 'index'
+    # Each pair keeps its own IDs and feature values
+    expected = merged.set_index('index').loc[joined.index, joined.columns]
+    pd.testing.assert_frame_equal(joined, expected, check_dtype=False)
+
+
+def test_groups_pairs_by_disease(tables):
+    pairs, features = tables
+    joined = join_features(pairs, features, 'index')
+
+    # One block per disease, in order of first appearance in the pair table...
+    codes = pd.factorize(joined['disease_id'])[0]
+    assert (np.diff(codes) >= 0).all()
+    served = set(joined['disease_id'])
+    first_seen = [disease for disease in pd.unique(pairs['disease_id']) if disease in served]
+    assert list(pd.unique(joined['disease_id'])) == first_seen
+    # ...and the pairs of each in table order
+    for _, rows in joined.groupby('disease_id', sort=False):
+        assert rows.index.is_monotonic_increasing
+
+
+@pytest.mark.parametrize('change, message', [
+    (lambda f: pd.concat([f, f.head(2)]), 'more than one feature row'),
+    (lambda f: f.assign(index=f['index'] + 100000), 'must be pair rows'),
+    (lambda f: f.assign(index=f['index'].where(f['index'] > 5)), 'must be integers'),
+    (lambda f: f.assign(index=f['index'] + 0.5), 'must be integers'),
+    (lambda f: f.drop(columns=['index']), "no 'index' column"),
+])
+def test_rejects_bad_feature_tables(tables, change, message):
+    pairs, features = tables
+    with pytest.raises(ValueError, match=message):
+        join_features(pairs, change(features), 'index')
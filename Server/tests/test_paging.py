@@ -0,0 +1,96 @@
+"""Cursor paging of /api/repurpose and /api/drug-diseases against a brute-force ranking."""
+
+import random
+
+import numpy as np
+import pytest
+
+# (endpoint, the pair column it ranks by, the column of what it ranks, the response field naming it)
+RANKINGS = [
+    ('/api/repurpose/', 'disease_id', 'chembl_id', 'drug_id'),
+    ('/api/drug-diseases/', 'chembl_id', 'disease_id', 'disease_id'),
+]
+
+
+def _random_filters(rng: random.Random) -> dict:
+    filters = {}
+    if rng.random() < 0.5:
+        filters['min_score'] = round(rng.random(), 2)
+    if rng.random() < 0.5:
+        filters['tier'] = rng.choice(['high', 'medium', 'low'])
+    if rng.random() < 0.5:
+        filters['min_phase'] = rng.choice([-1, 0, 1, 2, 3, 3.5, 4])
+    return filters
+
+
+def _brute_force(server, key_column: str, key: str, filters: dict) -> list:
+    """Every (row, score) of ``key`` passing ``filters``, best first, ties in table order."""
+    pairs = server._served_model('original').pairs
+    scores = pairs[server.SCORE_COLUMN].to_numpy()
+    phases = pairs['drug_max_phase'].fillna(0).to_numpy()
+    rows = np.flatnonzero(pairs[key_column].to_numpy() == key)
+    rows = rows[np.argsort(-scores[rows], kind='stable')]
+    return [
+        row for row in rows
+        if scores[row] >= filters.get('min_score', -np.inf)
+        and ('tier' not in filters or server.get_confidence_tier(scores[row]) == filters['tier'])
+        and phases[row] >= filters.get('min_phase', -np.inf)
+    ]
+
+
+def _all_pages(client, url: str, query: dict) -> list:
+    """Every page of ``url``, following its cursors."""
+    pages, cursor = [], None
+    while True:
+        response = client.get(url, query_string=dict(query, cursor=cursor) if cursor else query)
+        assert response.status_code == 200, response.get_json()
+        pages.append(response.get_json())
+        cursor = pages[-1].get('next_cursor')
+        if not cursor:
+            return pages
+        assert len(pages) < 10000, 'cursor never ended'
+
+
+@pytest.mark.parametrize('url, key_column, ranked_column, field', RANKINGS)
+def test_pages_match_brute_force(server, client, url, key_column, ranked_column, field):
+    rng = random.Random(url)
+    pairs = server._served_model('original').pairs
+    keys = rng.sample(sorted(pairs[key_column].unique()), 40) + ['NOPE']
+    for key in keys:
+        filters = _random_filters(rng)
+        top_k = rng.choice([1, 3, 7, 20])
+        pages = _all_pages(client, url + key, dict(filters, top_k=top_k, model='original'))
+
+        expected = _brute_force(server, key_column, key, filters)
+        got = [p[field] for page in pages for p in page['predictions']]
+        assert got == list(pairs[ranked_column].to_numpy()[expected]), (key, filters)
+        assert all(len(page['predictions']) <= top_k for page in pages)
+        if filters and expected:
+            assert {page['total_matching'] for page in pages} == {len(expected)}
+
+
+@pytest.mark.parametrize('query', [
+    'min_score=abc', 'tier=great', 'min_phase=nan', 'cursor=xyz',
+])
+def test_invalid_parameters(client, query):
+    response = client.get(f'/api/repurpose/EFO_0000270?model=original&{query}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_cursor_is_scoped_to_its_ranking(server, client):
+    pairs = server._served_model('original').pairs
+    counts = pairs['disease_id'].value_counts()
+    first, second = counts.index[:2]
+    body = client.get(f'/api/repurpose/{first}', query_string={'model': 'original', 'top_k': 2}).get_json()
+    cursor = body['next_cursor']
+    assert cursor
+
+    same = client.get(f'/api/repurpose/{first}', query_string={'model': 'original', 'top_k': 2, 'cursor': cursor})
+    assert same.status_code == 200
+    for query in ({'top_k': 2, 'cursor': cursor}, {'top_k': 2, 'min_score': 0.1}):
+        other = client.get(f'/api/repurpose/{second}', query_string=dict(query, model='original', cursor=cursor))
+        assert other.status_code == 400
+    filtered = client.get(f'/api/repurpose/{first}',
+                          query_string={'model': 'original', 'top_k': 2, 'min_score': 0.1, 'cursor': cursor})
+    assert filtered.status_code == 400
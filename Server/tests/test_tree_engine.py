@@ -0,0 +1,49 @@
+"""The NumPy tree engine against xgboost, on the shipped model."""
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import SERVER_DIR
+from features import FeaturePipeline
+from model_config import FEATURE_NAMES
+from tree_engine import TOLERANCE, TreeEnsemble, load_booster, max_difference
+
+xgb = pytest.importorskip('xgboost')
+
+MODEL_PATH = SERVER_DIR / "checkpoints" / "xgb_temporal_model.json"
+
+
+@pytest.fixture(scope='module')
+def ensemble():
+    return TreeEnsemble.load(MODEL_PATH)
+
+
+@pytest.fixture(scope='module')
+def booster():
+    booster = xgb.Booster()
+    booster.load_model(str(MODEL_PATH))
+    return booster
+
+
+def test_matches_booster_on_every_split(ensemble, booster):
+    # Thresholds, the values either side of them and NaN, for every feature
+    assert max_difference(ensemble, booster, ensemble.probe_matrix(rows=50000)) <= TOLERANCE
+
+
+def test_matches_booster_on_shipped_features(ensemble, booster):
+    scaler = joblib.load(SERVER_DIR / "checkpoints" / "feature_scaler.joblib")
+    features = pd.read_csv(SERVER_DIR / "checkpoints" / "train_features_checkpoint.csv")
+    pipeline = FeaturePipeline(FEATURE_NAMES, scaler, booster)
+    matrix = pipeline.transform(features)
+    assert max_difference(ensemble, booster, matrix) <= TOLERANCE
+    np.testing.assert_allclose(pipeline.predict(ensemble, features), pipeline.predict(booster, features),
+                               atol=TOLERANCE)
+
+
+def test_backends():
+    assert isinstance(load_booster(MODEL_PATH, 'numpy'), TreeEnsemble)
+    assert isinstance(load_booster(MODEL_PATH, 'xgboost'), xgb.Booster)
+    with pytest.raises(ValueError):
+        load_booster(MODEL_PATH, 'onnx')
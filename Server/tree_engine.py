@@ -0,0 +1,222 @@
+"""
+NumPy inference for the XGBoost tree ensembles.
+
+The models are small (7 numeric features, ~100 trees), so a whole batch can be
+scored by walking every tree at once with array indexing instead of going
+through DMatrix and xgboost's generic predictor. TreeEnsemble reads the
+model's JSON dump into flat node arrays (split feature, threshold, children,
+default direction, leaf value) and evaluates all trees x rows level by level.
+It follows xgboost's rules: float32 comparisons, ``x < threshold`` goes left,
+missing values take the node's default direction.
+
+Which implementation scores is chosen with INFERENCE_BACKEND:
+    xgboost   always use xgb.Booster
+    numpy     use TreeEnsemble (validated against the booster when xgboost
+              is installed; falls back to the booster on a mismatch)
+    auto      numpy if xgboost is not installed, otherwise xgboost (default)
+
+Check a model by hand with:
+    python tree_engine.py checkpoints/xgb_temporal_model.json
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import xgboost as xgb
+except ImportError:  # Serving only needs NumPy
+    xgb = None
+
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'auto')
+
+# Largest allowed |TreeEnsemble - Booster| probability difference
+TOLERANCE = 1e-6
+
+# Rows walked per block; bounds the (trees x rows) node index arrays
+BLOCK_ROWS = 4096
+
+_OUTPUT_TRANSFORMS = {
+    'binary:logistic': 'sigmoid',
+    'reg:logistic': 'sigmoid',
+    'binary:logitraw': 'identity',
+    'reg:squarederror': 'identity',
+}
+
+
+class TreeEnsemble:
+    """A gbtree model as flat node arrays, scored with vectorized traversal."""
+
+    def __init__(self, model: dict):
+        learner = model['learner']
+        booster = learner['gradient_booster']
+        if booster['name'] != 'gbtree':
+            raise ValueError(f"Unsupported booster type {booster['name']!r}")
+        objective = learner['objective']['name']
+        if objective not in _OUTPUT_TRANSFORMS:
+            raise ValueError(f"Unsupported objective {objective!r}")
+        if int(learner['learner_model_param'].get('num_class', 0)) > 1:
+            raise ValueError("Multi-class models are not supported")
+        self.objective = objective
+        self.feature_names = learner.get('feature_names') or None
+        self.num_features = int(learner['learner_model_param']['num_feature'])
+
+        # base_score is stored as a probability for logistic objectives
+        base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+        if _OUTPUT_TRANSFORMS[objective] == 'sigmoid':
+            self.base_margin = float(np.log(base_score / (1 - base_score)))
+        else:
+            self.base_margin = base_score
+
+        features, thresholds, lefts, rights, default_left, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in booster['model']['trees']:
+            if any(tree.get('split_type', [])):
+                raise ValueError("Categorical splits are not supported")
+            left = np.asarray(tree['left_children'], dtype=np.int32)
+            right = np.asarray(tree['right_children'], dtype=np.int32)
+            is_leaf = left == -1
+            roots.append(offset)
+            features.append(np.where(is_leaf, 0, tree['split_indices']).astype(np.int32))
+            # Leaves store their value in split_conditions
+            thresholds.append(np.asarray(tree['split_conditions'], dtype=np.float32))
+            # Leaves point at themselves, so finished rows stay put
+            self_index = np.arange(len(left), dtype=np.int32) + offset
+            lefts.append(np.where(is_leaf, self_index, left + offset))
+            rights.append(np.where(is_leaf, self_index, right + offset))
+            default_left.append(np.asarray(tree['default_left'], dtype=bool))
+            offset += len(left)
+
+        self.feature = np.concatenate(features)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts)
+        self.right = np.concatenate(rights)
+        self.default_left = np.concatenate(default_left)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.is_leaf = self.left == np.arange(len(self.left))
+        # child[node, went_left] picks the next node with a single gather
+        self._child = np.stack([self.right, self.left], axis=1)
+        self.depth = max(_tree_depth(tree) for tree in booster['model']['trees'])
+
+    @classmethod
+    def load(cls, path: Path) -> 'TreeEnsemble':
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def _margins(self, block: np.ndarray) -> np.ndarray:
+        n = len(block)
+        # Feature-major copy of the block, so a (feature, row) pair is one flat offset
+        values_by_feature = np.ascontiguousarray(block.T).ravel()
+        feature_offsets = self.feature.astype(np.int64) * n
+        rows = np.arange(n)
+        # One (tree, row) cursor per pair, all starting at the roots
+        nodes = np.repeat(self.roots[:, None], n, axis=1)
+        for _ in range(self.depth):
+            values = values_by_feature[feature_offsets[nodes] + rows]
+            go_left = values < self.threshold[nodes]
+            missing = np.isnan(values)
+            if missing.any():
+                go_left |= missing & self.default_left[nodes]
+            nodes = self._child[nodes, go_left.view(np.int8)]
+        # Every cursor is at a leaf now; its threshold slot holds the leaf value
+        return self.threshold[nodes].sum(axis=0, dtype=np.float64) + self.base_margin
+
+    def margins(self, matrix: np.ndarray) -> np.ndarray:
+        """Raw ensemble outputs (before the objective's transform)."""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[1] != self.num_features:
+            raise ValueError(f"Expected a (rows, {self.num_features}) matrix, got {matrix.shape}")
+        if len(matrix) == 0:
+            return np.empty(0, dtype=np.float64)
+        return np.concatenate([
+            self._margins(matrix[start:start + BLOCK_ROWS])
+            for start in range(0, len(matrix), BLOCK_ROWS)
+        ])
+
+    def predict_matrix(self, matrix: np.ndarray) -> np.ndarray:
+        """Scores for a float32 feature block, as ``Booster.predict`` returns them."""
+        margins = self.margins(matrix)
+        if _OUTPUT_TRANSFORMS[self.objective] == 'sigmoid':
+            return 1 / (1 + np.exp(-margins))
+        return margins
+
+    def probe_matrix(self, rows: int = 4096, seed: int = 0) -> np.ndarray:
+        """Inputs that exercise every split: thresholds, values either side, NaN."""
+        rng = np.random.default_rng(seed)
+        splits = ~self.is_leaf
+        matrix = np.zeros((rows, self.num_features), dtype=np.float32)
+        for feature in range(self.num_features):
+            cuts = self.threshold[splits & (self.feature == feature)]
+            if len(cuts) == 0:
+                continue
+            candidates = np.concatenate([
+                cuts,
+                np.nextafter(cuts, np.float32(-np.inf)),
+                np.nextafter(cuts, np.float32(np.inf)),
+                [np.nan],
+            ]).astype(np.float32)
+            matrix[:, feature] = rng.choice(candidates, size=rows)
+        return matrix
+
+
+def _tree_depth(tree: dict) -> int:
+    left, right = tree['left_children'], tree['right_children']
+    depth, frontier = 0, [0]
+    while True:
+        frontier = [c for n in frontier if left[n] != -1 for c in (left[n], right[n])]
+        if not frontier:
+            return depth
+        depth += 1
+
+
+def max_difference(ensemble: TreeEnsemble, booster, matrix: np.ndarray) -> float:
+    """Largest |ensemble - booster| score difference on ``matrix``."""
+    expected = booster.predict(xgb.DMatrix(matrix, feature_names=ensemble.feature_names))
+    return float(np.abs(ensemble.predict_matrix(matrix) - expected).max())
+
+
+def load_booster(model_path: Path, backend: str = None):
+    """Load a model for scoring with the configured inference backend.
+
+    Returns an ``xgb.Booster`` or a ``TreeEnsemble``; both expose
+    ``feature_names`` and are accepted by features.predict_scores().
+    """
+    backend = backend or INFERENCE_BACKEND
+    if backend not in ('auto', 'xgboost', 'numpy'):
+        raise ValueError(f"Unknown INFERENCE_BACKEND {backend!r}")
+    if backend == 'xgboost' and xgb is None:
+        raise ImportError("INFERENCE_BACKEND=xgboost but xgboost is not installed")
+
+    if backend == 'xgboost' or (backend == 'auto' and xgb is not None):
+        booster = xgb.Booster()
+        booster.load_model(str(model_path))
+        return booster
+
+    ensemble = TreeEnsemble.load(model_path)
+    if xgb is not None:
+        booster = xgb.Booster()
+        booster.load_model(str(model_path))
+        difference = max_difference(ensemble, booster, ensemble.probe_matrix())
+        if difference > TOLERANCE:
+            print(f"✗ NumPy tree engine differs from xgboost by {difference:.2e}; using xgboost")
+            return booster
+    return ensemble
+
+
+def main():
+    if xgb is None:
+        sys.exit("xgboost is needed to validate the tree engine")
+    for path in sys.argv[1:] or [Path(__file__).parent / "checkpoints" / "xgb_temporal_model.json"]:
+        ensemble = TreeEnsemble.load(path)
+        booster = xgb.Booster()
+        booster.load_model(str(path))
+        difference = max_difference(ensemble, booster, ensemble.probe_matrix(rows=50000))
+        status = '✓' if difference <= TOLERANCE else '✗'
+        print(f"{status} {path}: {len(ensemble.roots)} trees, depth {ensemble.depth}, max difference {difference:.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+"""
+WSGI entry point for production servers.
+
+Loads the models and data once and exposes the Flask app as ``app``:
+    gunicorn -c gunicorn.conf.py
+    waitress-serve --port=5001 wsgi:app
+"""
+
+from app import create_app
+
+app = create_app()
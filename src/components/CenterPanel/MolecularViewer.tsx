@@ -51,6 +51,18 @@ interface Bond {
     type: number; // 1=single, 2=double, 3=triple
 }
 
+// Compact structure as served by /api/molecule: parallel arrays instead of per-atom objects
+interface MoleculeResponse {
+    drug_id: string;
+    drug_name: string;
+    symbols: string[];
+    coords: number[];   // x, y, z per atom
+    bonds: number[];    // start, end, type per bond (0-based atom positions)
+    atom_count: number;
+    bond_count: number;
+    error?: string;
+}
+
 interface MoleculeData {
     drug_id: string;
     drug_name: string;
@@ -58,9 +70,33 @@ interface MoleculeData {
     bonds: Bond[];
     atom_count: number;
     bond_count: number;
-    error?: string;
 }
 
+function decodeMolecule(data: MoleculeResponse): MoleculeData {
+    const atoms: Atom[] = data.symbols.map((symbol, i) => ({
+        id: i,
+        symbol,
+        x: data.coords[3 * i],
+        y: data.coords[3 * i + 1],
+        z: data.coords[3 * i + 2],
+    }));
+    const bonds: Bond[] = [];
+    for (let i = 0; i + 2 < data.bonds.length; i += 3) {
+        bonds.push({ start: data.bonds[i], end: data.bonds[i + 1], type: data.bonds[i + 2] });
+    }
+    return {
+        drug_id: data.drug_id,
+        drug_name: data.drug_name,
+        atoms,
+        bonds,
+        atom_count: data.atom_count,
+        bond_count: data.bond_count,
+    };
+}
+
+// Structures already fetched this session, so clicking back to a drug is instant
+const moleculeCache = new Map<string, MoleculeData>();
+
 interface AtomSphereProps {
     atom: Atom;
     scale: number;
@@ -238,29 +274,47 @@ export function MolecularViewer({ drugId, drugName }: MolecularViewerProps) {
             return;
         }
 
+        const cached = moleculeCache.get(drugId);
+        if (cached) {
+            setMoleculeData(cached);
+            setError(null);
+            setLoading(false);
+            return;
+        }
+
+        // Ignore the answer if another drug was selected in the meantime
+        let cancelled = false;
+
         const fetchMolecule = async () => {
             setLoading(true);
             setError(null);
 
             try {
-                const response = await fetch(`http://localhost:5001/api/molecule/${drugId}`);
-                const data = await response.json();
+                const response = await fetch(`http://localhost:5001/api/molecule/${encodeURIComponent(drugId)}`);
+                const data: MoleculeResponse = await response.json();
+                if (cancelled) return;
 
                 if (data.error) {
                     setError(data.error);
                     setMoleculeData(null);
                 } else {
-                    setMoleculeData(data);
+                    const molecule = decodeMolecule(data);
+                    moleculeCache.set(drugId, molecule);
+                    setMoleculeData(molecule);
                 }
             } catch (err) {
+                if (cancelled) return;
                 setError('Failed to fetch molecular structure');
                 setMoleculeData(null);
             } finally {
-                setLoading(false);
+                if (!cancelled) setLoading(false);
             }
         };
 
         fetchMolecule();
+        return () => {
+            cancelled = true;
+        };
     }, [drugId]);
 
     if (!drugId) {
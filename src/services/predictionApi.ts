@@ -174,6 +174,64 @@ export interface APIDiseasesByDrugResponse {
     model: string;
 }
 
+/**
+ * Prediction list in the compact `format=columnar` layout: one array per
+ * field, dictionary-encoded fields (confidenceTier) as positions in
+ * `dictionary`, and the text every row shares as templates over the row's
+ * own fields.
+ */
+export interface APIColumnarPredictions {
+    count: number;
+    columns: Record<string, (string | number)[]>;
+    dictionary: Record<string, string[]>;
+    text: Record<string, string | string[]>;
+    constants: Record<string, unknown>;
+}
+
+/** A response as sent with `format=columnar`, before decodeColumnar(). */
+type ColumnarResponse<T extends { predictions: unknown[] }> =
+    Omit<T, 'predictions'> & { predictions: T['predictions'] | APIColumnarPredictions };
+
+// Fills in the Python format fields the server's templates use: {name}, {name:.Nf}, {name:.N%}
+function formatTemplate(template: string, row: Record<string, unknown>): string {
+    return template.replace(/\{(\w+)(?::\.(\d+)([f%]))?\}/g, (_match, name: string, digits?: string, kind?: string) => {
+        const value = row[name];
+        if (digits === undefined) return String(value);
+        return kind === '%'
+            ? `${(Number(value) * 100).toFixed(Number(digits))}%`
+            : Number(value).toFixed(Number(digits));
+    });
+}
+
+/**
+ * Expand a columnar prediction list into one object per prediction, exactly
+ * as the default row format would have sent it. Row lists pass through.
+ */
+export function decodeColumnar<T>(predictions: T[] | APIColumnarPredictions): T[] {
+    if (Array.isArray(predictions)) return predictions;
+
+    const { count, columns, dictionary, text, constants } = predictions;
+    const fields = Object.keys(columns);
+    const rows: T[] = new Array(count);
+    for (let i = 0; i < count; i++) {
+        const row: Record<string, unknown> = {};
+        for (const field of fields) row[field] = columns[field][i];
+        for (const [field, values] of Object.entries(dictionary)) {
+            if (field in row) row[field] = values[row[field] as number];
+        }
+        for (const [field, template] of Object.entries(text)) {
+            row[field] = Array.isArray(template)
+                ? template.map(t => formatTemplate(t, row))
+                : formatTemplate(template, row);
+        }
+        for (const [field, value] of Object.entries(constants)) {
+            row[field] = Array.isArray(value) ? [...value] : value;
+        }
+        rows[i] = row as T;
+    }
+    return rows;
+}
+
 /**
  * Paginated diseases response from API
  */
@@ -234,15 +292,15 @@ export async function fetchV2Drugs(): Promise<APIExtendedDrug[]> {
  */
 export async function fetchRepurposingPredictions(diseaseId: string, topK: number = 20): Promise<Drug[]> {
     try {
-        const response = await fetch(`${API_BASE_URL}/repurpose/${encodeURIComponent(diseaseId)}?top_k=${topK}`);
+        const response = await fetch(`${API_BASE_URL}/repurpose/${encodeURIComponent(diseaseId)}?top_k=${topK}&format=columnar`);
 
         if (!response.ok) {
             throw new Error(`API error: ${response.status}`);
         }
 
-        const data: APIRepurposingResponse = await response.json();
+        const data: ColumnarResponse<APIRepurposingResponse> = await response.json();
 
-        return data.predictions.map(p => ({
+        return decodeColumnar(data.predictions).map(p => ({
             id: p.drug_id,
             name: p.drug_name,
             confidenceScore: Math.round(p.score * 100),
@@ -273,19 +331,76 @@ export async function fetchRepurposingPredictions(diseaseId: string, topK: numbe
  */
 export async function fetchDiseasesByDrug(drugId: string, topK: number = 20): Promise<APIDiseasesByDrugResponse> {
     try {
-        const response = await fetch(`${API_BASE_URL}/drug-diseases/${encodeURIComponent(drugId)}?top_k=${topK}`);
+        const response = await fetch(`${API_BASE_URL}/drug-diseases/${encodeURIComponent(drugId)}?top_k=${topK}&format=columnar`);
 
         if (!response.ok) {
             throw new Error(`API error: ${response.status}`);
         }
 
-        return await response.json();
+        const data: ColumnarResponse<APIDiseasesByDrugResponse> = await response.json();
+        return { ...data, predictions: decodeColumnar(data.predictions) };
     } catch (error) {
         console.error('Error fetching diseases by drug:', error);
         throw error;
     }
 }
 
+/**
+ * One line of the bulk endpoint's NDJSON stream: the same payload
+ * /repurpose (disease entries) or /drug-diseases (drug entries) returns.
+ */
+export type APIBulkResult =
+    | (Partial<APIRepurposingResponse> & { disease: { id: string; name: string }; message?: string })
+    | (Partial<APIDiseasesByDrugResponse> & { drug: { id: string; name: string }; message?: string });
+
+/**
+ * Rank candidates for many diseases and/or drugs in one request.
+ * Results stream in as NDJSON; onResult is called for each entity as soon
+ * as its line arrives (diseases first, then drugs, in request order).
+ */
+export async function streamBulkPredictions(
+    diseaseIds: string[],
+    drugIds: string[],
+    topK: number = 20,
+    onResult: (result: APIBulkResult) => void
+): Promise<void> {
+    try {
+        const response = await fetch(`${API_BASE_URL}/bulk`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ disease_ids: diseaseIds, drug_ids: drugIds, top_k: topK, format: 'columnar' })
+        });
+
+        if (!response.ok || !response.body) {
+            throw new Error(`API error: ${response.status}`);
+        }
+
+        const emit = (line: string) => {
+            const result = JSON.parse(line);
+            if (result.predictions) result.predictions = decodeColumnar(result.predictions);
+            onResult(result);
+        };
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        for (;;) {
+            const { done, value } = await reader.read();
+            buffered += decoder.decode(value, { stream: !done });
+            const lines = buffered.split('\n');
+            buffered = lines.pop() ?? '';
+            for (const line of lines) {
+                if (line.trim()) emit(line);
+            }
+            if (done) break;
+        }
+        if (buffered.trim()) emit(buffered);
+    } catch (error) {
+        console.error('Error streaming bulk predictions:', error);
+        throw error;
+    }
+}
+
 /**
  * Check health of extended API model
  */